@@ -0,0 +1,148 @@
+from datetime import date, timedelta
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from workout_data import EXERCISE_DATABASE
+
+# Column order of the weekly per-muscle arrays
+MUSCLE_GROUPS = list(EXERCISE_DATABASE)
+MUSCLE_GROUP_COLUMNS = {group: i for i, group in enumerate(MUSCLE_GROUPS)}
+
+# Initial array capacity in weeks; arrays double when a workout falls past the end
+INITIAL_WEEKS = 64
+
+
+def week_start(day: date) -> date:
+    """Monday of the week containing day"""
+    return day - timedelta(days=day.weekday())
+
+
+class ActivityRollups:
+    """
+    Per-member activity counters kept as dense arrays
+
+    ``daily[i]`` holds the number of plan days completed on ``origin + i``
+    and ``weekly[w, g]`` the exercises completed for muscle group ``g`` in
+    the week starting ``origin + 7 * w``. ``origin`` is always a Monday, so
+    the daily array reshapes directly into a (weeks, 7) calendar grid.
+    Recording a workout is O(1); views are slices of the arrays, so render
+    cost depends on the window shown rather than on the length of history.
+    """
+
+    def __init__(self, origin: Optional[date] = None):
+        self.origin = week_start(origin or date.today())
+        self.daily = np.zeros(INITIAL_WEEKS * 7, dtype=np.int32)
+        self.weekly = np.zeros((INITIAL_WEEKS, len(MUSCLE_GROUPS)), dtype=np.int32)
+        self.last_day = -1
+
+    @classmethod
+    def from_logs(cls, daily_logs: Dict[str, List[str]], workout_plan: Optional[Dict[str, Any]]) -> 'ActivityRollups':
+        """
+        Build rollups from a full log history in one pass
+
+        Args:
+            daily_logs: Mapping of ISO date -> list of completed plan days
+            workout_plan: The plan the completed days refer to
+
+        Returns:
+            ActivityRollups holding the same counts as recording each day in turn
+        """
+        if not daily_logs:
+            return cls()
+        days = sorted(daily_logs)
+        rollups = cls(date.fromisoformat(days[0]))
+        for day in days:
+            for plan_day in daily_logs[day]:
+                workout = (workout_plan or {}).get(plan_day, {})
+                rollups.record(day, workout.get('muscle_group'), len(workout.get('exercises', [])))
+        return rollups
+
+    def _ensure_capacity(self, offset: int):
+        """Grow the arrays (doubling) or move the origin back so offset is addressable"""
+        if offset < 0:
+            shift_weeks = -(offset // 7)
+            self.daily = np.concatenate([np.zeros(shift_weeks * 7, dtype=np.int32), self.daily])
+            self.weekly = np.vstack([np.zeros((shift_weeks, len(MUSCLE_GROUPS)), dtype=np.int32), self.weekly])
+            self.origin -= timedelta(weeks=shift_weeks)
+            if self.last_day >= 0:
+                self.last_day += shift_weeks * 7
+            return
+        weeks = len(self.weekly)
+        if offset // 7 >= weeks:
+            new_weeks = max(weeks * 2, offset // 7 + 1)
+            self.daily = np.concatenate([self.daily, np.zeros((new_weeks - weeks) * 7, dtype=np.int32)])
+            self.weekly = np.vstack([self.weekly, np.zeros((new_weeks - weeks, len(MUSCLE_GROUPS)), dtype=np.int32)])
+
+    def record(self, workout_date: str, muscle_group: Optional[str], exercises: int):
+        """
+        Add one completed plan day to the rollups
+
+        Args:
+            workout_date: ISO date of the workout
+            muscle_group: Muscle group of the completed day
+            exercises: Number of exercises performed
+        """
+        day = date.fromisoformat(workout_date)
+        self._ensure_capacity((day - self.origin).days)
+        offset = (day - self.origin).days
+        self.daily[offset] += 1
+        column = MUSCLE_GROUP_COLUMNS.get(muscle_group)
+        if column is not None:
+            self.weekly[offset // 7, column] += exercises
+        self.last_day = max(self.last_day, offset)
+
+    def _offset(self, day: Optional[date]) -> int:
+        return ((day or date.today()) - self.origin).days
+
+    def daily_series(self, today: Optional[date] = None) -> pd.Series:
+        """Completed plan days per calendar day from the first logged week up to today"""
+        end = max(self._offset(today), self.last_day)
+        counts = np.zeros(end + 1, dtype=np.int64)
+        filled = min(end + 1, len(self.daily))
+        counts[:filled] = self.daily[:filled]
+        return pd.Series(counts, index=pd.date_range(self.origin, periods=end + 1, freq='D'))
+
+    def calendar(self, weeks: int = 53, today: Optional[date] = None) -> pd.DataFrame:
+        """
+        Calendar grid of the trailing weeks ending with the current week
+
+        Args:
+            weeks: Number of week columns
+            today: Last day shown (defaults to today)
+
+        Returns:
+            DataFrame indexed by weekday (Mon..Sun) with one column per week
+            start; days after today are NaN
+        """
+        end = self._offset(today)
+        last_week = end // 7
+        first_week = last_week - weeks + 1
+        grid = np.zeros((weeks, 7), dtype=np.float64)
+        lo, hi = max(first_week, 0), min(last_week + 1, len(self.weekly))
+        if hi > lo:
+            grid[lo - first_week:hi - first_week] = self.daily[lo * 7:hi * 7].reshape(-1, 7)
+        grid[-1, end % 7 + 1:] = np.nan
+        columns = pd.date_range(self.origin + timedelta(weeks=first_week), periods=weeks, freq='7D')
+        return pd.DataFrame(grid.T, index=['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'], columns=columns)
+
+    def weekly_volume(self, weeks: int = 12, today: Optional[date] = None) -> pd.DataFrame:
+        """
+        Exercises completed per muscle group for the trailing weeks
+
+        Args:
+            weeks: Number of weeks ending with the current week
+            today: Last day considered (defaults to today)
+
+        Returns:
+            DataFrame indexed by week start with one column per muscle group
+        """
+        last_week = self._offset(today) // 7
+        first_week = last_week - weeks + 1
+        volume = np.zeros((weeks, len(MUSCLE_GROUPS)), dtype=np.int64)
+        lo, hi = max(first_week, 0), min(last_week + 1, len(self.weekly))
+        if hi > lo:
+            volume[lo - first_week:hi - first_week] = self.weekly[lo:hi]
+        index = pd.date_range(self.origin + timedelta(weeks=first_week), periods=weeks, freq='7D', name='week')
+        return pd.DataFrame(volume, index=index, columns=MUSCLE_GROUPS)
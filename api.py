@@ -0,0 +1,363 @@
+"""
+Headless JSON API for the AI Fitness Trainer
+
+Exposes the workout recommender, BMI helpers, macro calculation and the food
+tables over HTTP so clients that cannot go through Streamlit (e.g. the mobile
+apps) can use them.
+
+Run locally with:
+
+    python api.py --port 8000 --workers 4
+"""
+import argparse
+import os
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from workout_data import WorkoutRecommender
+from recommender_rules import current_rules
+from utils import (calculate_bmi, get_bmi_category, get_bmi_color,
+                   calculate_bmr, calculate_tdee, calculate_macros)
+from nutrition_data import FOOD_SOURCES, get_food_sources
+from exercise_catalog import EQUIPMENT_TYPES, JOINTS, EXERCISE_INDEX
+
+# Number of distinct normalized profiles kept per cache
+CACHE_SIZE = int(os.environ.get('API_CACHE_SIZE', 4096))
+
+# Upper bound on the number of operations accepted by /v1/batch
+MAX_BATCH_SIZE = int(os.environ.get('API_MAX_BATCH_SIZE', 100))
+
+_recommender = WorkoutRecommender()
+
+FITNESS_LEVELS = list(_recommender.fitness_levels)
+GOALS = list(_recommender.goal_priorities)
+GENDERS = ["Male", "Female", "Other"]
+DIETARY_PREFERENCES = ["Both", "Vegetarian", "Non-Vegetarian"]
+
+# Accepted ranges for numeric profile fields, matching the sidebar form
+NUMERIC_RANGES = {
+    'age': (16, 100),
+    'height': (120, 250),
+    'weight': (30, 300)
+}
+
+
+class ProfileError(ValueError):
+    """Raised when a request payload fails validation"""
+
+    def __init__(self, errors: Dict[str, str]):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def _normalize_choice(payload: Dict[str, Any], field: str, choices: List[str], errors: Dict[str, str]) -> str:
+    """Match a string field case-insensitively against its allowed values"""
+    value = str(payload.get(field, '')).strip().lower()
+    for choice in choices:
+        if choice.lower() == value:
+            return choice
+    errors[field] = f"{field} must be one of: {', '.join(choices)}"
+    return ''
+
+
+def _normalize_number(payload: Dict[str, Any], field: str, errors: Dict[str, str], digits: int = 1) -> float:
+    """Parse a numeric field, check its range and round it to a cache-friendly precision"""
+    low, high = NUMERIC_RANGES[field]
+    try:
+        value = float(payload[field])
+    except (KeyError, TypeError, ValueError):
+        errors[field] = f"{field} is required and must be a number"
+        return 0.0
+    if not low <= value <= high:
+        errors[field] = f"{field} must be between {low} and {high}"
+    return round(value, digits)
+
+
+def _normalize_subset(payload: Dict[str, Any], field: str, choices: List[str], errors: Dict[str, str]) -> Optional[Tuple[str, ...]]:
+    """Parse an optional list field into a sorted tuple of canonical values"""
+    values = payload.get(field)
+    if values is None:
+        return None
+    if not isinstance(values, list):
+        errors[field] = f"{field} must be a list"
+        return None
+    canonical = {choice.lower(): choice for choice in choices}
+    unknown = [value for value in values if str(value).strip().lower() not in canonical]
+    if unknown:
+        errors[field] = f"{field} values must be among: {', '.join(choices)}"
+        return None
+    return tuple(sorted({canonical[str(value).strip().lower()] for value in values}))
+
+
+def parse_profile(payload: Dict[str, Any], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    """
+    Validate and normalize the requested profile fields of a payload
+
+    Args:
+        payload: Decoded JSON request body
+        fields: Names of the fields required by the endpoint
+
+    Returns:
+        Dictionary of normalized values
+
+    Raises:
+        ProfileError: If any field is missing or invalid
+    """
+    if not isinstance(payload, dict):
+        raise ProfileError({'body': "Request body must be a JSON object"})
+
+    errors = {}
+    profile = {}
+    for field in fields:
+        if field == 'fitness_level':
+            profile[field] = _normalize_choice(payload, field, FITNESS_LEVELS, errors)
+        elif field == 'goal':
+            profile[field] = _normalize_choice(payload, field, GOALS, errors)
+        elif field == 'gender':
+            profile[field] = _normalize_choice(payload, field, GENDERS, errors)
+        elif field == 'equipment':
+            profile[field] = _normalize_subset(payload, field, EQUIPMENT_TYPES, errors)
+            # A full equipment list is the same as no restriction
+            if profile[field] is not None and len(profile[field]) == len(EQUIPMENT_TYPES):
+                profile[field] = None
+        elif field == 'avoid_joints':
+            profile[field] = _normalize_subset(payload, field, JOINTS, errors) or ()
+        elif field == 'age':
+            profile[field] = int(_normalize_number(payload, field, errors, digits=0))
+        else:
+            profile[field] = _normalize_number(payload, field, errors)
+
+    if errors:
+        raise ProfileError(errors)
+    return profile
+
+
+# --- Cached computations keyed on normalized inputs ---
+@lru_cache(maxsize=CACHE_SIZE)
+def cached_bmi(weight: float, height: float) -> Dict[str, Any]:
+    bmi = calculate_bmi(weight, height)
+    category = get_bmi_category(bmi)
+    return {'bmi': bmi, 'category': category, 'color': get_bmi_color(category)}
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def cached_plan(fitness_level: str, goal: str, bmi_category: str,
+                equipment: Optional[Tuple[str, ...]] = None,
+                avoid_joints: Tuple[str, ...] = (), rules_version: str = '') -> Dict[str, Any]:
+    # The plan only depends on the BMI category, so the raw BMI is not part of the key;
+    # rules_version retires cached plans when the rule file is edited
+    return _recommender.generate_workout_plan(fitness_level, goal, 0.0, bmi_category,
+                                              list(equipment) if equipment is not None else None,
+                                              list(avoid_joints))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def cached_macros(weight: float, height: float, age: int, gender: str,
+                  fitness_level: str, goal: str) -> Dict[str, int]:
+    bmr = calculate_bmr(weight, height, age, gender)
+    tdee = calculate_tdee(bmr, fitness_level)
+    return calculate_macros(tdee, weight, goal)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def cached_alternatives(exercise: str, exclude: Tuple[str, ...], equipment: Optional[Tuple[str, ...]],
+                        avoid_joints: Tuple[str, ...], limit: int,
+                        max_difficulty: Optional[str] = None) -> List[str]:
+    constraints = {'avoid_joints': list(avoid_joints), 'max_difficulty': max_difficulty}
+    if equipment is not None:
+        constraints['equipment'] = list(equipment)
+    return EXERCISE_INDEX.alternatives(exercise, exclude=exclude, limit=limit, **constraints)
+
+
+# --- Operations shared by the single and batch endpoints ---
+def op_bmi(payload: Dict[str, Any]) -> Dict[str, Any]:
+    profile = parse_profile(payload, ('weight', 'height'))
+    return cached_bmi(profile['weight'], profile['height'])
+
+
+def op_plan(payload: Dict[str, Any]) -> Dict[str, Any]:
+    profile = parse_profile(payload, ('fitness_level', 'goal', 'weight', 'height', 'equipment', 'avoid_joints'))
+    bmi = cached_bmi(profile['weight'], profile['height'])
+    return {
+        'bmi': bmi['bmi'],
+        'bmi_category': bmi['category'],
+        'plan': cached_plan(profile['fitness_level'], profile['goal'], bmi['category'],
+                            profile['equipment'], profile['avoid_joints'], current_rules().version)
+    }
+
+
+def op_macros(payload: Dict[str, Any]) -> Dict[str, Any]:
+    profile = parse_profile(payload, ('weight', 'height', 'age', 'gender', 'fitness_level', 'goal'))
+    return cached_macros(profile['weight'], profile['height'], profile['age'],
+                         profile['gender'], profile['fitness_level'], profile['goal'])
+
+
+def op_foods(payload: Dict[str, Any]) -> Dict[str, Any]:
+    if not isinstance(payload, dict):
+        raise ProfileError({'body': "Request body must be a JSON object"})
+    preference = payload.get('preference', 'Both')
+    if preference not in DIETARY_PREFERENCES:
+        raise ProfileError({'preference': f"preference must be one of: {', '.join(DIETARY_PREFERENCES)}"})
+    macro = payload.get('macro')
+    if macro and (not isinstance(macro, str) or macro not in FOOD_SOURCES):
+        raise ProfileError({'macro': f"macro must be one of: {', '.join(FOOD_SOURCES)}"})
+    macros = [macro] if macro else list(FOOD_SOURCES)
+    return {name: get_food_sources(name, preference) for name in macros}
+
+
+def op_alternatives(payload: Dict[str, Any]) -> Dict[str, Any]:
+    # A fitness level caps difficulty; with goal, weight and height too the matching rule cell decides the cap
+    fields = ('equipment', 'avoid_joints')
+    if isinstance(payload, dict) and 'fitness_level' in payload:
+        fields += ('fitness_level',)
+        if all(field in payload for field in ('goal', 'weight', 'height')):
+            fields += ('goal', 'weight', 'height')
+    profile = parse_profile(payload, fields)
+    errors = {}
+    exercise = payload.get('exercise')
+    if not isinstance(exercise, str) or EXERCISE_INDEX.get(exercise) is None:
+        errors['exercise'] = "exercise must be the name of a catalog exercise"
+    exclude = payload.get('exclude', [])
+    if not isinstance(exclude, list) or not all(isinstance(name, str) for name in exclude):
+        errors['exclude'] = "exclude must be a list of exercise names"
+    limit = payload.get('limit', 5)
+    if not isinstance(limit, int) or isinstance(limit, bool) or not 1 <= limit <= 20:
+        errors['limit'] = "limit must be an integer between 1 and 20"
+    if errors:
+        raise ProfileError(errors)
+    max_difficulty = None
+    if 'goal' in profile:
+        bmi_category = cached_bmi(profile['weight'], profile['height'])['category']
+        max_difficulty = _recommender.rules.lookup(profile['fitness_level'], profile['goal'],
+                                                   bmi_category)['max_difficulty']
+    elif 'fitness_level' in profile:
+        max_difficulty = _recommender.fitness_levels[profile['fitness_level']]['max_difficulty']
+    return {
+        'exercise': exercise,
+        'alternatives': cached_alternatives(exercise, tuple(sorted(set(exclude))), profile['equipment'],
+                                            profile['avoid_joints'], limit, max_difficulty)
+    }
+
+
+OPERATIONS = {
+    'bmi': op_bmi,
+    'plan': op_plan,
+    'alternatives': op_alternatives,
+    'macros': op_macros,
+    'foods': op_foods
+}
+
+
+def run_operation(name: str, payload: Dict[str, Any]) -> JSONResponse:
+    try:
+        return JSONResponse(OPERATIONS[name](payload))
+    except ProfileError as e:
+        return JSONResponse({'errors': e.errors}, status_code=422)
+
+
+async def read_json(request: Request) -> Any:
+    try:
+        return await request.json()
+    except ValueError:
+        raise ProfileError({'body': "Request body must be valid JSON"})
+
+
+# --- Endpoints ---
+async def health(request: Request) -> JSONResponse:
+    return JSONResponse({'status': 'ok'})
+
+
+def json_endpoint(name: str):
+    """Build a POST endpoint that runs a single operation on the JSON body"""
+    async def endpoint(request: Request) -> JSONResponse:
+        try:
+            payload = await read_json(request)
+        except ProfileError as e:
+            return JSONResponse({'errors': e.errors}, status_code=400)
+        return run_operation(name, payload)
+    return endpoint
+
+
+async def foods(request: Request) -> JSONResponse:
+    payload = dict(request.query_params)
+    if 'macro' in request.path_params:
+        payload['macro'] = request.path_params['macro']
+    return run_operation('foods', payload)
+
+
+async def batch(request: Request) -> JSONResponse:
+    """
+    Run several operations in one round trip
+
+    Expects ``{"requests": [{"op": "plan", "payload": {...}}, ...]}`` and
+    returns one result per request, in order. Identical profiles inside a
+    batch (or across batches) are served from the same cache entry.
+    """
+    try:
+        body = await read_json(request)
+    except ProfileError as e:
+        return JSONResponse({'errors': e.errors}, status_code=400)
+
+    requests = body.get('requests') if isinstance(body, dict) else None
+    if not isinstance(requests, list):
+        return JSONResponse({'errors': {'requests': "requests must be a list"}}, status_code=422)
+    if len(requests) > MAX_BATCH_SIZE:
+        return JSONResponse({'errors': {'requests': f"At most {MAX_BATCH_SIZE} requests per batch"}},
+                            status_code=422)
+
+    results = []
+    for item in requests:
+        op = item.get('op') if isinstance(item, dict) else None
+        if not isinstance(op, str) or op not in OPERATIONS:
+            results.append({'ok': False, 'errors': {'op': f"op must be one of: {', '.join(OPERATIONS)}"}})
+            continue
+        try:
+            results.append({'ok': True, 'result': OPERATIONS[op](item.get('payload', {}))})
+        except ProfileError as e:
+            results.append({'ok': False, 'errors': e.errors})
+
+    return JSONResponse({'results': results})
+
+
+async def cache_stats(request: Request) -> JSONResponse:
+    stats = {}
+    for name, func in [('bmi', cached_bmi), ('plan', cached_plan), ('macros', cached_macros),
+                       ('alternatives', cached_alternatives)]:
+        info = func.cache_info()
+        stats[name] = {'hits': info.hits, 'misses': info.misses, 'size': info.currsize}
+    return JSONResponse(stats)
+
+
+app = Starlette(routes=[
+    Route('/health', health),
+    Route('/v1/bmi', json_endpoint('bmi'), methods=['POST']),
+    Route('/v1/plan', json_endpoint('plan'), methods=['POST']),
+    Route('/v1/alternatives', json_endpoint('alternatives'), methods=['POST']),
+    Route('/v1/macros', json_endpoint('macros'), methods=['POST']),
+    Route('/v1/foods', foods),
+    Route('/v1/foods/{macro}', foods),
+    Route('/v1/batch', batch, methods=['POST']),
+    Route('/v1/cache', cache_stats)
+])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the AI Fitness Trainer JSON API")
+    parser.add_argument('--host', default=os.environ.get('API_HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('API_PORT', 8000)))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('API_WORKERS', 1)),
+                        help="Number of worker processes (default: $API_WORKERS or 1)")
+    args = parser.parse_args()
+
+    uvicorn.run('api:app', host=args.host, port=args.port, workers=args.workers,
+                app_dir=os.path.dirname(os.path.abspath(__file__)), log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
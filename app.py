@@ -6,21 +6,249 @@ import json
 import base64
 from io import StringIO, BytesIO
 import time
-import random
+import uuid
+import logging
+from itertools import product
 # --- WORKOUT_DATA.PY & RECOMMENDER CLASS ---
 from workout_data import WorkoutRecommender, EXERCISE_DATABASE
-from utils import calculate_bmi, get_bmi_category, export_workout_plan_pdf
+from recommender_rules import current_rules
+from exercise_catalog import EQUIPMENT_TYPES, JOINTS
+from utils import (calculate_bmi, get_bmi_category, export_workout_plan_pdf,
+                   calculate_bmr, calculate_tdee, calculate_macros, BMI_CATEGORIES, CACHE_VERSION)
+from nutrition_data import FOOD_SOURCES, get_food_sources
+from energy import build_log_table, compute_energy_expenditure, average_daily_expenditure
+from storage import get_store
+from activity_rollups import ActivityRollups
+from set_logger import get_set_writer, sets_frame, logged_sets, diff_sets
+from overload import OverloadEngine, apply_targets
+from bodyweight import WeightTrend
+from fatigue import FatigueModel, RECOVERED_FATIGUE
+from derived import DerivedGraph
+from scheduler import plan_schedule
+from similar_members import PeerIndex
+from periodization import PeriodizedProgram, PROGRAM_WEEKS
+from plan_codec import encode_plan, decode_plan
+from session_recorder import list_recordings, SessionRecorder, SessionReplay
+from form_scoring import FORM_RULES, FORM_TIPS, LiveSet, score_recording
+from capture_control import controller_config
+from custom_components import camera_stream, interval_timer
+from charts import create_activity_chart, create_calendar_heatmap, create_muscle_volume_chart, ZOOM_WINDOWS
 # --- Caching Workout Plan Generation ---
-@st.cache_data
-def generate_workout_plan(fitness_level, goal, bmi, bmi_category):
+# Disk-persisted caches survive restarts; cache_version must be passed explicitly
+# (Streamlit only hashes arguments given at the call) so old releases' entries are skipped.
+# Plans also key on rules_version, so editing the rule file retires cached plans.
+@st.cache_data(persist="disk")
+def generate_workout_plan(fitness_level, goal, bmi, bmi_category, equipment=None, avoid_joints=None,
+                          cache_version=CACHE_VERSION, rules_version=None):
     """Generate and cache workout plan."""
     recommender = WorkoutRecommender()
     return recommender.generate_workout_plan(
         fitness_level=fitness_level,
         goal=goal,
         bmi=bmi,
-        bmi_category=bmi_category
+        bmi_category=bmi_category,
+        equipment=equipment,
+        avoid_joints=avoid_joints
     )
+
+@st.cache_data(persist="disk")
+def compute_macros(tdee, weight, goal, cache_version=CACHE_VERSION):
+    """Compute and cache macro targets."""
+    return calculate_macros(tdee, weight, goal)
+
+def workout_card_html(day, muscle_group, items):
+    """Markup of one plan card; items are (exercise, target markup) pairs."""
+    if muscle_group == 'Rest':
+        return f"""
+                    <div class="workout-card">
+                        <div class="day-header"><i class="fa-solid fa-bed"></i>{day}</div>
+                        <div class="muscle-group">Rest Day</div>
+                        <div class="exercise-list">Recover & Recharge</div>
+                    </div>
+                    """
+    exercises_text = "".join(f"<li>{exercise}{target}</li>" for exercise, target in items)
+    return f"""
+                    <div class="workout-card">
+                        <div class="day-header"><i class="fa-solid fa-dumbbell"></i>{day}</div>
+                        <div class="muscle-group">{muscle_group}</div>
+                        <ul class="exercise-list">{exercises_text}</ul>
+                    </div>
+                    """
+
+# Any BMI inside a category yields the same plan; these stand in for each category
+REFERENCE_BMI = dict(zip(BMI_CATEGORIES, [17.0, 22.0, 27.5, 32.5]))
+
+# Only the current rule version's plans are worth keeping
+@st.cache_resource(max_entries=2)
+def warm_plan_cache(cache_version, rules_version):
+    """
+    Precompute the unrestricted plan and card markup for every fitness level,
+    goal and BMI category (3 x 3 x 4 plans), once per server process.
+    """
+    started = time.perf_counter()
+    recommender = WorkoutRecommender()
+    plans, cards = {}, {}
+    for fitness_level, goal, bmi_category in product(recommender.fitness_levels, recommender.goal_priorities,
+                                                     BMI_CATEGORIES):
+        plan = recommender.generate_workout_plan(fitness_level, goal, REFERENCE_BMI[bmi_category], bmi_category)
+        plans[(fitness_level, goal, bmi_category)] = plan
+        for day, workout in plan.items():
+            key = (day, workout['muscle_group'], tuple((exercise, "") for exercise in workout['exercises']))
+            cards[key] = workout_card_html(*key)
+    logging.getLogger(__name__).info("Warmed %d plans and %d cards in %.1f ms", len(plans), len(cards),
+                                     (time.perf_counter() - started) * 1000)
+    return {'plans': plans, 'cards': cards}
+# --- Derived Values ---
+# Profile inputs feed two chains of memoized nodes; a rerun only recomputes
+# the nodes downstream of inputs that actually changed.
+def build_derived_graph(state):
+    graph = DerivedGraph(state)
+
+    @graph.node('bmi', ['weight', 'height'])
+    def bmi_node(weight, height):
+        return calculate_bmi(weight, height)
+
+    @graph.node('bmi_category', ['bmi'])
+    def bmi_category_node(bmi):
+        return get_bmi_category(bmi)
+
+    # A plan restored from a share link, or adopted from the scheduler or similar members, is used as-is
+    # until the profile is submitted again
+    @graph.node('base_plan', ['fitness_level', 'goal', 'bmi', 'bmi_category', 'equipment', 'avoid_joints',
+                              'shared_plan', 'adopted_plan', 'rules_version'])
+    def base_plan_node(fitness_level, goal, bmi, bmi_category, equipment, avoid_joints, shared_plan, adopted_plan,
+                       rules_version):
+        if shared_plan is not None:
+            return shared_plan
+        if adopted_plan is not None:
+            return adopted_plan
+        if equipment is None and not avoid_joints:
+            return warm_plan_cache(CACHE_VERSION, rules_version)['plans'][(fitness_level, goal, bmi_category)]
+        return generate_workout_plan(fitness_level, goal, bmi, bmi_category, equipment, avoid_joints,
+                                     cache_version=CACHE_VERSION, rules_version=rules_version)
+
+    # Day and exercise swaps are patched onto the generated plan; the rest of the week is never regenerated
+    @graph.node('plan', ['base_plan', 'plan_edits', 'fitness_level', 'goal', 'bmi_category', 'equipment',
+                         'avoid_joints', 'rules_version'])
+    def plan_node(base_plan, plan_edits, fitness_level, goal, bmi_category, equipment, avoid_joints, rules_version):
+        recommender = WorkoutRecommender()
+        plan = base_plan
+        for edit in plan_edits:
+            if edit[0] == 'day':
+                plan = recommender.substitute_day(plan, edit[1], edit[2], fitness_level, goal, bmi_category,
+                                                  equipment, avoid_joints)
+            elif edit[2] in plan[edit[1]]['exercises']:
+                plan = recommender.swap_exercise(plan, edit[1], edit[2], edit[3])
+        return plan
+
+    @graph.node('total_workouts', ['plan'])
+    def total_workouts_node(plan):
+        return sum(len(day['exercises']) for day in plan.values() if day['exercises'])
+
+    # Energy chain follows the smoothed body-weight trend rather than the last number typed in
+    @graph.node('bmr', ['macro_weight', 'height', 'age', 'gender'])
+    def bmr_node(weight, height, age, gender):
+        return calculate_bmr(weight, height, age, gender)
+
+    @graph.node('exercise_calories', ['plan', 'macro_weight', 'log_version'])
+    def exercise_calories_node(plan, weight, log_version):
+        daily_logs = st.session_state.progress_data['daily_logs']
+        if not daily_logs:
+            return None
+        energy = compute_energy_expenditure(build_log_table(daily_logs, plan), weight)
+        return average_daily_expenditure(energy['daily'])
+
+    @graph.node('tdee', ['bmr', 'fitness_level', 'exercise_calories'])
+    def tdee_node(bmr, fitness_level, exercise_calories):
+        return calculate_tdee(bmr, fitness_level, exercise_calories)
+
+    @graph.node('macros', ['tdee', 'macro_weight', 'goal'])
+    def macros_node(tdee, weight, goal):
+        return compute_macros(tdee, weight, goal, cache_version=CACHE_VERSION)
+
+    @graph.node('meals', ['macros', 'dietary_preference'])
+    def meals_node(macros, dietary_preference):
+        return {macro: get_food_sources(macro, dietary_preference) for macro in FOOD_SOURCES}
+
+    return graph
+
+def apply_plan_edit(edit):
+    """Patch one day or exercise of the plan."""
+    st.session_state.plan_edits.append(edit)
+    derived.set_input('plan_edits', tuple(st.session_state.plan_edits))
+    refresh_plan()
+
+def adopt_plan(week):
+    """Replace the plan with a whole week built elsewhere (a schedule with one session per day, or a peer's plan)."""
+    st.session_state.adopted_plan = {day: {key: plan[key] for key in ('muscle_group', 'exercises', 'notes')}
+                                     for day, plan in week.items()}
+    st.session_state.shared_plan = None
+    st.session_state.plan_edits = []
+    derived.set_input('shared_plan', None)
+    derived.set_input('adopted_plan', st.session_state.adopted_plan)
+    derived.set_input('plan_edits', ())
+    refresh_plan()
+
+def refresh_plan():
+    """Recompute the plan from its inputs and update total_workouts only if it changed."""
+    st.session_state.workout_plan = derived.get('plan')
+    total_workouts = derived.get('total_workouts')
+    if total_workouts != st.session_state.progress_data['total_workouts']:
+        st.session_state.progress_data['total_workouts'] = total_workouts
+        get_store().upsert_member(st.session_state.member_id, st.session_state.user_data, derived.get('bmi'),
+                                  derived.get('bmi_category'), total_workouts)
+    st.rerun()
+
+def save_macro_targets():
+    """Store this member's current macro targets."""
+    trend = st.session_state.weight_trend
+    get_store().save_macro_targets(pd.DataFrame(
+        [{'trend_weight': trend.trend, 'macro_weight': trend.macro_weight, **derived.get('macros')}],
+        index=[st.session_state.member_id]
+    ))
+
+def log_body_weight(weight):
+    """Log today's weight; returns True if the trend crossed the threshold and the macro weight moved."""
+    today = datetime.now().strftime("%Y-%m-%d")
+    trend = st.session_state.weight_trend
+    crossed = trend.log(today, weight)
+    get_store().log_weight(st.session_state.member_id, today, weight)
+    derived.set_input('macro_weight', trend.macro_weight)
+    return crossed
+# --- Members Like You ---
+@st.cache_resource
+def peer_index():
+    """Successful members by profile, built once per server process and updated as members train."""
+    return PeerIndex.from_members(get_store().member_outcomes())
+
+def update_peer_index():
+    """Re-index this member after a profile change or a completed workout."""
+    peer_index().update(st.session_state.member_id, st.session_state.user_data, derived.get('bmi_category'),
+                        st.session_state.progress_data['workouts_completed'],
+                        st.session_state.progress_data['total_workouts'])
+
+def peer_plans(fitness_level, goal):
+    current = (fitness_level, derived.get('bmi_category'))
+    plans = peer_index().recommend(st.session_state.user_data, exclude=st.session_state.member_id)
+    if not plans:
+        st.caption("No members with your goal have completed enough of their plan yet.")
+        return
+    peers = sum(plan['members'] for plan in plans)
+    st.caption(f"Plans of the {peers} most similar members (age, gender, height, weight) with your goal "
+               "who complete most of their workouts.")
+    for i, plan in enumerate(plans):
+        cols = st.columns([3, 1])
+        with cols[0]:
+            st.write(f"**{plan['fitness_level']}** plan for **{plan['bmi_category']}** BMI · "
+                     f"{plan['members']} members · {plan['completion']:.0%} completion")
+        with cols[1]:
+            if (plan['fitness_level'], plan['bmi_category']) == current:
+                st.caption("Your plan")
+            elif st.button("Try This Plan", key=f"peer_plan_{i}"):
+                category = plan['bmi_category']
+                adopt_plan(generate_workout_plan(plan['fitness_level'], goal, REFERENCE_BMI[category], category,
+                                                 derived.get('equipment'), derived.get('avoid_joints'),
+                                                 cache_version=CACHE_VERSION, rules_version=rules_version))
 # --- Jaw-Dropping UI/UX CSS with Advanced Effects ---
 st.markdown("""
 <style>
@@ -120,6 +348,7 @@ st.markdown("""
     .muscle-group { font-size: 1.2rem; color: var(--text-muted); margin-bottom: 1rem; }
     .exercise-list { color: var(--text); line-height: 1.7; font-size: 1rem; }
     .exercise-list li { list-style: none; margin-bottom: 0.5rem; }
+    .exercise-list .overload-target { color: var(--text-muted); font-size: 0.85rem; margin-left: 0.5rem; }
     .exercise-list li::before { content: '\\f058'; font-family: 'Font Awesome 6 Free'; font-weight: 900; color: var(--accent); margin-right: 0.5rem; }
     
     .progress-metric {
@@ -356,6 +585,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 # --- Initialize Session State ---
+if 'member_id' not in st.session_state:
+    st.session_state.member_id = uuid.uuid4().hex
 if 'user_data' not in st.session_state:
     st.session_state.user_data = {}
 if 'workout_plan' not in st.session_state:
@@ -366,69 +597,70 @@ if 'progress_data' not in st.session_state:
         'total_workouts': 0,
         'streak_days': 0,
         'last_workout': None,
-        'daily_logs': {}
+        'daily_logs': {},
+        'log_version': 0,
+        'rollups': ActivityRollups(),
+        'set_log': {}
     }
+if 'weight_trend' not in st.session_state:
+    st.session_state.weight_trend = WeightTrend()
+if 'overload' not in st.session_state:
+    st.session_state.overload = OverloadEngine()
+if 'fatigue' not in st.session_state:
+    st.session_state.fatigue = FatigueModel()
+if 'set_editor_base' not in st.session_state:
+    st.session_state.set_editor_base = {}
 if 'macros' not in st.session_state:
     st.session_state.macros = None
+if 'plan_edits' not in st.session_state:
+    st.session_state.plan_edits = []
+if 'shared_plan' not in st.session_state:
+    st.session_state.shared_plan = None
+if 'shared_code' not in st.session_state:
+    st.session_state.shared_code = None
+if 'adopted_plan' not in st.session_state:
+    st.session_state.adopted_plan = None
+if 'schedule' not in st.session_state:
+    st.session_state.schedule = None
+if 'derived_state' not in st.session_state:
+    st.session_state.derived_state = {}
+if 'recompute_counts' not in st.session_state:
+    st.session_state.recompute_counts = {}
 if 'camera_active' not in st.session_state:
     st.session_state.camera_active = False
 if 'current_suggestion' not in st.session_state:
     st.session_state.current_suggestion = "Select an exercise to begin"
-if 'suggestions' not in st.session_state:
-    st.session_state.suggestions = []
 if 'feedback_status' not in st.session_state:
     st.session_state.feedback_status = "good"
+if 'live_set' not in st.session_state:
+    st.session_state.live_set = None
+if 'camera_ack' not in st.session_state:
+    st.session_state.camera_ack = 0
+if 'timer_sessions' not in st.session_state:
+    st.session_state.timer_sessions = set()
 if 'dietary_preference' not in st.session_state:
     st.session_state.dietary_preference = "Both"
-# --- Enhanced Food Sources Data ---
-protein_sources = {
-    "Vegetarian": [
-        {"name": "Paneer (100g)", "protein": 18, "fats": 20, "carbs": 2, "calories": 265},
-        {"name": "Lentils (Dal, 100g cooked)", "protein": 9, "fats": 0.4, "carbs": 20, "calories": 116},
-        {"name": "Greek Yogurt (170g)", "protein": 17, "fats": 0.4, "carbs": 6, "calories": 100},
-        {"name": "Tofu (100g)", "protein": 8, "fats": 4.8, "carbs": 2, "calories": 76},
-        {"name": "Chickpeas (Chana, 100g cooked)", "protein": 9, "fats": 2.6, "carbs": 27, "calories": 164}
-    ],
-    "Non-Vegetarian": [
-        {"name": "Chicken Breast (100g)", "protein": 31, "fats": 3.6, "carbs": 0, "calories": 165},
-        {"name": "Eggs (2 large)", "protein": 12, "fats": 10, "carbs": 0.8, "calories": 155},
-        {"name": "Salmon (100g)", "protein": 25, "fats": 13, "carbs": 0, "calories": 208},
-        {"name": "Tuna (100g)", "protein": 30, "fats": 1.3, "carbs": 0, "calories": 132},
-        {"name": "Lean Beef (100g)", "protein": 26, "fats": 15, "carbs": 0, "calories": 250}
-    ]
-}
-fat_sources = {
-    "Vegetarian": [
-        {"name": "Avocado (100g)", "protein": 2, "fats": 15, "carbs": 9, "calories": 160},
-        {"name": "Almonds (28g)", "protein": 6, "fats": 14, "carbs": 6, "calories": 164},
-        {"name": "Walnuts (28g)", "protein": 4.3, "fats": 18, "carbs": 4, "calories": 185},
-        {"name": "Flaxseeds (28g)", "protein": 5.2, "fats": 12, "carbs": 8, "calories": 150},
-        {"name": "Chia Seeds (28g)", "protein": 4.4, "fats": 9, "carbs": 12, "calories": 138}
-    ],
-    "Non-Vegetarian": [
-        {"name": "Ghee (1 tbsp)", "protein": 0, "fats": 14, "carbs": 0, "calories": 126},
-        {"name": "Butter (1 tbsp)", "protein": 0.1, "fats": 11.5, "carbs": 0, "calories": 102},
-        {"name": "Cheese (28g)", "protein": 7, "fats": 9, "carbs": 1, "calories": 113},
-        {"name": "Cream (2 tbsp)", "protein": 0.6, "fats": 11, "carbs": 0.8, "calories": 103},
-        {"name": "Mayonnaise (1 tbsp)", "protein": 0.1, "fats": 10, "carbs": 0, "calories": 94}
-    ]
-}
-carb_sources = {
-    "Vegetarian": [
-        {"name": "Brown Rice (1 cup cooked)", "protein": 5, "fats": 2, "carbs": 45, "calories": 216},
-        {"name": "Quinoa (1 cup cooked)", "protein": 8, "fats": 4, "carbs": 39, "calories": 222},
-        {"name": "Oats (1 cup cooked)", "protein": 6, "fats": 4, "carbs": 28, "calories": 158},
-        {"name": "Sweet Potato (1 medium)", "protein": 4, "fats": 0.1, "carbs": 24, "calories": 103},
-        {"name": "Whole Wheat Bread (2 slices)", "protein": 8, "fats": 2, "carbs": 24, "calories": 164}
-    ],
-    "Non-Vegetarian": [
-        {"name": "Brown Rice (1 cup cooked)", "protein": 5, "fats": 2, "carbs": 45, "calories": 216},
-        {"name": "Sweet Potato (1 medium)", "protein": 4, "fats": 0.1, "carbs": 24, "calories": 103},
-        {"name": "Quinoa (1 cup cooked)", "protein": 8, "fats": 4, "carbs": 39, "calories": 222},
-        {"name": "Oats (1 cup cooked)", "protein": 6, "fats": 4, "carbs": 28, "calories": 158},
-        {"name": "Whole Wheat Bread (2 slices)", "protein": 8, "fats": 2, "carbs": 24, "calories": 164}
-    ]
-}
+# First run in a fresh server process (or after a rule file edit) builds every default plan before anyone asks for one
+rules_version = current_rules().version
+warm_plan_cache(CACHE_VERSION, rules_version)
+derived = build_derived_graph(st.session_state.derived_state)
+derived.set_input('log_version', st.session_state.progress_data['log_version'])
+derived.set_input('rules_version', rules_version)
+# --- Shared Plans ---
+# ?plan=<code> restores a shared plan and profile without running the recommender
+shared_code = st.query_params.get('plan')
+shared_profile_applied = False
+if shared_code and shared_code != st.session_state.shared_code:
+    st.session_state.shared_code = shared_code
+    try:
+        shared_plan, shared_profile = decode_plan(shared_code)
+    except ValueError:
+        st.warning("This plan link is invalid or was made by an incompatible version.")
+    else:
+        st.session_state.user_data.update(shared_profile)
+        st.session_state.shared_plan = shared_plan
+        st.session_state.plan_edits = []
+        shared_profile_applied = True
 # --- Main Header ---
 st.markdown('<h1 class="main-header">🤖 AI Fitness Trainer</h1>', unsafe_allow_html=True)
 # --- Sidebar ---
@@ -447,6 +679,10 @@ with st.sidebar:
                                      index=["Beginner", "Intermediate", "Advanced"].index(st.session_state.user_data.get('fitness_level', 'Beginner')))
         goal = st.selectbox("Primary Goal", ["Muscle Building", "Fat Loss", "Strength Training"],
                             index=["Muscle Building", "Fat Loss", "Strength Training"].index(st.session_state.user_data.get('goal', 'Muscle Building')))
+        equipment = st.multiselect("Available Equipment", EQUIPMENT_TYPES,
+                                   default=st.session_state.user_data.get('equipment', EQUIPMENT_TYPES))
+        avoid_joints = st.multiselect("Injuries (joints to protect)", JOINTS,
+                                      default=st.session_state.user_data.get('avoid_joints', []))
         submit_profile = st.form_submit_button("Generate Plan")
     
     if submit_profile or st.session_state.user_data:
@@ -457,11 +693,37 @@ with st.sidebar:
             'height': height,
             'weight': weight,
             'fitness_level': fitness_level,
-            'goal': goal
+            'goal': goal,
+            'equipment': equipment,
+            'avoid_joints': avoid_joints
         })
         
-        bmi = calculate_bmi(weight, height)
-        bmi_category = get_bmi_category(bmi)
+        # A full equipment list is the same as no restriction, which keeps the default plans shared in the cache
+        plan_equipment = None if set(equipment) >= set(EQUIPMENT_TYPES) else tuple(sorted(equipment))
+        profile_inputs = {
+            'weight': weight,
+            'height': height,
+            'age': age,
+            'gender': gender,
+            'fitness_level': fitness_level,
+            'goal': goal,
+            'equipment': plan_equipment,
+            'avoid_joints': tuple(sorted(avoid_joints))
+        }
+        for key, value in profile_inputs.items():
+            derived.set_input(key, value)
+        if submit_profile:
+            st.session_state.plan_edits = []
+            st.session_state.shared_plan = None
+            st.session_state.adopted_plan = None
+            log_body_weight(weight)
+        derived.set_input('shared_plan', st.session_state.shared_plan)
+        derived.set_input('adopted_plan', st.session_state.adopted_plan)
+        derived.set_input('plan_edits', tuple(st.session_state.plan_edits))
+        derived.set_input('macro_weight', st.session_state.weight_trend.macro_weight or weight)
+        
+        bmi = derived.get('bmi')
+        bmi_category = derived.get('bmi_category')
         
         st.markdown(f"""
         <div class="bmi-card">
@@ -470,34 +732,17 @@ with st.sidebar:
         </div>
         """, unsafe_allow_html=True)
         
-        if submit_profile:
-            st.session_state.workout_plan = generate_workout_plan(fitness_level, goal, bmi, bmi_category)
-            st.session_state.progress_data['total_workouts'] = sum(len(day['exercises']) for day in st.session_state.workout_plan.values() if day['exercises'])
-            
-            activity_factor = {'Beginner': 1.2, 'Intermediate': 1.55, 'Advanced': 1.725}.get(fitness_level, 1.55)
-            if gender == "Male":
-                bmr = 88.362 + (13.397 * weight) + (4.799 * height) - (5.677 * age)
-            else:
-                bmr = 447.593 + (9.247 * weight) + (3.098 * height) - (4.330 * age)
-            tdee = bmr * activity_factor
-            
-            if goal == "Muscle Building":
-                calories = tdee + 500
-            elif goal == "Fat Loss":
-                calories = tdee - 500
-            else:
-                calories = tdee
-                
-            protein = weight * 2.0
-            fats = calories * 0.25 / 9
-            carbs = (calories - (protein * 4) - (fats * 9)) / 4
-            
-            st.session_state.macros = {
-                'calories': int(calories),
-                'protein': int(protein),
-                'fats': int(fats),
-                'carbs': int(carbs)
-            }
+        st.session_state.workout_plan = derived.get('plan')
+        st.session_state.progress_data['total_workouts'] = derived.get('total_workouts')
+        st.session_state.macros = derived.get('macros')
+        if submit_profile or shared_profile_applied:
+            # A profile restored from a share link is stored too, so completing its workouts finds the member
+            st.session_state.overload.style = WorkoutRecommender().goal_priorities[goal]['workout_style']
+            get_store().upsert_member(st.session_state.member_id, st.session_state.user_data, bmi, bmi_category,
+                                      st.session_state.progress_data['total_workouts'])
+            if submit_profile:
+                save_macro_targets()
+            update_peer_index()
     
     # Dietary Preference Selection
     st.markdown('<div class="dietary-preference">', unsafe_allow_html=True)
@@ -508,135 +753,132 @@ with st.sidebar:
         index=["Both", "Vegetarian", "Non-Vegetarian"].index(st.session_state.dietary_preference)
     )
     st.session_state.dietary_preference = dietary_pref
+    derived.set_input('dietary_preference', dietary_pref)
     st.markdown('</div>', unsafe_allow_html=True)
-# --- Function to create the camera component ---
-def camera_component(suggestions):
-    suggestions_json = json.dumps(suggestions)
-    
-    html_code = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <style>
-            body {{
-                margin: 0;
-                padding: 0;
-                font-family: 'Poppins', sans-serif;
-                background-color: transparent;
-            }}
-            .video-wrapper {{
-                position: relative;
-                width: 100%;
-                border-radius: 12px;
-                overflow: hidden;
-            }}
-            #webcam {{
-                width: 100%;
-                height: auto;
-                border-radius: 12px;
-                display: block;
-            }}
-            .feedback-banner {{
-                position: absolute;
-                top: 0;
-                left: 0;
-                width: 100%;
-                padding: 15px;
-                color: white;
-                font-weight: 600;
-                font-size: 1.2rem;
-                text-align: center;
-                z-index: 10;
-                transition: background-color 0.5s ease;
-            }}
-            .feedback-good {{
-                background-color: rgba(16, 185, 129, 0.9);
-            }}
-            .feedback-bad {{
-                background-color: rgba(239, 68, 68, 0.9);
-            }}
-            .error-message {{
-                color: #EF4444;
-                text-align: center;
-                padding: 20px;
-                background-color: rgba(31, 41, 55, 0.5);
-                border-radius: 12px;
-                margin: 10px 0;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="video-wrapper">
-            <video id="webcam" autoplay playsinline></video>
-            <div id="feedback-banner" class="feedback-banner feedback-good">
-                {suggestions[0] if suggestions else "Perform the exercise with good form"}
+# --- Live camera feedback ---
+def process_camera_events(batch, exercise):
+    """
+    Score the frames in a camera_stream event batch
+
+    Events at or below st.session_state.camera_ack were handled on an
+    earlier rerun and are skipped, so a batch resent by the browser is safe.
+    A set's recording starts with its first frames, and the frames recorded
+    so far are checkpointed after every batch, so a set that is never
+    stopped still keeps them.
+
+    Args:
+        batch: Latest value of the camera_stream component (or None)
+        exercise: Exercise selected for the set
+    """
+    if not batch:
+        return
+    recorded = False
+    for event in batch['events']:
+        if event['seq'] <= st.session_state.camera_ack:
+            continue
+        st.session_state.camera_ack = event['seq']
+        # A new camera stream ends the set in progress
+        if event['type'] == 'started':
+            stop_live_set()
+        if event['type'] != 'frames' or not event['t']:
+            continue
+        live_set = st.session_state.live_set
+        if live_set is None or live_set.exercise != exercise:
+            stop_live_set()
+            live_set = LiveSet(exercise, SessionRecorder(st.session_state.member_id, exercise))
+            st.session_state.live_set = live_set
+        completed = live_set.add_frames(np.array(event['t']), np.array(event['keypoints']))
+        recorded = True
+        if completed:
+            st.session_state.current_suggestion = completed[-1]['tip']
+            st.session_state.feedback_status = "good" if completed[-1]['good'] else "bad"
+    if recorded:
+        st.session_state.live_set.checkpoint()
+
+
+def stop_live_set():
+    """Finish the recording of the set in progress"""
+    if st.session_state.live_set is not None:
+        st.session_state.live_set.close()
+        st.session_state.live_set = None
+
+
+# Events from the camera rerun only this fragment, not the whole page
+@st.fragment
+def detection_panel(selected_exercise):
+    process_camera_events(st.session_state.get('camera_stream'), selected_exercise)
+    live_set = st.session_state.live_set
+    reps = len(live_set.results) if live_set is not None else 0
+
+    cols = st.columns([3, 1])
+    with cols[0]:
+        st.markdown('<div class="camera-container">', unsafe_allow_html=True)
+        
+        # Camera control buttons
+        camera_col1, camera_col2 = st.columns(2)
+        with camera_col1:
+            if st.button("Start Camera", key="start_camera"):
+                st.session_state.camera_active = True
+                st.session_state.current_suggestion = "Start your first rep - each one is scored against reference reps"
+                st.session_state.feedback_status = "good"
+        with camera_col2:
+            if st.button("Stop Camera", key="stop_camera"):
+                st.session_state.camera_active = False
+                stop_live_set()
+        
+        # Display camera feed or placeholder
+        if st.session_state.camera_active:
+            camera_stream(st.session_state.current_suggestion, st.session_state.feedback_status, reps,
+                          st.session_state.camera_ack, controller_config(), key="camera_stream")
+        else:
+            st.markdown("""
+            <div class="camera-placeholder">
+                <i class="fa-solid fa-camera" style="font-size: 3rem; margin-bottom: 1rem;"></i>
+                <p>Camera is off. Click "Start Camera" to begin.</p>
             </div>
-        </div>
-        <div id="error-container"></div>
+            """, unsafe_allow_html=True)
         
-        <script>
-            const suggestions = {suggestions_json};
-            let currentSuggestionIndex = 0;
-            let isGoodForm = true;
-            let intervalId = null;
-            
-            const video = document.getElementById('webcam');
-            const banner = document.getElementById('feedback-banner');
-            const errorContainer = document.getElementById('error-container');
-            
-            function startCamera() {{
-                navigator.mediaDevices.getUserMedia({{ video: true }})
-                    .then(stream => {{
-                        video.srcObject = stream;
-                        // Start changing banner every 5 seconds
-                        intervalId = setInterval(changeBanner, 5000);
-                    }})
-                    .catch(err => {{
-                        console.error("Error accessing webcam:", err);
-                        errorContainer.innerHTML = `<div class="error-message">
-                            <i class="fa-solid fa-exclamation-triangle"></i> 
-                            Failed to access camera. Please ensure camera permissions are granted.
-                            <br><small>Error: ${{err.message}}</small>
-                        </div>`;
-                    }});
-            }}
-            
-            function changeBanner() {{
-                // Toggle between good and bad form
-                isGoodForm = !isGoodForm;
-                
-                // Get a random suggestion
-                currentSuggestionIndex = Math.floor(Math.random() * suggestions.length);
-                const suggestion = suggestions[currentSuggestionIndex];
-                
-                // Update banner text and class
-                banner.textContent = suggestion;
-                
-                if (isGoodForm) {{
-                    banner.className = 'feedback-banner feedback-good';
-                }} else {{
-                    banner.className = 'feedback-banner feedback-bad';
-                }}
-            }}
-            
-            // Initialize camera when page loads
-            window.addEventListener('load', startCamera);
-            
-            // Cleanup when component is unmounted
-            window.addEventListener('beforeunload', () => {{
-                if (intervalId) {{
-                    clearInterval(intervalId);
-                }}
-                if (video.srcObject) {{
-                    video.srcObject.getTracks().forEach(track => track.stop());
-                }}
-            }});
-        </script>
-    </body>
-    </html>
-    """
+        st.markdown('</div>', unsafe_allow_html=True)
     
-    return html_code
+    with cols[1]:
+        st.markdown("### Exercise Feedback")
+        st.markdown(f"""
+        <div class="pose-feedback">
+            Current Exercise: {selected_exercise}
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Display current suggestion
+        st.markdown(f"""
+        <div class="suggestion-box">
+            <i class="fa-solid fa-lightbulb" style="color: var(--accent); margin-right: 0.5rem;"></i>
+            {st.session_state.current_suggestion}
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Display feedback status
+        if st.session_state.feedback_status == "good":
+            st.markdown("""
+            <div class="suggestion-box" style="border-left-color: #10B981;">
+                <i class="fa-solid fa-check-circle" style="color: #10B981; margin-right: 0.5rem;"></i>
+                Good Form Detected
+            </div>
+            """, unsafe_allow_html=True)
+        else:
+            st.markdown("""
+            <div class="suggestion-box" style="border-left-color: #EF4444;">
+                <i class="fa-solid fa-exclamation-circle" style="color: #EF4444; margin-right: 0.5rem;"></i>
+                Form Needs Improvement
+            </div>
+            """, unsafe_allow_html=True)
+        
+        if live_set is not None:
+            good = sum(result['good'] for result in live_set.results)
+            st.metric("Reps", reps, f"{good} good form" if reps else None, delta_color="off")
+        
+        st.markdown("#### All Form Tips:")
+        for tip in FORM_TIPS.get(selected_exercise, []):
+            st.markdown(f"- {tip}")
 # --- Function to display food sources ---
 def display_food_sources(title, icon, sources, category):
     st.markdown(f"""
@@ -657,6 +899,137 @@ def display_food_sources(title, icon, sources, category):
             </div>
         </div>
         """, unsafe_allow_html=True)
+# --- Progressive Overload Targets ---
+def format_target(target):
+    if not target:
+        return ""
+    load = f" @ {target['load_kg']:g} kg" if target['load_kg'] else ""
+    return f"<span class=\"overload-target\">{target['sets']}×{target['reps']}{load}</span>"
+def card_html(day, workout_data):
+    """Card markup for a plan day, served from the warm cache when it has no targets or swaps."""
+    items = tuple((exercise, format_target(workout_data.get('targets', {}).get(exercise)))
+                  for exercise in workout_data['exercises'])
+    key = (day, workout_data['muscle_group'], items)
+    cached = warm_plan_cache(CACHE_VERSION, rules_version)['cards'].get(key)
+    return cached if cached is not None else workout_card_html(*key)
+# --- Plan Swaps ---
+def swap_controls(day, workout_data):
+    recommender = WorkoutRecommender()
+    if workout_data['exercises']:
+        exercise = st.selectbox("Exercise", workout_data['exercises'], key=f"swap_exercise_{day}")
+        rule = recommender.rules.lookup(derived.get('fitness_level'), derived.get('goal'), derived.get('bmi_category'))
+        options = recommender.exercise_alternatives(st.session_state.workout_plan, day, exercise,
+                                                    derived.get('equipment'), derived.get('avoid_joints'),
+                                                    max_difficulty=rule['max_difficulty'])
+        replacement = st.selectbox("Replace with", options, key=f"swap_replacement_{day}") if options else None
+        if st.button("Swap Exercise", key=f"swap_exercise_button_{day}", disabled=not options):
+            apply_plan_edit(('exercise', day, exercise, replacement))
+    groups = ['Rest'] + list(EXERCISE_DATABASE)
+    group = st.selectbox("Train instead", groups, index=groups.index(workout_data['muscle_group']),
+                         key=f"swap_day_{day}")
+    if st.button("Swap Day", key=f"swap_day_button_{day}", disabled=group == workout_data['muscle_group']):
+        apply_plan_edit(('day', day, group))
+# --- Set Logger ---
+# Runs as a fragment so editing a cell reruns only this block; changes are
+# handed to the background writer, which debounces and batches the writes.
+@st.fragment
+def set_logger(day, exercises):
+    today = datetime.now().strftime("%Y-%m-%d")
+    session_sets = st.session_state.progress_data['set_log'].setdefault((today, day), {})
+    editor_key = f"sets_{today}_{day}"
+    if editor_key not in st.session_state.set_editor_base:
+        st.session_state.set_editor_base[editor_key] = sets_frame(exercises, session_sets)
+    edited = st.data_editor(
+        st.session_state.set_editor_base[editor_key],
+        key=editor_key,
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            'exercise': st.column_config.SelectboxColumn("Exercise", options=exercises, required=True),
+            'set': st.column_config.NumberColumn("Set", disabled=True),
+            'reps': st.column_config.NumberColumn("Reps", min_value=0, max_value=100, step=1),
+            'load_kg': st.column_config.NumberColumn("Load (kg)", min_value=0.0, max_value=500.0, step=0.5)
+        }
+    )
+    current = logged_sets(edited)
+    changes = diff_sets(session_sets, current)
+    if changes:
+        get_set_writer().submit(st.session_state.member_id, today, day, changes)
+        session_sets.clear()
+        session_sets.update(current)
+        # Refresh the overload trend of every exercise touched, using all of today's sets for it
+        todays_sets = [sets for (log_date, _), sets in st.session_state.progress_data['set_log'].items()
+                       if log_date == today]
+        for exercise in {exercise for exercise, _ in changes}:
+            performed = [value for sets in todays_sets for (name, _), value in sets.items() if name == exercise]
+            st.session_state.overload.update(exercise, today, [reps for reps, _ in performed],
+                                             [load for _, load in performed])
+    volume = sum(reps * load for reps, load in current.values())
+    st.caption(f"{len(current)} sets logged · {volume:,.0f} kg volume")
+# --- Workout Completion ---
+def complete_workout(day, workout_data):
+    """Log today's workout for a plan day; returns False if it was already logged today."""
+    today = datetime.now().strftime("%Y-%m-%d")
+    if today not in st.session_state.progress_data['daily_logs']:
+        st.session_state.progress_data['daily_logs'][today] = []
+    if day in st.session_state.progress_data['daily_logs'][today]:
+        return False
+    st.session_state.progress_data['daily_logs'][today].append(day)
+    st.session_state.progress_data['log_version'] = st.session_state.progress_data.get('log_version', 0) + 1
+    st.session_state.progress_data['workouts_completed'] += 1
+    st.session_state.progress_data['last_workout'] = today
+    st.session_state.progress_data['streak_days'] += 1
+    st.session_state.progress_data['rollups'].record(today, workout_data['muscle_group'],
+                                                     len(workout_data['exercises']))
+    get_store().record_workout(st.session_state.member_id, today, day, workout_data['muscle_group'])
+    update_peer_index()
+    st.session_state.fatigue.log(today, workout_data['muscle_group'])
+    derived.set_input('log_version', st.session_state.progress_data['log_version'])
+    return True
+# --- Interval Timer ---
+# The timer runs in the browser and reports once per session, so a timed
+# circuit reruns this fragment a single time, when it ends.
+@st.fragment
+def interval_timer_panel(day, workout_data, fitness_level):
+    intervals = WorkoutRecommender.interval_session(workout_data['exercises'], fitness_level)
+    summary = interval_timer(intervals, key=f"interval_timer_{day}")
+    if not summary:
+        minutes = sum(interval['seconds'] for interval in intervals) / 60
+        st.caption(f"{len(workout_data['exercises'])} exercises · {intervals[-1]['round']} rounds · about {minutes:.0f} min")
+        return
+    work_seconds = sum(interval['seconds'] for interval in summary['intervals'])
+    st.caption(f"{len(summary['intervals'])} work intervals · {work_seconds // 60}:{work_seconds % 60:02d} of work "
+               f"in {summary['elapsed_s'] // 60} min")
+    if summary['finished'] and summary['session'] not in st.session_state.timer_sessions:
+        st.session_state.timer_sessions.add(summary['session'])
+        if complete_workout(day, workout_data):
+            # Progress metrics live outside this fragment
+            st.rerun()
+# --- Periodized Program ---
+def current_program(fitness_level, goal):
+    # Only the base plan is kept; weeks are built when viewed or exported
+    rule = WorkoutRecommender().rules.lookup(fitness_level, goal, derived.get('bmi_category'))
+    return PeriodizedProgram(st.session_state.workout_plan, fitness_level, goal, PROGRAM_WEEKS,
+                             derived.get('equipment'), derived.get('avoid_joints'), rule['max_difficulty'])
+
+
+@st.fragment
+def program_panel(fitness_level, goal):
+    program = current_program(fitness_level, goal)
+    numbers = range(1, len(program) + 1)
+    volume = pd.DataFrame({'Working sets': [program.weekly_sets(number) for number in numbers]},
+                          index=pd.Index(numbers, name='Week'))
+    st.bar_chart(volume, height=180)
+    week = program.week(st.slider("Week", 1, len(program), 1, key="program_week"))
+    st.caption(f"Block {week['block']} · {week['phase']} week · {week['sets']} × {week['reps']} per exercise")
+    st.dataframe(pd.DataFrame([
+        {'Day': day, 'Muscle Group': workout['muscle_group'], 'Exercises': ', '.join(workout['exercises']),
+         'Sets × Reps': f"{workout['sets']} × {workout['reps']}"}
+        for day, workout in week['plan'].items() if workout['exercises']
+    ]), hide_index=True, use_container_width=True)
+
+
 # --- Main Content ---
 if st.session_state.workout_plan:
     tab1, tab2, tab3, tab4, tab5 = st.tabs(["📅 Plan", "📊 Progress", "🎥 Detection", "📁 Export", "🎬 Workout Videos"])
@@ -664,40 +1037,81 @@ if st.session_state.workout_plan:
     with tab1:
         st.header("Personalized Workout Plan")
         days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+        planned = apply_targets(st.session_state.workout_plan, st.session_state.overload.targets())
+        fitness_level = st.session_state.user_data.get('fitness_level', 'Beginner')
+        goal = st.session_state.user_data.get('goal', 'Muscle Building')
+        circuit = WorkoutRecommender().goal_priorities[goal]['workout_style'] == 'circuit'
         cols = st.columns(2)
         for i, day in enumerate(days):
             with cols[i % 2]:
-                workout_data = st.session_state.workout_plan[day]
+                workout_data = planned[day]
+                st.markdown(card_html(day, workout_data), unsafe_allow_html=True)
                 if workout_data['muscle_group'] == 'Rest':
-                    st.markdown(f"""
-                    <div class="workout-card">
-                        <div class="day-header"><i class="fa-solid fa-bed"></i>{day}</div>
-                        <div class="muscle-group">Rest Day</div>
-                        <div class="exercise-list">Recover & Recharge</div>
-                    </div>
-                    """, unsafe_allow_html=True)
+                    with st.expander("Swap"):
+                        swap_controls(day, workout_data)
                 else:
-                    exercises_text = "".join([f"<li>{exercise}</li>" for exercise in workout_data['exercises']])
-                    st.markdown(f"""
-                    <div class="workout-card">
-                        <div class="day-header"><i class="fa-solid fa-dumbbell"></i>{day}</div>
-                        <div class="muscle-group">{workout_data['muscle_group']}</div>
-                        <ul class="exercise-list">{exercises_text}</ul>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
                     if st.button(f"Mark Complete", key=f"complete_{day}"):
-                        today = datetime.now().strftime("%Y-%m-%d")
-                        if today not in st.session_state.progress_data['daily_logs']:
-                            st.session_state.progress_data['daily_logs'][today] = []
-                        if day not in st.session_state.progress_data['daily_logs'][today]:
-                            st.session_state.progress_data['daily_logs'][today].append(day)
-                            st.session_state.progress_data['workouts_completed'] += 1
-                            st.session_state.progress_data['last_workout'] = today
-                            st.session_state.progress_data['streak_days'] += 1
+                        if complete_workout(day, workout_data):
                             st.success(f"{day} Completed! Keep the momentum! 🔥")
+                    
+                    if circuit and workout_data['exercises']:
+                        with st.expander("Interval Timer"):
+                            interval_timer_panel(day, workout_data, fitness_level)
+                    with st.expander("Log sets"):
+                        set_logger(day, workout_data['exercises'])
+                    with st.expander("Swap"):
+                        swap_controls(day, workout_data)
         
-        if 'macros' in st.session_state and st.session_state.macros:
+        with st.expander("Fit the plan to your week"):
+            with st.form("schedule_builder"):
+                schedule_days = st.multiselect("Days you can train", days, default=days)
+                cols = st.columns(2)
+                with cols[0]:
+                    session_minutes = st.slider("Minutes per session", 20, 120, 60, step=5)
+                with cols[1]:
+                    sessions_per_day = st.radio("Sessions per day", [1, 2], horizontal=True)
+                if st.form_submit_button("Build Schedule"):
+                    st.session_state.schedule = plan_schedule(schedule_days, session_minutes, sessions_per_day,
+                                                              fitness_level, goal, 1, derived.get('equipment'),
+                                                              derived.get('avoid_joints'))[0]
+            schedule = st.session_state.schedule
+            if schedule is not None:
+                st.dataframe(pd.DataFrame([
+                    {'Day': day, 'Muscle Group': plan['muscle_group'], 'Exercises': ', '.join(plan['exercises']),
+                     'Minutes': plan['minutes']}
+                    for day, plan in schedule.items() if plan['sessions']
+                ]), hide_index=True, use_container_width=True)
+                if any(len(plan['sessions']) > 1 for plan in schedule.values()):
+                    st.caption("Days with two sessions can't replace the one-session-per-day plan cards.")
+                elif st.button("Use as My Plan", key="apply_schedule"):
+                    adopt_plan(schedule)
+        
+        with st.expander("Members like you"):
+            peer_plans(fitness_level, goal)
+        
+        with st.expander(f"{PROGRAM_WEEKS}-Week Program"):
+            program_panel(fitness_level, goal)
+        
+        if st.session_state.fatigue.workouts:
+            st.subheader("Recovery")
+            tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+            next_session = WorkoutRecommender().next_day(st.session_state.fatigue, fitness_level, goal,
+                                                         derived.get('bmi_category'), tomorrow,
+                                                         derived.get('equipment'), derived.get('avoid_joints'))
+            if next_session['muscle_group'] == 'Rest':
+                st.info("Tomorrow: rest - none of your focus muscle groups has recovered yet.")
+            else:
+                st.info(f"Tomorrow, based on what you completed: {next_session['muscle_group']} - "
+                        f"{', '.join(next_session['exercises'])}")
+            with st.expander("Muscle group recovery"):
+                recovery = st.session_state.fatigue.state(tomorrow)
+                st.dataframe(recovery.round(2), use_container_width=True)
+                st.caption("Fatigue fades within days of a workout and fitness over weeks; "
+                           f"a group is ready again once its fatigue drops below {RECOVERED_FATIGUE}.")
+        
+        st.session_state.macros = derived.get('macros')
+        st.session_state.exercise_calories = derived.get('exercise_calories')
+        if st.session_state.macros:
             st.subheader("Recommended Daily Macros")
             cols = st.columns(4)
             macros = st.session_state.macros
@@ -715,46 +1129,49 @@ if st.session_state.workout_plan:
                         <div class="macro-label">{label}</div>
                     </div>
                     """, unsafe_allow_html=True)
+            if st.session_state.get('exercise_calories') is not None:
+                st.caption(f"Adjusted for your logged activity: {st.session_state.exercise_calories:.0f} kcal/day burned in workouts on average.")
             
             st.subheader("Food Sources for Your Macros")
             
             # Get dietary preference
             dietary_pref = st.session_state.dietary_preference
+            meals = derived.get('meals')
             
             # Protein Sources
             st.markdown("#### Protein Sources")
             if dietary_pref in ["Both", "Vegetarian"]:
                 st.markdown('<div class="food-source-card">', unsafe_allow_html=True)
-                display_food_sources("Protein Rich Foods", "fa-solid fa-leaf", protein_sources["Vegetarian"], "Vegetarian")
+                display_food_sources("Protein Rich Foods", "fa-solid fa-leaf", meals['protein']["Vegetarian"], "Vegetarian")
                 st.markdown('</div>', unsafe_allow_html=True)
             
             if dietary_pref in ["Both", "Non-Vegetarian"]:
                 st.markdown('<div class="food-source-card">', unsafe_allow_html=True)
-                display_food_sources("Protein Rich Foods", "fa-solid fa-drumstick-bite", protein_sources["Non-Vegetarian"], "Non-Vegetarian")
+                display_food_sources("Protein Rich Foods", "fa-solid fa-drumstick-bite", meals['protein']["Non-Vegetarian"], "Non-Vegetarian")
                 st.markdown('</div>', unsafe_allow_html=True)
             
             # Fat Sources
             st.markdown("#### Fat Sources")
             if dietary_pref in ["Both", "Vegetarian"]:
                 st.markdown('<div class="food-source-card">', unsafe_allow_html=True)
-                display_food_sources("Healthy Fats", "fa-solid fa-seedling", fat_sources["Vegetarian"], "Vegetarian")
+                display_food_sources("Healthy Fats", "fa-solid fa-seedling", meals['fats']["Vegetarian"], "Vegetarian")
                 st.markdown('</div>', unsafe_allow_html=True)
             
             if dietary_pref in ["Both", "Non-Vegetarian"]:
                 st.markdown('<div class="food-source-card">', unsafe_allow_html=True)
-                display_food_sources("Healthy Fats", "fa-solid fa-bacon", fat_sources["Non-Vegetarian"], "Non-Vegetarian")
+                display_food_sources("Healthy Fats", "fa-solid fa-bacon", meals['fats']["Non-Vegetarian"], "Non-Vegetarian")
                 st.markdown('</div>', unsafe_allow_html=True)
             
             # Carb Sources
             st.markdown("#### Carb Sources")
             if dietary_pref in ["Both", "Vegetarian"]:
                 st.markdown('<div class="food-source-card">', unsafe_allow_html=True)
-                display_food_sources("Complex Carbs", "fa-solid fa-wheat-awn", carb_sources["Vegetarian"], "Vegetarian")
+                display_food_sources("Complex Carbs", "fa-solid fa-wheat-awn", meals['carbs']["Vegetarian"], "Vegetarian")
                 st.markdown('</div>', unsafe_allow_html=True)
             
             if dietary_pref in ["Both", "Non-Vegetarian"]:
                 st.markdown('<div class="food-source-card">', unsafe_allow_html=True)
-                display_food_sources("Complex Carbs", "fa-solid fa-bread-slice", carb_sources["Non-Vegetarian"], "Non-Vegetarian")
+                display_food_sources("Complex Carbs", "fa-solid fa-bread-slice", meals['carbs']["Non-Vegetarian"], "Non-Vegetarian")
                 st.markdown('</div>', unsafe_allow_html=True)
     
     with tab2:
@@ -775,149 +1192,132 @@ if st.session_state.workout_plan:
                 </div>
                 """, unsafe_allow_html=True)
         
+        st.subheader("Body Weight")
+        weight_trend = st.session_state.weight_trend
+        cols = st.columns([2, 1])
+        with cols[1]:
+            with st.form("weight_log"):
+                reading = st.number_input("Today's weight (kg)", min_value=30.0, max_value=300.0,
+                                          value=float(weight_trend.readings.get(weight_trend.trend_date,
+                                                                                st.session_state.user_data['weight'])))
+                if st.form_submit_button("Log Weight"):
+                    if log_body_weight(reading):
+                        st.session_state.macros = derived.get('macros')
+                        save_macro_targets()
+                        st.success(f"Trend moved to {weight_trend.macro_weight:.1f} kg - macros updated.")
+            if weight_trend.trend is not None:
+                st.metric("Trend Weight", f"{weight_trend.trend:.1f} kg",
+                          f"{weight_trend.trend - weight_trend.macro_weight:+.1f} kg since macros were set",
+                          delta_color="off")
+        with cols[0]:
+            if len(weight_trend.readings) > 1:
+                import plotly.graph_objects as go
+                weights = weight_trend.series()
+                fig = go.Figure([
+                    go.Scatter(x=weights.index, y=weights['weight_kg'], mode='markers', name='Reading',
+                               marker=dict(color='#9CA3AF', size=6)),
+                    go.Scatter(x=weights.index, y=weights['trend'], mode='lines', name='Trend',
+                               line=dict(color='#10B981', width=3))
+                ])
+                fig.update_layout(title='Weight Trend', plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+                                  font_color='#F9FAFB', margin=dict(l=20, r=20, t=40, b=20))
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.caption("Log your weight regularly; macros follow the smoothed trend, not single readings.")
+        
         if st.session_state.progress_data['daily_logs']:
             st.subheader("Activity Insights")
-            @st.cache_data
-            def create_activity_chart(dates, activities):
+            chart_key = (st.session_state.member_id, st.session_state.progress_data.get('log_version', 0))
+            chart_today = datetime.now().strftime("%Y-%m-%d")
+            rollups = st.session_state.progress_data['rollups']
+            zoom = st.radio("Range", list(ZOOM_WINDOWS), index=len(ZOOM_WINDOWS) - 1, horizontal=True,
+                            key="activity_zoom")
+            fig = create_activity_chart(*chart_key, zoom, chart_today, rollups)
+            st.plotly_chart(fig, use_container_width=True)
+            
+            st.plotly_chart(create_calendar_heatmap(*chart_key, chart_today, rollups), use_container_width=True)
+            st.plotly_chart(create_muscle_volume_chart(*chart_key, chart_today, rollups), use_container_width=True)
+            
+            st.subheader("Energy Expenditure")
+            energy = compute_energy_expenditure(
+                build_log_table(st.session_state.progress_data['daily_logs'], st.session_state.workout_plan),
+                st.session_state.user_data['weight']
+            )
+            if not energy['daily'].empty:
                 import plotly.express as px
-                df = pd.DataFrame({'Date': dates, 'Workouts': activities})
-                fig = px.area(df, x='Date', y='Workouts', title='Workout Trends', color_discrete_sequence=['#10B981'])
-                fig.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)', 
-                    paper_bgcolor='rgba(0,0,0,0)', 
+                # Weeks start on Monday (ISO); a week with nothing logged yet burned nothing
+                week_start = pd.Timestamp.now().normalize() - pd.Timedelta(days=datetime.now().weekday())
+                this_week = energy['weekly']['calories'].get(week_start, 0.0)
+                avg_daily = average_daily_expenditure(energy['daily'], min_history_days=1)
+                cols = st.columns(3)
+                energy_metrics = [
+                    ("Total kcal Burned", f"{energy['daily']['calories'].sum():,.0f}"),
+                    ("kcal This Week", f"{this_week:,.0f}"),
+                    ("Avg kcal / Day (14d)", f"{avg_daily:,.0f}")
+                ]
+                for i, (label, value) in enumerate(energy_metrics):
+                    with cols[i]:
+                        st.markdown(f"""
+                        <div class="progress-metric">
+                            <div class="metric-value">{value}</div>
+                            <div class="metric-label">{label}</div>
+                        </div>
+                        """, unsafe_allow_html=True)
+                
+                chart_layout = dict(
+                    plot_bgcolor='rgba(0,0,0,0)',
+                    paper_bgcolor='rgba(0,0,0,0)',
                     font_color='#F9FAFB',
-                    title_font_size=18, 
+                    title_font_size=18,
                     margin=dict(l=20, r=20, t=40, b=20),
-                    xaxis_gridcolor='rgba(255,255,255,0.1)', 
+                    xaxis_gridcolor='rgba(255,255,255,0.1)',
                     yaxis_gridcolor='rgba(255,255,255,0.1)'
                 )
-                fig.update_traces(line_width=3, hovertemplate='%{y} Workouts on %{x}')
-                return fig
-            
-            dates = list(st.session_state.progress_data['daily_logs'].keys())
-            activities = [len(workouts) for workouts in st.session_state.progress_data['daily_logs'].values()]
-            if dates and activities:
-                fig = create_activity_chart(dates, activities)
-                st.plotly_chart(fig, use_container_width=True)
+                cols = st.columns(2)
+                with cols[0]:
+                    weekly = energy['weekly'].reset_index()
+                    fig = px.bar(weekly, x='week', y='calories', title='Weekly Calories Burned',
+                                 color_discrete_sequence=['#4F46E5'])
+                    fig.update_layout(**chart_layout)
+                    st.plotly_chart(fig, use_container_width=True)
+                with cols[1]:
+                    per_muscle = energy['per_muscle'].reset_index()
+                    fig = px.bar(per_muscle, x='muscle_group', y='calories', title='Calories by Muscle Group',
+                                 color_discrete_sequence=['#10B981'])
+                    fig.update_layout(**chart_layout)
+                    st.plotly_chart(fig, use_container_width=True)
     
     with tab3:
         st.header("Real-Time Workout Feedback")
         st.info("Select an exercise and start your camera for real-time feedback.")
         
-        supported_exercises = ["Squats", "Push-ups", "Lunges", "Plank", "Jumping Jacks"]
+        supported_exercises = list(FORM_RULES)
         selected_exercise = st.selectbox("Choose Exercise", supported_exercises)
         
-        # Define random suggestions for each exercise
-        exercise_suggestions = {
-            "Squats": [
-                "Keep your back straight during the movement",
-                "Lower your hips until your thighs are parallel to the floor",
-                "Push through your heels to return to standing",
-                "Keep your knees aligned with your toes",
-                "Engage your core throughout the exercise"
-            ],
-            "Push-ups": [
-                "Maintain a straight line from head to heels",
-                "Lower your chest until it nearly touches the floor",
-                "Keep your elbows at a 45-degree angle to your body",
-                "Push through your palms to return to starting position",
-                "Engage your core and glutes throughout"
-            ],
-            "Lunges": [
-                "Step forward with one leg and lower your hips",
-                "Keep your front knee directly above your ankle",
-                "Lower until both knees are at 90-degree angles",
-                "Push through your front heel to return to start",
-                "Keep your upper body straight throughout"
-            ],
-            "Plank": [
-                "Keep your body in a straight line from head to heels",
-                "Engage your core and glutes",
-                "Don't let your hips sag or rise too high",
-                "Keep your neck in a neutral position",
-                "Breathe steadily throughout the hold"
-            ],
-            "Jumping Jacks": [
-                "Start with feet together and arms at your sides",
-                "Jump while spreading your legs and raising your arms",
-                "Land softly with knees slightly bent",
-                "Keep your core engaged throughout",
-                "Maintain a steady rhythm"
-            ]
-        }
-        
-        # Store suggestions in session state
-        st.session_state.suggestions = exercise_suggestions.get(selected_exercise, ["Perform the exercise with good form"])
-        
-        cols = st.columns([3, 1])
-        with cols[0]:
-            st.markdown('<div class="camera-container">', unsafe_allow_html=True)
-            
-            # Camera control buttons
-            camera_col1, camera_col2 = st.columns(2)
-            with camera_col1:
-                if st.button("Start Camera", key="start_camera"):
-                    st.session_state.camera_active = True
-                    st.session_state.current_suggestion = random.choice(st.session_state.suggestions)
-                    st.session_state.feedback_status = "good"
-            with camera_col2:
-                if st.button("Stop Camera", key="stop_camera"):
-                    st.session_state.camera_active = False
-            
-            # Display camera feed or placeholder
-            if st.session_state.camera_active:
-                # Use the camera component
-                html_code = camera_component(st.session_state.suggestions)
-                st.components.v1.html(html_code, height=600)
-            else:
-                st.markdown("""
-                <div class="camera-placeholder">
-                    <i class="fa-solid fa-camera" style="font-size: 3rem; margin-bottom: 1rem;"></i>
-                    <p>Camera is off. Click "Start Camera" to begin.</p>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            st.markdown('</div>', unsafe_allow_html=True)
+        detection_panel(selected_exercise)
         
-        with cols[1]:
-            st.markdown("### Exercise Feedback")
-            st.markdown(f"""
-            <div class="pose-feedback">
-                Current Exercise: {selected_exercise}
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Display current suggestion
-            st.markdown(f"""
-            <div class="suggestion-box">
-                <i class="fa-solid fa-lightbulb" style="color: var(--accent); margin-right: 0.5rem;"></i>
-                {st.session_state.current_suggestion}
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Display feedback status
-            if st.session_state.feedback_status == "good":
-                st.markdown("""
-                <div class="suggestion-box" style="border-left-color: #10B981;">
-                    <i class="fa-solid fa-check-circle" style="color: #10B981; margin-right: 0.5rem;"></i>
-                    Good Form Detected
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown("""
-                <div class="suggestion-box" style="border-left-color: #EF4444;">
-                    <i class="fa-solid fa-exclamation-circle" style="color: #EF4444; margin-right: 0.5rem;"></i>
-                    Form Needs Improvement
-                </div>
-                """, unsafe_allow_html=True)
-            
-            st.markdown("#### All Form Tips:")
-            for tip in exercise_suggestions.get(selected_exercise, []):
-                st.markdown(f"- {tip}")
+        st.subheader("Recorded Sets")
+        recordings = list_recordings(st.session_state.member_id)
+        if recordings.empty:
+            st.caption("Sets recorded with the camera are kept as keypoints, so they can be replayed and re-scored later.")
+        else:
+            st.dataframe(recordings.drop(columns='path'), use_container_width=True)
+            recording_id = st.selectbox("Recording", recordings.index, key="rescore_recording")
+            # A set stopped before any frame arrived has nothing to score
+            empty_recording = recordings.loc[recording_id, 'frames'] == 0
+            if st.button("Re-score Set", key="rescore_set", disabled=empty_recording,
+                         help="This recording has no frames" if empty_recording else None):
+                reps = score_recording(SessionReplay(recordings.loc[recording_id, 'path']))
+                if reps.empty:
+                    st.info("No complete reps found in this recording.")
+                else:
+                    st.dataframe(reps, use_container_width=True)
+                    st.caption(f"{int(reps['good'].sum())} of {len(reps)} reps matched good form; "
+                               "deviation is the RMS angle difference (°) from the closest reference rep.")
     
     with tab4:
         st.header("Export Your Journey")
-        cols = st.columns(2)
+        cols = st.columns(3)
         with cols[0]:
             if st.button("Export CSV"):
                 csv_data = []
@@ -944,6 +1344,22 @@ if st.session_state.workout_plan:
                     text_plan += "\n"
                 st.download_button(label="Download Text", data=text_plan, file_name=f"fitness_plan_{datetime.now().strftime('%Y%m%d')}.txt", mime="text/plain")
         
+        with cols[2]:
+            if st.button("Export Program"):
+                fitness_level = st.session_state.user_data.get('fitness_level', 'Beginner')
+                goal = st.session_state.user_data.get('goal', 'Muscle Building')
+                program_csv = pd.DataFrame(current_program(fitness_level, goal).rows()).to_csv(index=False)
+                st.download_button(label="Download Program CSV", data=program_csv, file_name=f"fitness_program_{datetime.now().strftime('%Y%m%d')}.csv", mime="text/csv")
+        
+        st.subheader("Share Plan")
+        share_code = encode_plan(st.session_state.workout_plan, st.session_state.user_data)
+        if st.button("Create Share Link"):
+            # Putting the code in this page's URL makes the address bar the share link
+            st.session_state.shared_code = share_code
+            st.query_params['plan'] = share_code
+        st.code(f"?plan={share_code}", language=None)
+        st.caption(f"Opening the app with this query string restores your plan and profile ({len(share_code)} characters).")
+        
         st.subheader("Quick Preview")
         for day, workout in st.session_state.workout_plan.items():
             with st.expander(f"{day}: {workout['muscle_group']}"):
@@ -1019,4 +1435,15 @@ else:
         No copyright infringement is intended. The use of these materials falls under fair use for educational purposes.</p>
         <p>If you are a content creator and would like your content removed, please contact us.</p>
     </div>
-    """, unsafe_allow_html=True)
\ No newline at end of file
+    """, unsafe_allow_html=True)
+# --- Derived Value Report ---
+# Opening the app with ?debug=1 shows which derived values each run recomputed, to check reruns stay incremental
+recomputed = derived.take_recomputed()
+logging.getLogger(__name__).debug("Derived values recomputed this run: %s", recomputed or "none")
+for node in recomputed:
+    st.session_state.recompute_counts[node] = st.session_state.recompute_counts.get(node, 0) + 1
+if st.query_params.get('debug') == '1':
+    with st.expander("Derived values (debug)"):
+        st.write("Recomputed this run: " + (', '.join(f"`{node}`" for node in recomputed) or "none"))
+        st.dataframe(pd.Series(st.session_state.recompute_counts, name='recomputes', dtype='int64')
+                     .rename_axis('node').to_frame(), use_container_width=True)
@@ -0,0 +1,201 @@
+"""
+Body-weight trend tracking
+
+Daily scale readings are noisy, so macros follow an exponentially weighted
+moving average (EWMA) of body weight instead of the latest reading. The
+trend is updated in O(1) per reading, and a member's macros are only
+recomputed when the trend drifts MACRO_THRESHOLD_KG away from the weight
+their current macros were computed for. ``roster_trends`` and
+``nightly_update`` do the same for every member at once.
+"""
+from datetime import date
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils import calculate_macros_frame
+
+# Smoothing per day: each daily reading moves the trend 10% of the way towards it
+EWMA_ALPHA = 0.1
+
+# Trend change (kg) that triggers a macro recomputation
+MACRO_THRESHOLD_KG = 0.5
+
+
+def ewma_step(trend: float, weight_kg: float, gap_days: int, alpha: float = EWMA_ALPHA) -> float:
+    """
+    Advance a trend by one reading taken gap_days after the previous one
+
+    A gap of several days applies the daily smoothing that many times, so
+    sparse logging does not make the trend lag behind.
+    """
+    step = 1 - (1 - alpha) ** max(gap_days, 1)
+    return trend + step * (weight_kg - trend)
+
+
+class WeightTrend:
+    """
+    EWMA body-weight trend for one member
+
+    Attributes:
+        readings: ISO date -> weight in kg
+        trend: Current smoothed weight (None before the first reading)
+        macro_weight: Weight the member's current macros were computed for
+    """
+
+    def __init__(self, alpha: float = EWMA_ALPHA, threshold_kg: float = MACRO_THRESHOLD_KG):
+        self.alpha = alpha
+        self.threshold_kg = threshold_kg
+        self.readings: Dict[str, float] = {}
+        self.trend: Optional[float] = None
+        self.trend_date: Optional[str] = None
+        self.macro_weight: Optional[float] = None
+        # Trend before the latest reading, so a same-day correction is O(1) too
+        self._previous: Optional[float] = None
+        self._previous_date: Optional[str] = None
+
+    def _advance(self, log_date: str, weight_kg: float):
+        self._previous, self._previous_date = self.trend, self.trend_date
+        if self.trend is None:
+            self.trend = weight_kg
+        else:
+            gap = (date.fromisoformat(log_date) - date.fromisoformat(self.trend_date)).days
+            self.trend = ewma_step(self.trend, weight_kg, gap, self.alpha)
+        self.trend_date = log_date
+
+    def log(self, log_date: str, weight_kg: float) -> bool:
+        """
+        Add a reading and report whether macros need recomputing
+
+        Args:
+            log_date: ISO date of the reading
+            weight_kg: Body weight in kilograms
+
+        Returns:
+            True when the trend moved at least threshold_kg from macro_weight
+            (macro_weight is then updated to the rounded trend)
+        """
+        self.readings[log_date] = weight_kg
+        if self.trend_date is None or log_date > self.trend_date:
+            self._advance(log_date, weight_kg)
+        elif log_date == self.trend_date:
+            self.trend, self.trend_date = self._previous, self._previous_date
+            self._advance(log_date, weight_kg)
+        else:
+            # Back-filled reading: replay the history
+            self.trend = self.trend_date = None
+            for day in sorted(self.readings):
+                self._advance(day, self.readings[day])
+
+        if self.macro_weight is None or abs(self.trend - self.macro_weight) >= self.threshold_kg:
+            self.macro_weight = round(self.trend, 1)
+            return True
+        return False
+
+    def series(self) -> pd.DataFrame:
+        """Readings and trend per logged day"""
+        days = sorted(self.readings)
+        weights = np.array([self.readings[day] for day in days])
+        index = pd.to_datetime(days)
+        trend = roster_trends(pd.DataFrame({'member_id': 0, 'date': days, 'weight_kg': weights}),
+                              alpha=self.alpha, history=True)
+        return pd.DataFrame({'weight_kg': weights, 'trend': trend['trend'].to_numpy()}, index=index)
+
+
+def roster_trends(weight_log: pd.DataFrame, alpha: float = EWMA_ALPHA, history: bool = False) -> pd.DataFrame:
+    """
+    EWMA trends for many members at once
+
+    Readings are laid out as a (members x reading number) matrix and the
+    recursion runs once per reading number, vectorized across members.
+
+    Args:
+        weight_log: Frame with member_id, date (ISO) and weight_kg columns
+        alpha: Daily smoothing factor
+        history: Return the trend after every reading instead of the latest
+
+    Returns:
+        Latest trend per member (indexed by member_id, with trend and
+        last_date columns), or weight_log sorted by member and date with an
+        added trend column when history is True
+    """
+    log = weight_log.sort_values(['member_id', 'date'], kind='stable').reset_index(drop=True)
+    if log.empty:
+        return log.assign(trend=pd.Series(dtype='float64')) if history else \
+            pd.DataFrame({'trend': pd.Series(dtype='float64'), 'last_date': pd.Series(dtype='object')})
+    # Rows are sorted by member, so each member is one contiguous run
+    member_ids = log['member_id'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, member_ids[1:] != member_ids[:-1]])
+    row = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(log)]))
+    column = np.arange(len(log)) - starts[row]
+    members = member_ids[starts]
+    days = pd.to_datetime(log['date']).to_numpy().astype('datetime64[D]').astype(np.int64)
+
+    weights = np.full((len(members), column.max() + 1), np.nan)
+    day_grid = np.zeros(weights.shape, dtype=np.int64)
+    weights[row, column] = log['weight_kg'].to_numpy(dtype=np.float64)
+    day_grid[row, column] = days
+
+    trends = np.empty(weights.shape)
+    trends[:, 0] = weights[:, 0]
+    for k in range(1, weights.shape[1]):
+        gap = np.maximum(day_grid[:, k] - day_grid[:, k - 1], 1)
+        step = 1 - (1 - alpha) ** gap
+        advanced = trends[:, k - 1] + step * (weights[:, k] - trends[:, k - 1])
+        # Members with fewer readings keep their last trend
+        trends[:, k] = np.where(np.isnan(weights[:, k]), trends[:, k - 1], advanced)
+
+    if history:
+        return log.assign(trend=trends[row, column])
+    ends = np.r_[starts[1:], len(log)] - 1
+    return pd.DataFrame({
+        'trend': trends[np.arange(len(members)), column[ends]],
+        'last_date': log['date'].to_numpy()[ends]
+    }, index=pd.Index(members, name='member_id'))
+
+
+def nightly_update(store, threshold_kg: float = MACRO_THRESHOLD_KG) -> pd.DataFrame:
+    """
+    Refresh stored macro targets for members whose weight trend moved
+
+    Members without stored targets, or whose trend moved at least
+    threshold_kg from the weight of their stored targets, get new targets
+    computed in one vectorized pass; everyone else is left untouched.
+    Targets use the activity-factor TDEE, as no workout history is assumed.
+
+    Args:
+        store: FitnessStore holding members, weight_log and macro_targets
+
+    Returns:
+        The targets that were written
+    """
+    trends = roster_trends(store.weight_log())
+    profiles = store.member_profiles().reindex(trends.index).dropna(subset=['height'])
+    trends = trends.loc[profiles.index]
+    current = store.macro_targets()['macro_weight'].reindex(trends.index)
+    changed = current.isna() | ((trends['trend'] - current).abs() >= threshold_kg)
+    trends, profiles = trends[changed], profiles[changed]
+
+    macro_weight = trends['trend'].round(1)
+    targets = calculate_macros_frame(macro_weight, profiles['height'], profiles['age'], profiles['gender'],
+                                     profiles['fitness_level'], profiles['goal'])
+    targets.insert(0, 'macro_weight', macro_weight)
+    targets.insert(0, 'trend_weight', trends['trend'])
+    store.save_macro_targets(targets)
+    return targets
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    from storage import FitnessStore, DB_PATH
+
+    parser = argparse.ArgumentParser(description="Nightly macro target refresh from body-weight trends")
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    updated = nightly_update(FitnessStore(args.db))
+    print(f"Updated macro targets for {len(updated):,} members in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,59 @@
+"""
+Adaptive capture quality for camera feedback
+
+Feedback is only useful while it keeps up with the movement, so the camera
+stream walks a quality ladder (resolution x frame rate) driven by measured
+end-to-end latency: it steps down quickly when the smoothed latency exceeds
+the target and climbs back slowly once there is clear headroom. Pose
+inference additionally runs on a region of interest around the person
+rather than the whole frame.
+
+The controller runs in the browser, inside the ``camera_stream`` component,
+where the latency is measured and ``track.applyConstraints`` can change the
+capture settings. This module owns its parameters: ``controller_config`` is
+passed to the component on every render.
+"""
+from typing import Dict, Any
+
+# Capture settings from full fidelity down; width/height/fps become ideal MediaTrackConstraints
+QUALITY_LADDER = [
+    {'width': 1280, 'height': 720, 'fps': 30},
+    {'width': 960, 'height': 540, 'fps': 30},
+    {'width': 640, 'height': 360, 'fps': 30},
+    {'width': 640, 'height': 360, 'fps': 20},
+    {'width': 480, 'height': 270, 'fps': 15},
+    {'width': 320, 'height': 180, 'fps': 10}
+]
+
+# Frame-to-feedback latency the controller aims to stay under
+TARGET_LATENCY_MS = 100.0
+
+# Smoothing of per-frame latency samples
+LATENCY_ALPHA = 0.2
+
+# Consecutive frames over target before stepping down a rung
+DOWNGRADE_FRAMES = 10
+
+# Step back up after this many consecutive frames below UPGRADE_HEADROOM x target
+UPGRADE_HEADROOM = 0.6
+UPGRADE_FRAMES = 90
+
+# Region of interest: keypoints above this confidence, padded by ROI_MARGIN of the box size
+ROI_MIN_CONFIDENCE = 0.3
+ROI_MARGIN = 0.15
+ROI_SMOOTHING = 0.5
+
+
+def controller_config(target_ms: float = TARGET_LATENCY_MS) -> Dict[str, Any]:
+    """Controller parameters for the browser-side implementation"""
+    return {
+        'ladder': QUALITY_LADDER,
+        'targetMs': target_ms,
+        'alpha': LATENCY_ALPHA,
+        'downgradeFrames': DOWNGRADE_FRAMES,
+        'upgradeHeadroom': UPGRADE_HEADROOM,
+        'upgradeFrames': UPGRADE_FRAMES,
+        'roiMinConfidence': ROI_MIN_CONFIDENCE,
+        'roiMargin': ROI_MARGIN,
+        'roiSmoothing': ROI_SMOOTHING
+    }
@@ -0,0 +1,161 @@
+from datetime import date
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from activity_rollups import ActivityRollups, MUSCLE_GROUPS
+
+# Zoom level -> number of trailing days shown (None = whole history)
+ZOOM_WINDOWS = {'1M': 30, '3M': 91, '1Y': 365, 'All': None}
+
+# Ranges up to this many days are shown per day, up to WEEKLY_MAX_DAYS per week, beyond that per month
+DAILY_MAX_DAYS = 366
+WEEKLY_MAX_DAYS = 5 * 366
+
+# Series longer than this are downsampled with LTTB and drawn with WebGL
+MAX_POINTS = 200
+
+CHART_LAYOUT = dict(
+    plot_bgcolor='rgba(0,0,0,0)',
+    paper_bgcolor='rgba(0,0,0,0)',
+    font_color='#F9FAFB',
+    title_font_size=18,
+    margin=dict(l=20, r=20, t=40, b=20),
+    xaxis_gridcolor='rgba(255,255,255,0.1)',
+    yaxis_gridcolor='rgba(255,255,255,0.1)'
+)
+
+
+# Weeks shown in the calendar heatmap and the per-muscle volume chart
+CALENDAR_WEEKS = 53
+VOLUME_WEEKS = 12
+
+MUSCLE_GROUP_COLORS = dict(zip(MUSCLE_GROUPS, ['#4F46E5', '#F59E0B', '#EC4899', '#3B82F6',
+                                               '#10B981', '#8B5CF6', '#EF4444']))
+
+
+def aggregate_activity(series: pd.Series, zoom: str, today: Optional[date] = None) -> Tuple[pd.Series, str]:
+    """
+    Clip a daily series to the zoom window and aggregate it to a suitable granularity
+
+    Args:
+        series: Daily workout counts
+        zoom: Key of ZOOM_WINDOWS
+        today: End of the window (defaults to today)
+
+    Returns:
+        Tuple of (aggregated series, granularity label)
+    """
+    if series.empty:
+        return series, 'Day'
+    end = pd.Timestamp(today or date.today())
+    window = ZOOM_WINDOWS[zoom]
+    start = end - pd.Timedelta(days=window - 1) if window else series.index.min()
+    series = series.reindex(pd.date_range(min(start, end), max(end, series.index.max()), freq='D'), fill_value=0)
+
+    span = len(series)
+    if span <= DAILY_MAX_DAYS:
+        return series, 'Day'
+    if span <= WEEKLY_MAX_DAYS:
+        return series.resample('W-MON', label='left', closed='left').sum(), 'Week'
+    return series.resample('MS').sum(), 'Month'
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling
+
+    Keeps the first and last points and, for every bucket in between, the
+    point forming the largest triangle with the previously kept point and the
+    average of the next bucket, which preserves peaks and troughs.
+
+    Args:
+        x: Monotonic x values as floats
+        y: y values
+        threshold: Number of points to keep
+
+    Returns:
+        Indexes of the kept points
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        areas = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(areas))
+        kept[i + 1] = a
+    return kept
+
+
+@st.cache_data(max_entries=256)
+def create_activity_chart(member_id: str, log_version: int, zoom: str, today: str, _rollups: ActivityRollups):
+    """
+    Build the workout trend chart for a member
+
+    Cached on (member_id, log_version, zoom, today); the rollups themselves
+    are not hashed, so callers must bump log_version whenever they change.
+    Entries stay in memory: charts are per member and go stale with every
+    logged workout, so persisting them would only fill the disk.
+    """
+    today = date.fromisoformat(today)
+    series, granularity = aggregate_activity(_rollups.daily_series(today), zoom, today)
+    x = series.index
+    y = series.to_numpy(dtype=np.float64)
+
+    use_webgl = len(series) > MAX_POINTS
+    if use_webgl:
+        keep = lttb(x.asi8.astype(np.float64), y, MAX_POINTS)
+        x, y = x[keep], y[keep]
+
+    trace_type = go.Scattergl if use_webgl else go.Scatter
+    fig = go.Figure(trace_type(
+        x=x, y=y, mode='lines', fill='tozeroy',
+        line=dict(color='#10B981', width=3),
+        hovertemplate=f'%{{y}} Workouts ({granularity.lower()} of %{{x|%b %d, %Y}})<extra></extra>'
+    ))
+    fig.update_layout(title=f'Workout Trends (per {granularity.lower()})', **CHART_LAYOUT)
+    return fig
+
+
+@st.cache_data(max_entries=256)
+def create_calendar_heatmap(member_id: str, log_version: int, today: str, _rollups: ActivityRollups):
+    """Workout calendar for the trailing year, one cell per day (cached like create_activity_chart)"""
+    grid = _rollups.calendar(CALENDAR_WEEKS, date.fromisoformat(today))
+    fig = go.Figure(go.Heatmap(
+        z=grid.to_numpy(), x=grid.columns, y=grid.index,
+        colorscale=[[0, '#1F2937'], [0.01, '#064E3B'], [0.5, '#059669'], [1, '#34D399']],
+        zmin=0, zmax=max(float(np.nanmax(grid.to_numpy(), initial=0)), 1),
+        xgap=3, ygap=3, showscale=False, hoverongaps=False,
+        hovertemplate='%{z:.0f} workouts in week of %{x|%b %d, %Y} (%{y})<extra></extra>'
+    ))
+    fig.update_layout(title='Workout Calendar', height=260, **CHART_LAYOUT)
+    fig.update_yaxes(autorange='reversed', showgrid=False)
+    fig.update_xaxes(showgrid=False)
+    return fig
+
+
+@st.cache_data(max_entries=256)
+def create_muscle_volume_chart(member_id: str, log_version: int, today: str, _rollups: ActivityRollups):
+    """Exercises completed per muscle group per week (cached like create_activity_chart)"""
+    volume = _rollups.weekly_volume(VOLUME_WEEKS, date.fromisoformat(today))
+    volume = volume.loc[:, volume.any()]
+    fig = go.Figure([
+        go.Bar(x=volume.index, y=volume[group], name=group, marker_color=MUSCLE_GROUP_COLORS.get(group),
+               hovertemplate=f'{group}: %{{y}} exercises<extra></extra>')
+        for group in volume.columns
+    ])
+    fig.update_layout(title='Weekly Volume by Muscle Group', barmode='stack', xaxis_title='Week of',
+                      yaxis_title='Exercises', **CHART_LAYOUT)
+    return fig
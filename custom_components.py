@@ -0,0 +1,68 @@
+"""
+Custom Streamlit components
+
+The frontends are static HTML files under ``frontend/`` that speak the
+Streamlit component protocol over postMessage, so no JavaScript build step
+is needed. Place component calls inside ``st.fragment`` functions: a value
+sent from the browser then reruns only that fragment, not the whole page.
+"""
+import os
+from typing import Dict, List, Any, Optional
+
+import streamlit.components.v1 as components
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frontend')
+
+# Minimum time between event batches sent by the camera
+CAMERA_FLUSH_MS = 500
+
+_camera_stream = components.declare_component('camera_stream', path=os.path.join(FRONTEND_DIR, 'camera_stream'))
+
+
+def camera_stream(feedback: str, status: str, reps: int, ack: int, controller: Dict[str, Any],
+                  key: str, flush_ms: int = CAMERA_FLUSH_MS) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """
+    Webcam with live feedback that streams pose events back to Python
+
+    The browser sends ``{'events': [...]}`` holding every event with a
+    ``seq`` above ``ack``; each event has a ``type`` of 'started' (with the
+    capture width and height) or 'frames' (with ``t`` in seconds and
+    per-frame ``keypoints`` as [x, y, score] lists in
+    session_recorder.KEYPOINTS order).
+
+    Args:
+        feedback: Text shown on the banner over the video
+        status: 'good' or 'bad', the banner color
+        reps: Rep count shown over the video
+        ack: Highest event seq already processed; the browser drops those
+        controller: capture_control.controller_config() for the quality ladder
+        key: Widget key; the latest batch is also in st.session_state[key]
+        flush_ms: Minimum time between batches
+
+    Returns:
+        The latest event batch, or None before the first one
+    """
+    return _camera_stream(feedback=feedback, status=status, reps=reps, ack=ack, controller=controller,
+                          flush_ms=flush_ms, key=key, default=None)
+
+
+_interval_timer = components.declare_component('interval_timer', path=os.path.join(FRONTEND_DIR, 'interval_timer'))
+
+
+def interval_timer(intervals: List[Dict[str, Any]], key: str) -> Optional[Dict[str, Any]]:
+    """
+    Work/rest interval timer that runs entirely in the browser
+
+    Nothing is sent while the timer runs; when the session finishes (or is
+    ended early) a single summary comes back: ``session`` (an id unique to
+    the run), ``finished``, ``elapsed_s`` and ``intervals``, the work
+    intervals done as {'exercise', 'round', 'seconds'}.
+
+    Args:
+        intervals: WorkoutRecommender.interval_session() for the day
+        key: Widget key; the latest summary is also in st.session_state[key]
+
+    Returns:
+        The summary of the last session, or None before the first one ends
+    """
+    return _interval_timer(intervals=intervals, key=key, default=None)
@@ -0,0 +1,102 @@
+"""
+Memoized dependency graph of derived values
+
+Inputs are set with ``set_input`` and derived nodes are declared with the
+functions that compute them from their dependencies. ``get`` is pull-based:
+a node recomputes only if the version of one of its dependencies changed
+since it was last computed, and its own version only advances when the
+recomputed value differs, so unchanged results stop propagation early.
+
+Node definitions are plain functions and can be re-registered on every
+Streamlit rerun; values and versions live in a separate ``state`` dict
+(e.g. one kept in ``st.session_state``), so memoization survives reruns.
+"""
+import logging
+from typing import Callable, Dict, List, Any, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class DerivedGraph:
+    """Named inputs and derived nodes with per-node memoization"""
+
+    def __init__(self, state: Optional[Dict[str, Any]] = None):
+        self._nodes: Dict[str, Any] = {}
+        self._state = state if state is not None else {}
+        self._values: Dict[str, Any] = self._state.setdefault('values', {})
+        self._versions: Dict[str, int] = self._state.setdefault('versions', {})
+        self._seen: Dict[str, tuple] = self._state.setdefault('seen', {})
+        self.recomputed: List[str] = []
+
+    def node(self, name: str, deps: Sequence[str]) -> Callable:
+        """
+        Decorator registering a derived node
+
+        The decorated function receives the values of ``deps`` positionally.
+        """
+        def register(func: Callable) -> Callable:
+            self._nodes[name] = (func, tuple(deps))
+            return func
+        return register
+
+    def set_input(self, name: str, value: Any) -> bool:
+        """
+        Set an input value
+
+        Returns:
+            True if the value changed (downstream nodes will recompute on the next get)
+        """
+        if name in self._values and self._values[name] == value:
+            return False
+        self._values[name] = value
+        self._versions[name] = self._versions.get(name, 0) + 1
+        return True
+
+    def get(self, name: str) -> Any:
+        """Current value of an input or node, recomputing stale nodes along the way"""
+        if name not in self._nodes:
+            if name not in self._values:
+                raise KeyError(f"Input not set: {name}")
+            return self._values[name]
+
+        func, deps = self._nodes[name]
+        args = [self.get(dep) for dep in deps]
+        dep_versions = tuple(self._versions[dep] for dep in deps)
+        if name not in self._values or self._seen.get(name) != dep_versions:
+            value = func(*args)
+            self._seen[name] = dep_versions
+            self.recomputed.append(name)
+            logger.debug("recomputed %s", name)
+            if name not in self._values or not self._equal(self._values[name], value):
+                self._values[name] = value
+                self._versions[name] = self._versions.get(name, 0) + 1
+        return self._values[name]
+
+    @staticmethod
+    def _equal(old: Any, new: Any) -> bool:
+        try:
+            return bool(old == new)
+        except (TypeError, ValueError):
+            return False
+
+    def downstream(self, name: str) -> List[str]:
+        """Nodes that depend, directly or transitively, on name (in registration order)"""
+        affected = {name}
+        changed = True
+        while changed:
+            changed = False
+            for node, (_, deps) in self._nodes.items():
+                if node not in affected and affected.intersection(deps):
+                    affected.add(node)
+                    changed = True
+        return [node for node in self._nodes if node in affected and node != name]
+
+    def invalidate(self, name: str):
+        """Force name's downstream nodes to recompute on their next get"""
+        for node in self.downstream(name):
+            self._seen.pop(node, None)
+
+    def take_recomputed(self) -> List[str]:
+        """Nodes recomputed since the last call, in evaluation order"""
+        recomputed, self.recomputed = self.recomputed, []
+        return recomputed
@@ -0,0 +1,118 @@
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from exercise_catalog import EXERCISE_CATALOG
+from utils import MET_VALUES, DEFAULT_MET
+
+# Assumed working time per exercise (sets plus rest) when nothing else is logged
+DEFAULT_EXERCISE_MINUTES = 10
+
+# Days of history needed before measured expenditure replaces the activity estimate
+MIN_HISTORY_DAYS = 7
+
+# Window used to average daily expenditure for the macro recommendation
+EXPENDITURE_WINDOW_DAYS = 14
+
+LOG_COLUMNS = ['date', 'day', 'muscle_group', 'exercise', 'duration_min']
+
+# Per-exercise MET values, with muscle-group values as fallback
+EXERCISE_METS = pd.Series({ex['name']: ex['met'] for ex in EXERCISE_CATALOG}, dtype='float64')
+MUSCLE_GROUP_METS = pd.Series(MET_VALUES, dtype='float64')
+
+
+def build_log_table(daily_logs: Dict[str, List[str]], workout_plan: Dict[str, Any],
+                    minutes_per_exercise: float = DEFAULT_EXERCISE_MINUTES) -> pd.DataFrame:
+    """
+    Flatten the session's daily logs into one row per performed exercise
+
+    Args:
+        daily_logs: Mapping of ISO date -> list of completed plan days
+        workout_plan: The plan the completed days refer to
+        minutes_per_exercise: Duration assigned to each exercise
+
+    Returns:
+        DataFrame with the columns in LOG_COLUMNS
+    """
+    rows = [
+        (date, day, workout_plan[day]['muscle_group'], exercise)
+        for date, days in daily_logs.items()
+        for day in days
+        if day in workout_plan
+        for exercise in workout_plan[day]['exercises']
+    ]
+    table = pd.DataFrame(rows, columns=LOG_COLUMNS[:-1])
+    table['date'] = pd.to_datetime(table['date'])
+    table['duration_min'] = np.float64(minutes_per_exercise)
+    return table
+
+
+def compute_energy_expenditure(log_table: pd.DataFrame, weight_kg: float) -> Dict[str, pd.DataFrame]:
+    """
+    Compute daily, weekly and per-muscle energy expenditure for a log table
+
+    Calories = MET x weight (kg) x time (hours), evaluated for all rows at once.
+    ``log_table`` may come from ``build_log_table`` or from a stored log with
+    the same columns; an optional ``met`` column overrides the catalog values.
+
+    Args:
+        log_table: One row per performed exercise
+        weight_kg: Body weight in kilograms
+
+    Returns:
+        Dictionary with 'daily', 'weekly' and 'per_muscle' DataFrames, each
+        holding 'calories' and 'minutes' columns
+    """
+    if log_table.empty:
+        empty = pd.DataFrame({'calories': pd.Series(dtype='float64'), 'minutes': pd.Series(dtype='float64')})
+        return {'daily': empty, 'weekly': empty.copy(), 'per_muscle': empty.copy()}
+
+    if 'met' in log_table:
+        met = log_table['met'].astype('float64')
+    else:
+        met = log_table['exercise'].map(EXERCISE_METS)
+        met = met.fillna(log_table['muscle_group'].map(MUSCLE_GROUP_METS)).fillna(DEFAULT_MET)
+
+    minutes = log_table['duration_min'].to_numpy(dtype='float64')
+    frame = pd.DataFrame({
+        'date': pd.to_datetime(log_table['date']).dt.normalize(),
+        'muscle_group': log_table['muscle_group'],
+        'calories': met.to_numpy() * weight_kg * (minutes / 60),
+        'minutes': minutes
+    })
+
+    daily = frame.groupby('date')[['calories', 'minutes']].sum()
+    # Fill days without workouts so weekly sums and averages see them as zero
+    daily = daily.reindex(pd.date_range(daily.index.min(), daily.index.max(), freq='D', name='date'),
+                          fill_value=0.0)
+    weekly = daily.resample('W-MON', label='left', closed='left').sum()
+    weekly.index.name = 'week'
+    per_muscle = frame.groupby('muscle_group')[['calories', 'minutes']].sum().sort_values('calories', ascending=False)
+
+    return {'daily': daily, 'weekly': weekly, 'per_muscle': per_muscle}
+
+
+def average_daily_expenditure(daily: pd.DataFrame, as_of: Optional[pd.Timestamp] = None,
+                              window_days: int = EXPENDITURE_WINDOW_DAYS,
+                              min_history_days: int = MIN_HISTORY_DAYS) -> Optional[float]:
+    """
+    Average daily exercise calories over the most recent window
+
+    Args:
+        daily: The 'daily' frame from compute_energy_expenditure
+        as_of: Last day of the window (defaults to today)
+        window_days: Number of days to average over
+        min_history_days: Minimum span of history required
+
+    Returns:
+        Average kcal/day, or None when there is not enough history
+    """
+    if daily.empty:
+        return None
+    as_of = pd.Timestamp(as_of if as_of is not None else pd.Timestamp.now()).normalize()
+    if (as_of - daily.index.min()).days + 1 < min_history_days:
+        return None
+    start = as_of - pd.Timedelta(days=window_days - 1)
+    calories = daily['calories'].reindex(pd.date_range(start, as_of, freq='D'), fill_value=0.0)
+    return float(calories.mean())
@@ -0,0 +1,289 @@
+from typing import Dict, List, Any, Optional, Iterable
+
+import numpy as np
+
+# Structured exercise catalog. An exercise's ID is its position in this list,
+# so new exercises must only ever be appended.
+#   equipment:  everything required besides body weight (empty = no equipment)
+#   difficulty: lowest fitness level the movement is appropriate for
+#   met:        Metabolic Equivalent of Task while performing the exercise
+#   pattern:    movement pattern, used to group similar exercises
+#   joints:     joints placed under significant load (avoid when injured)
+EXERCISE_CATALOG: List[Dict[str, Any]] = [
+    # Chest
+    {"name": "Bench Press", "muscle_group": "Chest", "equipment": ["Barbell", "Bench"], "difficulty": "Intermediate", "primary_muscles": ["Chest"], "secondary_muscles": ["Triceps", "Front Delts"], "met": 6.0, "pattern": "horizontal_push", "joints": ["Shoulder"]},
+    {"name": "Incline Dumbbell Press", "muscle_group": "Chest", "equipment": ["Dumbbell", "Bench"], "difficulty": "Beginner", "primary_muscles": ["Upper Chest"], "secondary_muscles": ["Front Delts", "Triceps"], "met": 5.0, "pattern": "horizontal_push", "joints": ["Shoulder"]},
+    {"name": "Decline Bench Press", "muscle_group": "Chest", "equipment": ["Barbell", "Bench"], "difficulty": "Intermediate", "primary_muscles": ["Lower Chest"], "secondary_muscles": ["Triceps"], "met": 6.0, "pattern": "horizontal_push", "joints": ["Shoulder"]},
+    {"name": "Pec Fly", "muscle_group": "Chest", "equipment": ["Machine"], "difficulty": "Beginner", "primary_muscles": ["Chest"], "secondary_muscles": ["Front Delts"], "met": 3.5, "pattern": "chest_fly", "joints": []},
+    {"name": "Push-ups", "muscle_group": "Chest", "equipment": [], "difficulty": "Beginner", "primary_muscles": ["Chest"], "secondary_muscles": ["Triceps", "Front Delts", "Abs"], "met": 3.8, "pattern": "horizontal_push", "joints": ["Wrist"]},
+    {"name": "Cable Chest Press", "muscle_group": "Chest", "equipment": ["Cable"], "difficulty": "Beginner", "primary_muscles": ["Chest"], "secondary_muscles": ["Triceps", "Front Delts"], "met": 5.0, "pattern": "horizontal_push", "joints": []},
+    {"name": "Incline Barbell Press", "muscle_group": "Chest", "equipment": ["Barbell", "Bench"], "difficulty": "Intermediate", "primary_muscles": ["Upper Chest"], "secondary_muscles": ["Front Delts", "Triceps"], "met": 6.0, "pattern": "horizontal_push", "joints": ["Shoulder"]},
+    {"name": "Chest Dips", "muscle_group": "Chest", "equipment": ["Dip Station"], "difficulty": "Advanced", "primary_muscles": ["Lower Chest"], "secondary_muscles": ["Triceps", "Front Delts"], "met": 8.0, "pattern": "dip", "joints": ["Shoulder", "Elbow"]},
+    {"name": "Dumbbell Pullover", "muscle_group": "Chest", "equipment": ["Dumbbell", "Bench"], "difficulty": "Intermediate", "primary_muscles": ["Chest"], "secondary_muscles": ["Lats"], "met": 3.5, "pattern": "pullover", "joints": ["Shoulder"]},
+    {"name": "Cable Crossover", "muscle_group": "Chest", "equipment": ["Cable"], "difficulty": "Intermediate", "primary_muscles": ["Chest"], "secondary_muscles": ["Front Delts"], "met": 3.5, "pattern": "chest_fly", "joints": []},
+    {"name": "Incline Fly", "muscle_group": "Chest", "equipment": ["Dumbbell", "Bench"], "difficulty": "Beginner", "primary_muscles": ["Upper Chest"], "secondary_muscles": ["Front Delts"], "met": 3.5, "pattern": "chest_fly", "joints": ["Shoulder"]},
+    {"name": "Decline Fly", "muscle_group": "Chest", "equipment": ["Dumbbell", "Bench"], "difficulty": "Intermediate", "primary_muscles": ["Lower Chest"], "secondary_muscles": ["Front Delts"], "met": 3.5, "pattern": "chest_fly", "joints": ["Shoulder"]},
+    # Shoulders
+    {"name": "Military Press", "muscle_group": "Shoulders", "equipment": ["Barbell"], "difficulty": "Intermediate", "primary_muscles": ["Front Delts"], "secondary_muscles": ["Side Delts", "Triceps"], "met": 6.0, "pattern": "vertical_push", "joints": ["Shoulder", "Lower Back"]},
+    {"name": "Lateral Raises", "muscle_group": "Shoulders", "equipment": ["Dumbbell"], "difficulty": "Beginner", "primary_muscles": ["Side Delts"], "secondary_muscles": ["Traps"], "met": 3.5, "pattern": "shoulder_raise", "joints": []},
+    {"name": "Upright Rows", "muscle_group": "Shoulders", "equipment": ["Barbell"], "difficulty": "Intermediate", "primary_muscles": ["Side Delts"], "secondary_muscles": ["Traps", "Biceps"], "met": 5.0, "pattern": "vertical_pull", "joints": ["Shoulder", "Wrist"]},
+    {"name": "Arnold Press", "muscle_group": "Shoulders", "equipment": ["Dumbbell"], "difficulty": "Intermediate", "primary_muscles": ["Front Delts"], "secondary_muscles": ["Side Delts", "Triceps"], "met": 5.0, "pattern": "vertical_push", "joints": ["Shoulder"]},
+    {"name": "Front Raises", "muscle_group": "Shoulders", "equipment": ["Dumbbell"], "difficulty": "Beginner", "primary_muscles": ["Front Delts"], "secondary_muscles": ["Upper Chest"], "met": 3.5, "pattern": "shoulder_raise", "joints": []},
+    {"name": "Rear Delt Fly", "muscle_group": "Shoulders", "equipment": ["Dumbbell"], "difficulty": "Beginner", "primary_muscles": ["Rear Delts"], "secondary_muscles": ["Rhomboids", "Traps"], "met": 3.5, "pattern": "reverse_fly", "joints": []},
+    {"name": "Overhead Press", "muscle_group": "Shoulders", "equipment": ["Barbell"], "difficulty": "Intermediate", "primary_muscles": ["Front Delts"], "secondary_muscles": ["Side Delts", "Triceps", "Abs"], "met": 6.0, "pattern": "vertical_push", "joints": ["Shoulder", "Lower Back"]},
+    {"name": "Dumbbell Shrugs", "muscle_group": "Shoulders", "equipment": ["Dumbbell"], "difficulty": "Beginner", "primary_muscles": ["Traps"], "secondary_muscles": ["Forearms"], "met": 3.5, "pattern": "shrug", "joints": []},
+    {"name": "Pike Push-ups", "muscle_group": "Shoulders", "equipment": [], "difficulty": "Intermediate", "primary_muscles": ["Front Delts"], "secondary_muscles": ["Triceps", "Upper Chest"], "met": 3.8, "pattern": "vertical_push", "joints": ["Shoulder", "Wrist"]},
+    {"name": "Cable Lateral Raises", "muscle_group": "Shoulders", "equipment": ["Cable"], "difficulty": "Beginner", "primary_muscles": ["Side Delts"], "secondary_muscles": [], "met": 3.5, "pattern": "shoulder_raise", "joints": []},
+    {"name": "Handstand Push-ups", "muscle_group": "Shoulders", "equipment": [], "difficulty": "Advanced", "primary_muscles": ["Front Delts"], "secondary_muscles": ["Triceps", "Traps", "Abs"], "met": 8.0, "pattern": "vertical_push", "joints": ["Shoulder", "Wrist"]},
+    {"name": "Face Pulls", "muscle_group": "Shoulders", "equipment": ["Cable"], "difficulty": "Beginner", "primary_muscles": ["Rear Delts"], "secondary_muscles": ["Rhomboids", "Traps"], "met": 3.5, "pattern": "horizontal_pull", "joints": []},
+    # Arms
+    {"name": "Barbell Curls", "muscle_group": "Arms", "equipment": ["Barbell"], "difficulty": "Beginner", "primary_muscles": ["Biceps"], "secondary_muscles": ["Forearms"], "met": 3.5, "pattern": "elbow_flexion", "joints": ["Elbow", "Wrist"]},
+    {"name": "Tricep Dips", "muscle_group": "Arms", "equipment": ["Bench"], "difficulty": "Beginner", "primary_muscles": ["Triceps"], "secondary_muscles": ["Chest", "Front Delts"], "met": 3.8, "pattern": "dip", "joints": ["Shoulder", "Elbow"]},
+    {"name": "Skull Crushers", "muscle_group": "Arms", "equipment": ["Barbell", "Bench"], "difficulty": "Intermediate", "primary_muscles": ["Triceps"], "secondary_muscles": [], "met": 3.5, "pattern": "elbow_extension", "joints": ["Elbow"]},
+    {"name": "Hammer Curls", "muscle_group": "Arms", "equipment": ["Dumbbell"], "difficulty": "Beginner", "primary_muscles": ["Biceps"], "secondary_muscles": ["Forearms"], "met": 3.5, "pattern": "elbow_flexion", "joints": []},
+    {"name": "Rope Pushdowns", "muscle_group": "Arms", "equipment": ["Cable"], "difficulty": "Beginner", "primary_muscles": ["Triceps"], "secondary_muscles": [], "met": 3.5, "pattern": "elbow_extension", "joints": []},
+    {"name": "Preacher Curls", "muscle_group": "Arms", "equipment": ["Barbell", "Bench"], "difficulty": "Beginner", "primary_muscles": ["Biceps"], "secondary_muscles": [], "met": 3.5, "pattern": "elbow_flexion", "joints": ["Elbow"]},
+    {"name": "Overhead Tricep Extension", "muscle_group": "Arms", "equipment": ["Dumbbell"], "difficulty": "Beginner", "primary_muscles": ["Triceps"], "secondary_muscles": [], "met": 3.5, "pattern": "elbow_extension", "joints": ["Elbow", "Shoulder"]},
+    {"name": "Cable Curls", "muscle_group": "Arms", "equipment": ["Cable"], "difficulty": "Beginner", "primary_muscles": ["Biceps"], "secondary_muscles": ["Forearms"], "met": 3.5, "pattern": "elbow_flexion", "joints": []},
+    {"name": "21s Bicep Curls", "muscle_group": "Arms", "equipment": ["Barbell"], "difficulty": "Intermediate", "primary_muscles": ["Biceps"], "secondary_muscles": ["Forearms"], "met": 4.0, "pattern": "elbow_flexion", "joints": ["Elbow"]},
+    {"name": "Diamond Push-ups", "muscle_group": "Arms", "equipment": [], "difficulty": "Intermediate", "primary_muscles": ["Triceps"], "secondary_muscles": ["Chest", "Front Delts"], "met": 3.8, "pattern": "horizontal_push", "joints": ["Wrist", "Elbow"]},
+    {"name": "Concentration Curls", "muscle_group": "Arms", "equipment": ["Dumbbell", "Bench"], "difficulty": "Beginner", "primary_muscles": ["Biceps"], "secondary_muscles": [], "met": 3.0, "pattern": "elbow_flexion", "joints": []},
+    {"name": "Close-Grip Bench Press", "muscle_group": "Arms", "equipment": ["Barbell", "Bench"], "difficulty": "Intermediate", "primary_muscles": ["Triceps"], "secondary_muscles": ["Chest", "Front Delts"], "met": 6.0, "pattern": "horizontal_push", "joints": ["Wrist", "Elbow"]},
+    # Back
+    {"name": "Deadlifts", "muscle_group": "Back", "equipment": ["Barbell"], "difficulty": "Advanced", "primary_muscles": ["Lower Back", "Glutes", "Hamstrings"], "secondary_muscles": ["Traps", "Forearms", "Lats"], "met": 6.0, "pattern": "hinge", "joints": ["Lower Back"]},
+    {"name": "Barbell Rows", "muscle_group": "Back", "equipment": ["Barbell"], "difficulty": "Intermediate", "primary_muscles": ["Lats", "Rhomboids"], "secondary_muscles": ["Biceps", "Rear Delts", "Lower Back"], "met": 6.0, "pattern": "horizontal_pull", "joints": ["Lower Back"]},
+    {"name": "Lat Pulldowns", "muscle_group": "Back", "equipment": ["Cable"], "difficulty": "Beginner", "primary_muscles": ["Lats"], "secondary_muscles": ["Biceps", "Rear Delts"], "met": 5.0, "pattern": "vertical_pull", "joints": []},
+    {"name": "Pull-ups", "muscle_group": "Back", "equipment": ["Pull-up Bar"], "difficulty": "Intermediate", "primary_muscles": ["Lats"], "secondary_muscles": ["Biceps", "Rhomboids"], "met": 8.0, "pattern": "vertical_pull", "joints": ["Shoulder", "Elbow"]},
+    {"name": "Seated Cable Rows", "muscle_group": "Back", "equipment": ["Cable"], "difficulty": "Beginner", "primary_muscles": ["Rhomboids", "Lats"], "secondary_muscles": ["Biceps", "Rear Delts"], "met": 5.0, "pattern": "horizontal_pull", "joints": []},
+    {"name": "T-Bar Rows", "muscle_group": "Back", "equipment": ["Barbell"], "difficulty": "Intermediate", "primary_muscles": ["Lats", "Rhomboids"], "secondary_muscles": ["Biceps", "Lower Back"], "met": 6.0, "pattern": "horizontal_pull", "joints": ["Lower Back"]},
+    {"name": "Single-Arm Dumbbell Rows", "muscle_group": "Back", "equipment": ["Dumbbell", "Bench"], "difficulty": "Beginner", "primary_muscles": ["Lats"], "secondary_muscles": ["Biceps", "Rear Delts"], "met": 5.0, "pattern": "horizontal_pull", "joints": []},
+    {"name": "Wide-Grip Pull-ups", "muscle_group": "Back", "equipment": ["Pull-up Bar"], "difficulty": "Advanced", "primary_muscles": ["Lats"], "secondary_muscles": ["Biceps", "Rear Delts"], "met": 8.0, "pattern": "vertical_pull", "joints": ["Shoulder"]},
+    {"name": "Reverse Fly", "muscle_group": "Back", "equipment": ["Dumbbell"], "difficulty": "Beginner", "primary_muscles": ["Rear Delts", "Rhomboids"], "secondary_muscles": ["Traps"], "met": 3.5, "pattern": "reverse_fly", "joints": []},
+    {"name": "Hyperextensions", "muscle_group": "Back", "equipment": ["Machine"], "difficulty": "Beginner", "primary_muscles": ["Lower Back"], "secondary_muscles": ["Glutes", "Hamstrings"], "met": 3.5, "pattern": "hinge", "joints": ["Lower Back"]},
+    {"name": "Cable Rows", "muscle_group": "Back", "equipment": ["Cable"], "difficulty": "Beginner", "primary_muscles": ["Rhomboids", "Lats"], "secondary_muscles": ["Biceps"], "met": 5.0, "pattern": "horizontal_pull", "joints": []},
+    {"name": "Inverted Rows", "muscle_group": "Back", "equipment": ["Pull-up Bar"], "difficulty": "Beginner", "primary_muscles": ["Rhomboids", "Lats"], "secondary_muscles": ["Biceps", "Abs"], "met": 3.8, "pattern": "horizontal_pull", "joints": []},
+    # Legs
+    {"name": "Squats", "muscle_group": "Legs", "equipment": ["Barbell"], "difficulty": "Intermediate", "primary_muscles": ["Quads", "Glutes"], "secondary_muscles": ["Hamstrings", "Abs", "Lower Back"], "met": 6.0, "pattern": "squat", "joints": ["Knee", "Lower Back"]},
+    {"name": "Romanian Deadlifts", "muscle_group": "Legs", "equipment": ["Barbell"], "difficulty": "Intermediate", "primary_muscles": ["Hamstrings", "Glutes"], "secondary_muscles": ["Lower Back"], "met": 6.0, "pattern": "hinge", "joints": ["Lower Back"]},
+    {"name": "Lunges", "muscle_group": "Legs", "equipment": [], "difficulty": "Beginner", "primary_muscles": ["Quads", "Glutes"], "secondary_muscles": ["Hamstrings", "Calves"], "met": 4.0, "pattern": "lunge", "joints": ["Knee"]},
+    {"name": "Leg Press", "muscle_group": "Legs", "equipment": ["Machine"], "difficulty": "Beginner", "primary_muscles": ["Quads", "Glutes"], "secondary_muscles": ["Hamstrings"], "met": 5.0, "pattern": "squat", "joints": ["Knee"]},
+    {"name": "Calf Raises", "muscle_group": "Legs", "equipment": [], "difficulty": "Beginner", "primary_muscles": ["Calves"], "secondary_muscles": [], "met": 3.5, "pattern": "calf_raise", "joints": []},
+    {"name": "Leg Curls", "muscle_group": "Legs", "equipment": ["Machine"], "difficulty": "Beginner", "primary_muscles": ["Hamstrings"], "secondary_muscles": ["Calves"], "met": 3.5, "pattern": "knee_flexion", "joints": []},
+    {"name": "Leg Extensions", "muscle_group": "Legs", "equipment": ["Machine"], "difficulty": "Beginner", "primary_muscles": ["Quads"], "secondary_muscles": [], "met": 3.5, "pattern": "knee_extension", "joints": ["Knee"]},
+    {"name": "Bulgarian Split Squats", "muscle_group": "Legs", "equipment": ["Dumbbell", "Bench"], "difficulty": "Intermediate", "primary_muscles": ["Quads", "Glutes"], "secondary_muscles": ["Hamstrings", "Abs"], "met": 5.0, "pattern": "lunge", "joints": ["Knee"]},
+    {"name": "Walking Lunges", "muscle_group": "Legs", "equipment": [], "difficulty": "Beginner", "primary_muscles": ["Quads", "Glutes"], "secondary_muscles": ["Hamstrings", "Calves"], "met": 4.0, "pattern": "lunge", "joints": ["Knee"]},
+    {"name": "Goblet Squats", "muscle_group": "Legs", "equipment": ["Dumbbell"], "difficulty": "Beginner", "primary_muscles": ["Quads", "Glutes"], "secondary_muscles": ["Abs"], "met": 5.0, "pattern": "squat", "joints": ["Knee"]},
+    {"name": "Sumo Squats", "muscle_group": "Legs", "equipment": ["Dumbbell"], "difficulty": "Beginner", "primary_muscles": ["Adductors", "Glutes"], "secondary_muscles": ["Quads"], "met": 5.0, "pattern": "squat", "joints": ["Knee", "Hip"]},
+    {"name": "Step-ups", "muscle_group": "Legs", "equipment": ["Bench"], "difficulty": "Beginner", "primary_muscles": ["Quads", "Glutes"], "secondary_muscles": ["Hamstrings", "Calves"], "met": 4.0, "pattern": "lunge", "joints": ["Knee"]},
+    {"name": "Wall Sits", "muscle_group": "Legs", "equipment": [], "difficulty": "Beginner", "primary_muscles": ["Quads"], "secondary_muscles": ["Glutes"], "met": 3.0, "pattern": "isometric", "joints": ["Knee"]},
+    {"name": "Jump Squats", "muscle_group": "Legs", "equipment": [], "difficulty": "Intermediate", "primary_muscles": ["Quads", "Glutes"], "secondary_muscles": ["Calves"], "met": 8.0, "pattern": "plyometric", "joints": ["Knee"]},
+    # Core
+    {"name": "Plank", "muscle_group": "Core", "equipment": [], "difficulty": "Beginner", "primary_muscles": ["Abs"], "secondary_muscles": ["Obliques", "Lower Back"], "met": 3.8, "pattern": "anti_extension", "joints": []},
+    {"name": "Crunches", "muscle_group": "Core", "equipment": [], "difficulty": "Beginner", "primary_muscles": ["Abs"], "secondary_muscles": [], "met": 3.8, "pattern": "spinal_flexion", "joints": []},
+    {"name": "Russian Twists", "muscle_group": "Core", "equipment": [], "difficulty": "Beginner", "primary_muscles": ["Obliques"], "secondary_muscles": ["Abs"], "met": 3.8, "pattern": "rotation", "joints": ["Lower Back"]},
+    {"name": "Mountain Climbers", "muscle_group": "Core", "equipment": [], "difficulty": "Beginner", "primary_muscles": ["Abs"], "secondary_muscles": ["Hip Flexors", "Front Delts"], "met": 8.0, "pattern": "locomotion", "joints": ["Wrist"]},
+    {"name": "Bicycle Crunches", "muscle_group": "Core", "equipment": [], "difficulty": "Beginner", "primary_muscles": ["Obliques", "Abs"], "secondary_muscles": ["Hip Flexors"], "met": 3.8, "pattern": "rotation", "joints": []},
+    {"name": "Dead Bug", "muscle_group": "Core", "equipment": [], "difficulty": "Beginner", "primary_muscles": ["Abs"], "secondary_muscles": ["Hip Flexors"], "met": 2.8, "pattern": "anti_extension", "joints": []},
+    {"name": "Leg Raises", "muscle_group": "Core", "equipment": [], "difficulty": "Intermediate", "primary_muscles": ["Lower Abs"], "secondary_muscles": ["Hip Flexors"], "met": 3.8, "pattern": "hip_flexion", "joints": ["Lower Back"]},
+    {"name": "Side Plank", "muscle_group": "Core", "equipment": [], "difficulty": "Beginner", "primary_muscles": ["Obliques"], "secondary_muscles": ["Abs", "Glutes"], "met": 3.8, "pattern": "anti_lateral_flexion", "joints": ["Shoulder"]},
+    {"name": "Ab Wheel Rollouts", "muscle_group": "Core", "equipment": ["Ab Wheel"], "difficulty": "Advanced", "primary_muscles": ["Abs"], "secondary_muscles": ["Lats", "Lower Back"], "met": 4.0, "pattern": "anti_extension", "joints": ["Lower Back", "Shoulder"]},
+    {"name": "Hanging Knee Raises", "muscle_group": "Core", "equipment": ["Pull-up Bar"], "difficulty": "Intermediate", "primary_muscles": ["Lower Abs"], "secondary_muscles": ["Hip Flexors", "Forearms"], "met": 3.8, "pattern": "hip_flexion", "joints": ["Shoulder"]},
+    {"name": "V-ups", "muscle_group": "Core", "equipment": [], "difficulty": "Intermediate", "primary_muscles": ["Abs"], "secondary_muscles": ["Hip Flexors"], "met": 4.0, "pattern": "spinal_flexion", "joints": ["Lower Back"]},
+    {"name": "Flutter Kicks", "muscle_group": "Core", "equipment": [], "difficulty": "Beginner", "primary_muscles": ["Lower Abs"], "secondary_muscles": ["Hip Flexors"], "met": 3.8, "pattern": "hip_flexion", "joints": ["Lower Back"]},
+    # Cardio
+    {"name": "Burpees", "muscle_group": "Cardio", "equipment": [], "difficulty": "Intermediate", "primary_muscles": ["Full Body"], "secondary_muscles": ["Chest", "Quads"], "met": 8.0, "pattern": "plyometric", "joints": ["Knee", "Wrist", "Shoulder"]},
+    {"name": "High Knees", "muscle_group": "Cardio", "equipment": [], "difficulty": "Beginner", "primary_muscles": ["Hip Flexors"], "secondary_muscles": ["Quads", "Calves"], "met": 8.0, "pattern": "locomotion", "joints": ["Knee"]},
+    {"name": "Jumping Jacks", "muscle_group": "Cardio", "equipment": [], "difficulty": "Beginner", "primary_muscles": ["Full Body"], "secondary_muscles": ["Calves", "Side Delts"], "met": 7.7, "pattern": "plyometric", "joints": ["Knee"]},
+    {"name": "Jump Rope", "muscle_group": "Cardio", "equipment": ["Jump Rope"], "difficulty": "Beginner", "primary_muscles": ["Calves"], "secondary_muscles": ["Front Delts"], "met": 11.0, "pattern": "plyometric", "joints": ["Knee"]},
+    {"name": "Sprint Intervals", "muscle_group": "Cardio", "equipment": [], "difficulty": "Advanced", "primary_muscles": ["Quads", "Hamstrings"], "secondary_muscles": ["Glutes", "Calves"], "met": 12.0, "pattern": "locomotion", "joints": ["Knee", "Hip"]},
+    {"name": "Box Jumps", "muscle_group": "Cardio", "equipment": ["Plyo Box"], "difficulty": "Intermediate", "primary_muscles": ["Quads", "Glutes"], "secondary_muscles": ["Calves"], "met": 8.0, "pattern": "plyometric", "joints": ["Knee"]},
+    {"name": "Battle Ropes", "muscle_group": "Cardio", "equipment": ["Battle Ropes"], "difficulty": "Intermediate", "primary_muscles": ["Front Delts"], "secondary_muscles": ["Biceps", "Triceps", "Abs"], "met": 10.0, "pattern": "conditioning", "joints": []},
+    {"name": "Rowing Machine", "muscle_group": "Cardio", "equipment": ["Cardio Machine"], "difficulty": "Beginner", "primary_muscles": ["Lats", "Quads"], "secondary_muscles": ["Biceps", "Glutes"], "met": 7.0, "pattern": "cyclical", "joints": ["Lower Back"]},
+    {"name": "Stationary Bike", "muscle_group": "Cardio", "equipment": ["Cardio Machine"], "difficulty": "Beginner", "primary_muscles": ["Quads"], "secondary_muscles": ["Hamstrings", "Calves"], "met": 7.0, "pattern": "cyclical", "joints": []},
+    {"name": "Elliptical", "muscle_group": "Cardio", "equipment": ["Cardio Machine"], "difficulty": "Beginner", "primary_muscles": ["Full Body"], "secondary_muscles": [], "met": 5.0, "pattern": "cyclical", "joints": []},
+    {"name": "Stair Climber", "muscle_group": "Cardio", "equipment": ["Cardio Machine"], "difficulty": "Beginner", "primary_muscles": ["Quads", "Glutes"], "secondary_muscles": ["Calves"], "met": 9.0, "pattern": "cyclical", "joints": ["Knee"]},
+    {"name": "Treadmill Running", "muscle_group": "Cardio", "equipment": ["Cardio Machine"], "difficulty": "Intermediate", "primary_muscles": ["Quads", "Hamstrings"], "secondary_muscles": ["Calves", "Glutes"], "met": 9.8, "pattern": "locomotion", "joints": ["Knee"]},
+]
+
+DIFFICULTY_LEVELS = ['Beginner', 'Intermediate', 'Advanced']
+
+EQUIPMENT_TYPES = sorted({item for ex in EXERCISE_CATALOG for item in ex['equipment']})
+
+JOINTS = sorted({joint for ex in EXERCISE_CATALOG for joint in ex['joints']})
+
+# Neighbours kept per exercise in the similarity graph
+MAX_SIMILAR = 8
+
+
+def _jaccard(a: Iterable[str], b: Iterable[str]) -> float:
+    a, b = set(a), set(b)
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def similarity(a: Dict[str, Any], b: Dict[str, Any]) -> float:
+    """
+    How well exercise b substitutes for exercise a (higher is closer)
+
+    Only exercises of the same muscle group are comparable (0 otherwise).
+    A shared movement pattern dominates, then overlap of primary muscles,
+    secondary muscles and equipment; each difficulty step apart costs a little.
+    """
+    if a['muscle_group'] != b['muscle_group'] or a['name'] == b['name']:
+        return 0.0
+    score = 3.0 * (a['pattern'] == b['pattern'])
+    score += 2.0 * _jaccard(a['primary_muscles'], b['primary_muscles'])
+    score += 1.0 * _jaccard(a['secondary_muscles'], b['secondary_muscles'])
+    score += 0.5 * _jaccard(a['equipment'], b['equipment'])
+    score -= 0.25 * abs(DIFFICULTY_LEVELS.index(a['difficulty']) - DIFFICULTY_LEVELS.index(b['difficulty']))
+    return max(score, 0.01)
+
+
+class ExerciseIndex:
+    """Inverted bitset indexes over the exercise catalog for constraint queries
+
+    Every attribute value maps to an integer bitmask with bit ``i`` set when
+    exercise ``i`` has that value, so a multi-constraint query is a handful of
+    AND/OR operations on Python ints followed by decoding the surviving bits.
+    """
+
+    def __init__(self, catalog: List[Dict[str, Any]]):
+        self.catalog = catalog
+        self.names = [ex['name'] for ex in catalog]
+        self.ids_by_name = {name: i for i, name in enumerate(self.names)}
+        self.all_mask = (1 << len(catalog)) - 1
+        self._mask_bytes = (len(catalog) + 7) // 8
+
+        self.by_muscle_group: Dict[str, int] = {}
+        self.by_pattern: Dict[str, int] = {}
+        self.by_primary_muscle: Dict[str, int] = {}
+        self.by_muscle: Dict[str, int] = {}
+        self.requires_equipment: Dict[str, int] = {}
+        self.loads_joint: Dict[str, int] = {}
+        by_difficulty: Dict[str, int] = {}
+
+        for i, ex in enumerate(catalog):
+            bit = 1 << i
+            self._add(self.by_muscle_group, ex['muscle_group'], bit)
+            self._add(self.by_pattern, ex['pattern'], bit)
+            self._add(by_difficulty, ex['difficulty'], bit)
+            for muscle in ex['primary_muscles']:
+                self._add(self.by_primary_muscle, muscle, bit)
+                self._add(self.by_muscle, muscle, bit)
+            for muscle in ex['secondary_muscles']:
+                self._add(self.by_muscle, muscle, bit)
+            for item in ex['equipment']:
+                self._add(self.requires_equipment, item, bit)
+            for joint in ex['joints']:
+                self._add(self.loads_joint, joint, bit)
+
+        # Cumulative masks so "up to Intermediate" is a single lookup
+        self.up_to_difficulty: Dict[str, int] = {}
+        cumulative = 0
+        for level in DIFFICULTY_LEVELS:
+            cumulative |= by_difficulty.get(level, 0)
+            self.up_to_difficulty[level] = cumulative
+
+        self._decoded: Dict[int, List[int]] = {}
+
+        # Similarity graph: exercise ID -> most similar exercise IDs in the same group, best first
+        self.similar: Dict[int, List[int]] = {}
+        for group_mask in self.by_muscle_group.values():
+            members = self.ids(group_mask)
+            for i in members:
+                scored = sorted(((similarity(catalog[i], catalog[j]), j) for j in members if j != i),
+                                key=lambda pair: (-pair[0], pair[1]))
+                self.similar[i] = [j for _, j in scored[:MAX_SIMILAR]]
+
+    @staticmethod
+    def _add(index: Dict[str, int], key: str, bit: int):
+        index[key] = index.get(key, 0) | bit
+
+    def query(self, muscle_group: Optional[str] = None,
+              equipment: Optional[Iterable[str]] = None,
+              max_difficulty: Optional[str] = None,
+              avoid_joints: Optional[Iterable[str]] = None,
+              pattern: Optional[str] = None,
+              primary_muscle: Optional[str] = None) -> int:
+        """
+        Build the bitmask of exercises matching every given constraint
+
+        Args:
+            muscle_group: Only exercises in this muscle group
+            equipment: Equipment the user has; exercises needing anything else are excluded
+            max_difficulty: Highest difficulty level allowed
+            avoid_joints: Joints that must not be loaded (e.g. injured knee)
+            pattern: Only exercises with this movement pattern
+            primary_muscle: Only exercises with this primary muscle
+
+        Returns:
+            Integer bitmask over exercise IDs
+        """
+        mask = self.all_mask
+        if muscle_group is not None:
+            mask &= self.by_muscle_group.get(muscle_group, 0)
+        if pattern is not None:
+            mask &= self.by_pattern.get(pattern, 0)
+        if primary_muscle is not None:
+            mask &= self.by_primary_muscle.get(primary_muscle, 0)
+        if max_difficulty is not None:
+            mask &= self.up_to_difficulty.get(max_difficulty, 0)
+        if equipment is not None:
+            available = set(equipment)
+            for item, required in self.requires_equipment.items():
+                if item not in available:
+                    mask &= ~required
+        if avoid_joints:
+            for joint in avoid_joints:
+                mask &= ~self.loads_joint.get(joint, 0)
+        return mask
+
+    def ids(self, mask: int) -> List[int]:
+        """Decode a bitmask into exercise IDs in catalog order"""
+        ids = self._decoded.get(mask)
+        if ids is None:
+            packed = np.frombuffer(mask.to_bytes(self._mask_bytes, 'little'), dtype=np.uint8)
+            ids = np.flatnonzero(np.unpackbits(packed, bitorder='little')).tolist()
+            if len(self._decoded) < 4096:
+                self._decoded[mask] = ids
+        return ids
+
+    def names_for(self, mask: int) -> List[str]:
+        """Decode a bitmask into exercise names in catalog order"""
+        return [self.names[i] for i in self.ids(mask)]
+
+    def filter(self, **constraints) -> List[str]:
+        """Names of exercises matching the constraints accepted by ``query``"""
+        return self.names_for(self.query(**constraints))
+
+    def alternatives(self, name: str, exclude: Iterable[str] = (), limit: int = 5, **constraints) -> List[str]:
+        """
+        Substitutes for an exercise from the precomputed similarity graph
+
+        Args:
+            name: Exercise to replace
+            exclude: Names that must not be suggested (e.g. the rest of the day)
+            limit: Maximum number of suggestions
+            **constraints: Constraints accepted by ``query`` (equipment, avoid_joints, ...)
+
+        Returns:
+            Exercise names, most similar first
+        """
+        i = self.ids_by_name.get(name)
+        if i is None:
+            return []
+        allowed = self.query(**constraints) if constraints else self.all_mask
+        excluded = {self.ids_by_name.get(other) for other in exclude}
+        found = [j for j in self.similar[i] if allowed >> j & 1 and j not in excluded]
+        if len(found) < limit:
+            # Past the graph's nearest neighbours, fall back to the rest of the group
+            group = self.by_muscle_group[self.catalog[i]['muscle_group']] & allowed
+            found += [j for j in self.ids(group) if j != i and j not in excluded and j not in found]
+        return [self.names[j] for j in found[:limit]]
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Look up an exercise record by name"""
+        i = self.ids_by_name.get(name)
+        return self.catalog[i] if i is not None else None
+
+
+EXERCISE_INDEX = ExerciseIndex(EXERCISE_CATALOG)
@@ -0,0 +1,291 @@
+"""
+Per-muscle-group fatigue and recovery
+
+Each logged workout is an impulse of training load on the muscle groups it
+works, Banister-style: the load feeds a fast-decaying fatigue component and
+a slowly decaying fitness component per group. A group is ready to train
+again once its fatigue has decayed below RECOVERED_FATIGUE, and among the
+ready groups the least trained one (lowest fitness) comes next.
+
+Decay over a gap of several days is a single exponential, so updating a
+member is O(muscle groups) however long ago they last trained.
+``roster_states`` recomputes every member at once, vectorized across
+members, for nightly jobs.
+"""
+from collections import Counter
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from exercise_catalog import EXERCISE_CATALOG
+
+# Time constants (days) of the fatigue and fitness responses to one workout
+FATIGUE_TAU_DAYS = 2.0
+FITNESS_TAU_DAYS = 42.0
+
+# A group is ready to train again below this fatigue (a single session takes about two days)
+RECOVERED_FATIGUE = 0.35
+
+# Load on another group per secondary muscle of an exercise, relative to its own group
+SECONDARY_LOAD = 0.3
+
+# Plan muscle groups, in catalog order
+MUSCLE_GROUPS = list(dict.fromkeys(exercise['muscle_group'] for exercise in EXERCISE_CATALOG))
+GROUP_INDEX = {group: i for i, group in enumerate(MUSCLE_GROUPS)}
+
+
+def _group_loads() -> np.ndarray:
+    """
+    Load of one workout of each group on every group (groups x groups)
+
+    Every exercise loads its own group fully and, by SECONDARY_LOAD, the
+    groups whose exercises mainly train its other muscles (a muscle belongs
+    to the group where it is most often a primary muscle). A workout's load
+    is the average over its group's exercises.
+    """
+    homes: Dict[str, Counter] = {}
+    for exercise in EXERCISE_CATALOG:
+        for muscle in exercise['primary_muscles']:
+            homes.setdefault(muscle, Counter())[exercise['muscle_group']] += 1
+    home = {muscle: counts.most_common(1)[0][0] for muscle, counts in homes.items()}
+
+    loads = np.zeros((len(MUSCLE_GROUPS), len(MUSCLE_GROUPS)))
+    counts = np.zeros(len(MUSCLE_GROUPS))
+    for exercise in EXERCISE_CATALOG:
+        own = GROUP_INDEX[exercise['muscle_group']]
+        others = {home[muscle] for muscle in exercise['primary_muscles'] + exercise['secondary_muscles']
+                  if muscle in home} - {exercise['muscle_group']}
+        loads[own, own] += 1.0
+        for group in others:
+            loads[own, GROUP_INDEX[group]] += SECONDARY_LOAD
+        counts[own] += 1
+    return loads / counts[:, np.newaxis]
+
+
+# Row g: load of one workout of MUSCLE_GROUPS[g] on every group
+GROUP_LOAD = _group_loads()
+
+
+def _day_number(iso_date: str) -> int:
+    return date.fromisoformat(iso_date).toordinal()
+
+
+class FatigueModel:
+    """
+    Fatigue and fitness per muscle group for one member
+
+    Attributes:
+        fatigue: Fatigue per group (MUSCLE_GROUPS order) as of state_date
+        fitness: Fitness per group as of state_date
+        state_date: ISO date of the last logged workout (None before the first)
+        workouts: (ISO date, muscle group) of every logged workout, oldest first
+    """
+
+    def __init__(self, fatigue_tau: float = FATIGUE_TAU_DAYS, fitness_tau: float = FITNESS_TAU_DAYS):
+        self.fatigue_tau = fatigue_tau
+        self.fitness_tau = fitness_tau
+        self.fatigue = np.zeros(len(MUSCLE_GROUPS))
+        self.fitness = np.zeros(len(MUSCLE_GROUPS))
+        self.state_date: Optional[str] = None
+        self.workouts: List[Tuple[str, str]] = []
+
+    def _decayed(self, as_of: str) -> Tuple[np.ndarray, np.ndarray]:
+        if self.state_date is None:
+            return self.fatigue, self.fitness
+        gap = max(_day_number(as_of) - _day_number(self.state_date), 0)
+        return self.fatigue * np.exp(-gap / self.fatigue_tau), self.fitness * np.exp(-gap / self.fitness_tau)
+
+    def _apply(self, workout_date: str, muscle_group: str):
+        self.fatigue, self.fitness = self._decayed(workout_date)
+        load = GROUP_LOAD[GROUP_INDEX[muscle_group]]
+        self.fatigue = self.fatigue + load
+        self.fitness = self.fitness + load
+        self.state_date = workout_date
+
+    def log(self, workout_date: str, muscle_group: str):
+        """
+        Add a completed workout
+
+        Args:
+            workout_date: ISO date of the workout
+            muscle_group: Muscle group trained ('Rest' days are ignored)
+        """
+        if muscle_group not in GROUP_INDEX:
+            return
+        self.workouts.append((workout_date, muscle_group))
+        if self.state_date is None or workout_date >= self.state_date:
+            self._apply(workout_date, muscle_group)
+        else:
+            # Back-filled workout: replay the history
+            self.workouts.sort()
+            self.fatigue = np.zeros(len(MUSCLE_GROUPS))
+            self.fitness = np.zeros(len(MUSCLE_GROUPS))
+            self.state_date = None
+            for logged_date, group in self.workouts:
+                self._apply(logged_date, group)
+
+    def state(self, as_of: str) -> pd.DataFrame:
+        """Fatigue, fitness and readiness per muscle group on a date"""
+        fatigue, fitness = self._decayed(as_of)
+        return pd.DataFrame({'fatigue': fatigue, 'fitness': fitness, 'ready': fatigue < RECOVERED_FATIGUE},
+                            index=pd.Index(MUSCLE_GROUPS, name='muscle_group'))
+
+    def next_group(self, focus: List[str], as_of: str) -> str:
+        """
+        Muscle group to train on a date
+
+        Args:
+            focus: Candidate groups in priority order (the goal's primary focus)
+            as_of: ISO date of the session
+
+        Returns:
+            The ready focus group with the lowest fitness, or 'Rest' if none is ready
+        """
+        fatigue, fitness = self._decayed(as_of)
+        return str(choose_groups(fatigue[np.newaxis], fitness[np.newaxis], focus_mask(focus)[np.newaxis])[0])
+
+
+def focus_mask(focus: List[str]) -> np.ndarray:
+    """Priority of each group in a focus list (0 = first, inf = not in focus)"""
+    mask = np.full(len(MUSCLE_GROUPS), np.inf)
+    for rank, group in enumerate(focus):
+        mask[GROUP_INDEX[group]] = rank
+    return mask
+
+
+def choose_groups(fatigue: np.ndarray, fitness: np.ndarray, priority: np.ndarray) -> np.ndarray:
+    """
+    Next muscle group for many members at once
+
+    Args:
+        fatigue: Array of shape (members, groups)
+        fitness: Array of shape (members, groups)
+        priority: focus_mask() per member, shape (members, groups)
+
+    Returns:
+        Array of group names, 'Rest' where no focus group is ready
+    """
+    candidate = np.isfinite(priority) & (fatigue < RECOVERED_FATIGUE)
+    # Lowest fitness first; focus order breaks ties (e.g. before anything was trained)
+    score = np.where(candidate, fitness + priority * 1e-9, np.inf)
+    best = score.argmin(axis=1)
+    return np.where(candidate.any(axis=1), np.array(MUSCLE_GROUPS)[best], 'Rest')
+
+
+def roster_states(workout_log: pd.DataFrame, as_of: str, fatigue_tau: float = FATIGUE_TAU_DAYS,
+                  fitness_tau: float = FITNESS_TAU_DAYS) -> pd.DataFrame:
+    """
+    Fatigue and fitness per muscle group for many members at once
+
+    Workouts are laid out as a (members x workout number) matrix and the
+    recursion runs once per workout number, vectorized across members.
+
+    Args:
+        workout_log: Frame with member_id, date (ISO) and muscle_group columns
+        as_of: ISO date the states are decayed to
+
+    Returns:
+        Frame indexed by member_id with ('fatigue', group) and ('fitness', group) columns
+    """
+    log = workout_log[workout_log['muscle_group'].isin(GROUP_INDEX)]
+    log = log.sort_values(['member_id', 'date'], kind='stable').reset_index(drop=True)
+    columns = pd.MultiIndex.from_product([['fatigue', 'fitness'], MUSCLE_GROUPS])
+    if log.empty:
+        return pd.DataFrame(columns=columns, dtype='float64').rename_axis('member_id')
+    # Rows are sorted by member, so each member is one contiguous run
+    member_ids = log['member_id'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, member_ids[1:] != member_ids[:-1]])
+    row = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(log)]))
+    column = np.arange(len(log)) - starts[row]
+    days = pd.to_datetime(log['date']).to_numpy().astype('datetime64[D]').astype(np.int64)
+
+    groups = np.full((len(starts), column.max() + 1), -1)
+    day_grid = np.zeros(groups.shape, dtype=np.int64)
+    groups[row, column] = log['muscle_group'].map(GROUP_INDEX).to_numpy()
+    day_grid[row, column] = days
+
+    fatigue = np.zeros((len(starts), len(MUSCLE_GROUPS)))
+    fitness = np.zeros_like(fatigue)
+    last_day = day_grid[:, 0].copy()
+    for k in range(groups.shape[1]):
+        # Members with fewer workouts keep their state (and its date)
+        present = groups[:, k] >= 0
+        gap = np.where(present, day_grid[:, k] - last_day, 0)[:, np.newaxis]
+        load = np.where(present[:, np.newaxis], GROUP_LOAD[groups[:, k]], 0.0)
+        fatigue = fatigue * np.exp(-gap / fatigue_tau) + load
+        fitness = fitness * np.exp(-gap / fitness_tau) + load
+        last_day = np.where(present, day_grid[:, k], last_day)
+
+    gap = np.maximum(np.datetime64(as_of, 'D').astype(np.int64) - last_day, 0)[:, np.newaxis]
+    values = np.hstack([fatigue * np.exp(-gap / fatigue_tau), fitness * np.exp(-gap / fitness_tau)])
+    return pd.DataFrame(values, columns=columns, index=pd.Index(member_ids[starts], name='member_id'))
+
+
+def roster_next_groups(states: pd.DataFrame, goals: pd.Series, goal_focus: Dict[str, List[str]]) -> pd.Series:
+    """
+    Next muscle group for every member of roster_states()
+
+    Members whose goal is missing or not in ``goal_focus`` are not dropped;
+    they get a goal-neutral focus of every muscle group in catalog order.
+
+    Args:
+        states: roster_states() output
+        goals: Primary goal per member_id
+        goal_focus: Goal -> focus groups in priority order
+
+    Returns:
+        Muscle group (or 'Rest') per member_id
+    """
+    # The last row is the goal-neutral fallback
+    priorities = np.array([focus_mask(goal_focus[goal]) for goal in goal_focus] + [focus_mask(MUSCLE_GROUPS)])
+    goal_index = goals.reindex(states.index).map({goal: i for i, goal in enumerate(goal_focus)})
+    goal_index = goal_index.fillna(len(goal_focus)).to_numpy(dtype=np.int64)
+    chosen = choose_groups(states['fatigue'].to_numpy(), states['fitness'].to_numpy(), priorities[goal_index])
+    return pd.Series(chosen, index=states.index, name='next_group')
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    from storage import FitnessStore, synthetic_population
+    from workout_data import WorkoutRecommender
+
+    parser = argparse.ArgumentParser(description="Nightly fatigue recompute (benchmarked on a synthetic roster without --db)")
+    parser.add_argument('--db', help="FitnessStore database to recompute")
+    parser.add_argument('--members', type=int, default=100_000)
+    parser.add_argument('--days', type=int, default=90)
+    args = parser.parse_args()
+
+    if args.db:
+        store = FitnessStore(args.db)
+        workouts, goals = store.workout_log(), store.member_goals()
+        today = date.today().isoformat()
+    else:
+        members, workouts = synthetic_population(args.members, args.days)
+        goals = members.set_index('member_id')['goal']
+        today = workouts['date'].max()
+    goal_focus = {goal: config['primary_focus'] for goal, config in WorkoutRecommender().goal_priorities.items()}
+
+    started = time.perf_counter()
+    states = roster_states(workouts, today)
+    chosen = roster_next_groups(states, goals, goal_focus)
+    elapsed = time.perf_counter() - started
+    print(f"Roster recompute: {len(workouts):,} workouts of {len(states):,} members in {elapsed:.2f}s")
+    print(chosen.value_counts().to_string())
+
+    if not states.empty:
+        # The incremental model must land on the same state as the batch recompute
+        member = states.index[0]
+        model = FatigueModel()
+        history = workouts[workouts['member_id'] == member]
+        started = time.perf_counter()
+        for workout_date, group in zip(history['date'], history['muscle_group']):
+            model.log(workout_date, group)
+        per_update = (time.perf_counter() - started) / len(history)
+        state = model.state(today)
+        assert np.allclose(state['fatigue'], states.loc[member, 'fatigue']), "incremental and batch states differ"
+        assert np.allclose(state['fitness'], states.loc[member, 'fitness']), "incremental and batch states differ"
+        print(f"Incremental update: {per_update * 1e6:.1f} µs per workout (matches the batch recompute)")
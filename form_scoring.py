@@ -0,0 +1,488 @@
+"""
+Rep-quality scoring against reference rep templates
+
+Each rep becomes a joint-angle trajectory (degrees, one column per angle in
+the exercise's rules), resampled to REP_LENGTH steps. It is labelled by its
+nearest reference template under banded dynamic time warping (DTW), with
+the Sakoe-Chiba band set by BAND. The search stays exact but cheap:
+
+* the nearest Euclidean (unwarped) template distance is an upper bound on
+  the answer, since the straight diagonal path lies inside the band;
+* LB_Keogh lower bounds, computed for all templates at once from
+  precomputed envelopes, drop templates that cannot beat that bound;
+* the remaining templates run through one DTW whose anti-diagonal
+  wavefront is vectorized across templates, abandoning any template whose
+  wavefront minimum already exceeds the bound.
+
+Reference templates are generated from parametric good and faulty reps, so
+new faults are added by editing FORM_RULES.
+"""
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from session_recorder import KEYPOINT_INDEX, SessionRecorder, SessionReplay
+
+# Steps every rep is resampled to before comparison
+REP_LENGTH = 24
+
+# Sakoe-Chiba band half-width in steps (12% of a rep)
+BAND = 3
+
+# Wavefront diagonals between early-abandon checks
+ABANDON_EVERY = 8
+
+# Frames per scored window for held exercises (about 2 s at 30 fps)
+HOLD_WINDOW = 60
+
+# A rep starts when the primary angle moves this far from its rest value
+# and ends when it comes back within it
+REP_THRESHOLD = 20.0
+
+# Longer excursions are treated as the member repositioning, not as a rep
+MAX_REP_FRAMES = 300
+
+# Keypoint triples (a, vertex, c) per angle; left and right sides are averaged
+ANGLE_JOINTS = {
+    'knee': [('left_hip', 'left_knee', 'left_ankle'), ('right_hip', 'right_knee', 'right_ankle')],
+    'hip': [('left_shoulder', 'left_hip', 'left_knee'), ('right_shoulder', 'right_hip', 'right_knee')],
+    'elbow': [('left_shoulder', 'left_elbow', 'left_wrist'), ('right_shoulder', 'right_elbow', 'right_wrist')],
+    'body': [('left_shoulder', 'left_hip', 'left_ankle'), ('right_shoulder', 'right_hip', 'right_ankle')],
+    'shoulder': [('left_hip', 'left_shoulder', 'left_elbow'), ('right_hip', 'right_shoulder', 'right_elbow')],
+    'leg_spread': [('right_hip', 'left_hip', 'left_ankle'), ('left_hip', 'right_hip', 'right_ankle')]
+}
+
+# Per exercise: angles compared, the angle that delimits reps (None for holds)
+# and reference classes. Each class gives, per angle, its value at rest and
+# at the bottom (or peak) of the rep; 'good' is the class of correct reps.
+FORM_RULES = {
+    'Squats': {
+        'angles': ['knee', 'hip'],
+        'primary': 'knee',
+        'classes': {
+            'good': {'tip': "Good squat - depth and posture on target",
+                     'shape': {'knee': (172, 92), 'hip': (172, 85)}},
+            'shallow': {'tip': "Lower your hips until your thighs are parallel to the floor",
+                        'shape': {'knee': (172, 130), 'hip': (172, 125)}},
+            'forward_lean': {'tip': "Keep your back straight during the movement",
+                             'shape': {'knee': (172, 95), 'hip': (172, 50)}}
+        }
+    },
+    'Push-ups': {
+        'angles': ['elbow', 'body'],
+        'primary': 'elbow',
+        'classes': {
+            'good': {'tip': "Good push-up - full range with a straight body",
+                     'shape': {'elbow': (170, 85), 'body': (176, 176)}},
+            'partial': {'tip': "Lower your chest until it nearly touches the floor",
+                        'shape': {'elbow': (170, 130), 'body': (176, 176)}},
+            'hip_sag': {'tip': "Maintain a straight line from head to heels",
+                        'shape': {'elbow': (170, 90), 'body': (172, 145)}}
+        }
+    },
+    'Lunges': {
+        'angles': ['knee', 'hip'],
+        'primary': 'knee',
+        'classes': {
+            'good': {'tip': "Good lunge - both knees near 90 degrees",
+                     'shape': {'knee': (172, 92), 'hip': (172, 100)}},
+            'shallow': {'tip': "Lower until both knees are at 90-degree angles",
+                        'shape': {'knee': (172, 135), 'hip': (172, 145)}},
+            'torso_lean': {'tip': "Keep your upper body straight throughout",
+                           'shape': {'knee': (172, 95), 'hip': (172, 60)}}
+        }
+    },
+    'Plank': {
+        'angles': ['body', 'elbow'],
+        'primary': None,
+        'classes': {
+            'good': {'tip': "Good plank - body in a straight line",
+                     'shape': {'body': (176, 176), 'elbow': (90, 90)}},
+            'hips_off_line': {'tip': "Don't let your hips sag or rise too high",
+                              'shape': {'body': (155, 155), 'elbow': (90, 90)}}
+        }
+    },
+    'Jumping Jacks': {
+        'angles': ['shoulder', 'leg_spread'],
+        'primary': 'shoulder',
+        'classes': {
+            'good': {'tip': "Good jumping jack - full arm and leg range",
+                     'shape': {'shoulder': (20, 165), 'leg_spread': (92, 115)}},
+            'short_arms': {'tip': "Jump while spreading your legs and raising your arms",
+                           'shape': {'shoulder': (20, 100), 'leg_spread': (92, 112)}},
+            'no_leg_spread': {'tip': "Jump while spreading your legs and raising your arms",
+                              'shape': {'shoulder': (20, 160), 'leg_spread': (92, 95)}}
+        }
+    }
+}
+
+# General cues shown next to the camera feed
+FORM_TIPS = {
+    "Squats": [
+        "Keep your back straight during the movement",
+        "Lower your hips until your thighs are parallel to the floor",
+        "Push through your heels to return to standing",
+        "Keep your knees aligned with your toes",
+        "Engage your core throughout the exercise"
+    ],
+    "Push-ups": [
+        "Maintain a straight line from head to heels",
+        "Lower your chest until it nearly touches the floor",
+        "Keep your elbows at a 45-degree angle to your body",
+        "Push through your palms to return to starting position",
+        "Engage your core and glutes throughout"
+    ],
+    "Lunges": [
+        "Step forward with one leg and lower your hips",
+        "Keep your front knee directly above your ankle",
+        "Lower until both knees are at 90-degree angles",
+        "Push through your front heel to return to start",
+        "Keep your upper body straight throughout"
+    ],
+    "Plank": [
+        "Keep your body in a straight line from head to heels",
+        "Engage your core and glutes",
+        "Don't let your hips sag or rise too high",
+        "Keep your neck in a neutral position",
+        "Breathe steadily throughout the hold"
+    ],
+    "Jumping Jacks": [
+        "Start with feet together and arms at your sides",
+        "Jump while spreading your legs and raising your arms",
+        "Land softly with knees slightly bent",
+        "Keep your core engaged throughout",
+        "Maintain a steady rhythm"
+    ]
+}
+
+# Template variations per class: bottom depth offsets (degrees) x bottom timing (fraction of the rep)
+GOOD_DEPTH_OFFSETS = [-10, -5, 0, 5, 10]
+FAULT_DEPTH_OFFSETS = [-5, 0, 5]
+BOTTOM_TIMINGS = [0.35, 0.5, 0.65]
+
+
+def joint_angles(keypoints: np.ndarray, angles: List[str]) -> np.ndarray:
+    """
+    Joint angles in degrees for every frame
+
+    Args:
+        keypoints: Array of shape (frames, keypoints, 2 or 3) in
+            session_recorder.KEYPOINTS order
+        angles: Names from ANGLE_JOINTS
+
+    Returns:
+        Array of shape (frames, len(angles))
+    """
+    points = np.asarray(keypoints, dtype=np.float64)[..., :2]
+    result = np.empty((len(points), len(angles)))
+    for column, angle in enumerate(angles):
+        sides = []
+        for a, vertex, c in ANGLE_JOINTS[angle]:
+            v1 = points[:, KEYPOINT_INDEX[a]] - points[:, KEYPOINT_INDEX[vertex]]
+            v2 = points[:, KEYPOINT_INDEX[c]] - points[:, KEYPOINT_INDEX[vertex]]
+            norms = np.linalg.norm(v1, axis=1) * np.linalg.norm(v2, axis=1)
+            cosine = np.einsum('ij,ij->i', v1, v2) / np.maximum(norms, 1e-9)
+            sides.append(np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0))))
+        result[:, column] = np.mean(sides, axis=0)
+    return result
+
+
+def resample(trajectory: np.ndarray, length: int = REP_LENGTH) -> np.ndarray:
+    """Linearly resample a (frames, angles) trajectory to length steps"""
+    trajectory = np.asarray(trajectory, dtype=np.float64)
+    positions = np.linspace(0, len(trajectory) - 1, length)
+    lo = np.floor(positions).astype(np.intp)
+    hi = np.minimum(lo + 1, len(trajectory) - 1)
+    frac = (positions - lo)[:, np.newaxis]
+    return trajectory[lo] * (1 - frac) + trajectory[hi] * frac
+
+
+def _rep_shape(rest: float, bottom: float, timing: float, length: int) -> np.ndarray:
+    """Rest -> bottom -> rest with cosine easing, the bottom reached at timing"""
+    u = np.linspace(0, 1, length)
+    down = (1 - np.cos(np.pi * np.minimum(u / timing, 1))) / 2
+    up = (1 - np.cos(np.pi * np.clip((u - timing) / (1 - timing), 0, 1))) / 2
+    return rest + (bottom - rest) * (down - up)
+
+
+def reference_templates(exercise: str, length: int = REP_LENGTH) -> Tuple[np.ndarray, List[str]]:
+    """
+    Reference reps generated from FORM_RULES
+
+    Returns:
+        Tuple of (templates of shape (n, length, angles), class label per template)
+    """
+    rules = FORM_RULES[exercise]
+    templates, labels = [], []
+    for label, reference in rules['classes'].items():
+        offsets = GOOD_DEPTH_OFFSETS if label == 'good' else FAULT_DEPTH_OFFSETS
+        for offset in offsets:
+            for timing in BOTTOM_TIMINGS:
+                columns = []
+                for angle in rules['angles']:
+                    rest, bottom = reference['shape'][angle]
+                    # Offsets deepen or shorten the movement; static angles only shift
+                    shifted = bottom + offset * np.sign(bottom - rest) if bottom != rest else bottom + offset / 2
+                    columns.append(_rep_shape(rest, shifted, timing, length))
+                templates.append(np.stack(columns, axis=1))
+                labels.append(label)
+    return np.array(templates), labels
+
+
+class FormScorer:
+    """Nearest-template rep classifier for one exercise (banded DTW with pruning)"""
+
+    def __init__(self, exercise: str, length: int = REP_LENGTH, band: int = BAND):
+        self.exercise = exercise
+        self.rules = FORM_RULES[exercise]
+        self.length = length
+        self.band = band
+        self.templates, self.labels = reference_templates(exercise, length)
+
+        # LB_Keogh envelopes: min/max of each template within the band
+        padded = np.pad(self.templates, ((0, 0), (band, band), (0, 0)), mode='edge')
+        windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * band + 1, axis=1)
+        self.upper = windows.max(axis=-1)
+        self.lower = windows.min(axis=-1)
+
+        # The band is stored per anti-diagonal k = i + j and offset d = i - j + band,
+        # so a cell's up/left neighbours sit at d -/+ 1 on diagonal k - 1 and its
+        # diagonal neighbour at d on k - 2: each wavefront step is plain slicing.
+        # Offsets whose parity does not match k, or that fall outside the
+        # matrix, get infinite cost.
+        k, d = np.meshgrid(np.arange(2 * length - 1), np.arange(2 * band + 1) - band, indexing='ij')
+        i, j = (k + d) // 2, (k - d) // 2
+        self._valid = ((k + d) % 2 == 0) & (i >= 0) & (j >= 0) & (i < length) & (j < length)
+        self._query_steps = np.where(self._valid, i, 0)
+        self._template_steps = np.where(self._valid, j, 0)
+
+    def _dtw(self, query: np.ndarray, candidates: np.ndarray, bound: float) -> np.ndarray:
+        """Banded DTW distances from query to candidate templates (inf when abandoned above bound)"""
+        diagonals, width = self._valid.shape
+        alive = candidates
+        cost = ((query[self._query_steps] - self.templates[alive][:, self._template_steps]) ** 2).sum(axis=-1)
+        cost[:, ~self._valid] = np.inf
+        # Diagonal-major layout, so each wavefront step works on contiguous rows;
+        # two leading diagonals hold the start condition, with one padding column on either side
+        cost = np.ascontiguousarray(cost.transpose(1, 0, 2))
+        acc = np.full((diagonals + 2, len(alive), width + 2), np.inf)
+        acc[0, :, self.band + 1] = 0.0
+        step = np.empty((len(alive), width))
+        for k in range(diagonals):
+            row = k + 2
+            np.minimum(acc[row - 1, :, :-2], acc[row - 1, :, 2:], out=step)
+            np.minimum(step, acc[row - 2, :, 1:-1], out=step)
+            np.add(step, cost[k], out=acc[row, :, 1:-1])
+            # Every warping path crosses diagonal k or k - 1, and costs are non-negative
+            if k and k % ABANDON_EVERY == 0:
+                keep = acc[row - 1:row + 1].min(axis=(0, 2)) <= bound
+                if not keep.all():
+                    alive, acc, cost = alive[keep], acc[:, keep], cost[:, keep]
+                    if not len(alive):
+                        break
+                    step = np.empty((len(alive), width))
+        distances = np.full(len(candidates), np.inf)
+        distances[np.searchsorted(candidates, alive)] = acc[-1, :, self.band + 1]
+        return distances
+
+    def score(self, trajectory: np.ndarray) -> Dict[str, Any]:
+        """
+        Classify one rep
+
+        Args:
+            trajectory: Joint angles of the rep, shape (frames, len(rules['angles']))
+
+        Returns:
+            Dictionary with label, tip, good (bool), deviation (RMS degrees
+            from the nearest template) and pruned (templates skipped before
+            or during DTW)
+        """
+        query = resample(trajectory, self.length)
+        # Upper bound: unwarped distance to every template (the diagonal path is inside the band)
+        euclidean = ((query - self.templates) ** 2).sum(axis=(1, 2))
+        bound = euclidean.min()
+        above = np.maximum(query - self.upper, 0)
+        below = np.maximum(self.lower - query, 0)
+        lb_keogh = (above ** 2 + below ** 2).sum(axis=(1, 2))
+        candidates = np.flatnonzero(lb_keogh <= bound)
+        distances = self._dtw(query, candidates, bound)
+        best = int(np.argmin(distances))
+        nearest = int(candidates[best])
+        label = self.labels[nearest]
+        return {
+            'label': label,
+            'tip': self.rules['classes'][label]['tip'],
+            'good': label == 'good',
+            'deviation': float(np.sqrt(distances[best] / self.length)),
+            'pruned': int(len(self.templates) - np.isfinite(distances).sum())
+        }
+
+
+@lru_cache(maxsize=None)
+def get_scorer(exercise: str) -> FormScorer:
+    """Shared scorer per exercise (templates and envelopes are built once)"""
+    return FormScorer(exercise)
+
+
+def segment_reps(angles: np.ndarray, exercise: str) -> List[Tuple[int, int]]:
+    """
+    Split a joint-angle series into reps
+
+    A rep is a run of frames where the primary angle is more than
+    REP_THRESHOLD degrees away from its resting value (the first frame's);
+    held exercises are cut into HOLD_WINDOW windows instead.
+
+    Returns:
+        List of (start, stop) frame ranges (empty for an empty series)
+    """
+    if not len(angles):
+        return []
+    primary = FORM_RULES[exercise]['primary']
+    if primary is None:
+        return [(start, min(start + HOLD_WINDOW, len(angles)))
+                for start in range(0, len(angles) - HOLD_WINDOW // 2, HOLD_WINDOW)]
+    series = angles[:, FORM_RULES[exercise]['angles'].index(primary)]
+    moving = np.abs(series - series[0]) > REP_THRESHOLD
+    edges = np.flatnonzero(np.diff(np.r_[False, moving, False].astype(np.int8)))
+    # Include the frame on either side so the rep starts and ends near rest
+    return [(max(start - 1, 0), min(stop + 1, len(series))) for start, stop in zip(edges[::2], edges[1::2])]
+
+
+class RepSegmenter:
+    """
+    Streaming counterpart of segment_reps
+
+    Angle frames are pushed as they arrive, and every rep is returned once
+    its last frame is in. Only the frames of the rep in progress are kept.
+    """
+
+    def __init__(self, exercise: str):
+        rules = FORM_RULES[exercise]
+        self.column = None if rules['primary'] is None else rules['angles'].index(rules['primary'])
+        self._buffer = np.empty((0, len(rules['angles'])))
+        self._rest: Optional[float] = None
+        self._start: Optional[int] = None
+        self._scanned = 0
+
+    def push(self, angles: np.ndarray) -> List[np.ndarray]:
+        """
+        Add frames of joint angles, shape (frames, angles)
+
+        Returns:
+            Angle trajectories of the reps completed by these frames
+        """
+        self._buffer = np.concatenate([self._buffer, angles])
+        reps = []
+        if self.column is None:
+            while len(self._buffer) >= HOLD_WINDOW:
+                reps.append(self._buffer[:HOLD_WINDOW])
+                self._buffer = self._buffer[HOLD_WINDOW:]
+            return reps
+
+        if self._rest is None and len(self._buffer):
+            self._rest = self._buffer[0, self.column]
+        moving = np.abs(self._buffer[self._scanned:, self.column] - self._rest) > REP_THRESHOLD
+        changes = np.flatnonzero(np.diff(np.r_[self._start is not None, moving].astype(np.int8))) + self._scanned
+        for index in changes:
+            if self._start is None:
+                self._start = index
+            else:
+                reps.append(self._buffer[max(self._start - 1, 0):index + 1])
+                self._start = None
+        self._scanned = len(self._buffer)
+
+        if self._start is not None and self._scanned - self._start > MAX_REP_FRAMES:
+            self._rest, self._start = self._buffer[-1, self.column], None
+        keep_from = max(self._start - 1 if self._start is not None else self._scanned - 1, 0)
+        self._buffer = self._buffer[keep_from:]
+        self._scanned -= keep_from
+        if self._start is not None:
+            self._start -= keep_from
+        return reps
+
+
+class LiveSet:
+    """
+    Scores a set while its keypoint frames stream in
+
+    Every frame is also appended to a SessionRecorder when one is given,
+    with each scored rep recorded as an event (kind = label, value =
+    deviation), so the set can be replayed and re-scored later.
+
+    Attributes:
+        results: score() results of the reps so far, in order
+    """
+
+    def __init__(self, exercise: str, recorder: Optional[SessionRecorder] = None):
+        self.exercise = exercise
+        self.recorder = recorder
+        self.scorer = get_scorer(exercise)
+        self.segmenter = RepSegmenter(exercise)
+        self.results: List[Dict[str, Any]] = []
+
+    def add_frames(self, timestamps: np.ndarray, keypoints: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Add frames of keypoints (shape (frames, keypoints, 3))
+
+        Returns:
+            Results of the reps completed by these frames
+        """
+        keypoints = np.asarray(keypoints, dtype=np.float32)
+        if self.recorder is not None:
+            self.recorder.add_frames(timestamps, keypoints)
+        angles = joint_angles(keypoints, self.scorer.rules['angles'])
+        completed = [self.scorer.score(rep) for rep in self.segmenter.push(angles)]
+        if self.recorder is not None:
+            for result in completed:
+                self.recorder.add_event(result['label'], result['deviation'])
+        self.results.extend(completed)
+        return completed
+
+    def checkpoint(self):
+        """Persist the recorded frames so far, if recording"""
+        if self.recorder is not None:
+            self.recorder.checkpoint()
+
+    def close(self):
+        """Finish the recording, if any"""
+        if self.recorder is not None:
+            self.recorder.close()
+
+
+def score_recording(replay: SessionReplay) -> pd.DataFrame:
+    """
+    Re-score every rep of a recorded set with the current rules
+
+    Returns:
+        DataFrame with one row per rep: start and end time, label, tip, good and deviation
+    """
+    scorer = get_scorer(replay.exercise)
+    timestamps, keypoints = replay.keypoints()
+    angles = joint_angles(keypoints, scorer.rules['angles'])
+    rows = []
+    for start, stop in segment_reps(angles, replay.exercise):
+        result = scorer.score(angles[start:stop])
+        rows.append({'start': timestamps[start], 'end': timestamps[stop - 1], 'label': result['label'],
+                     'tip': result['tip'], 'good': result['good'], 'deviation': round(result['deviation'], 1)})
+    return pd.DataFrame(rows, columns=['start', 'end', 'label', 'tip', 'good', 'deviation'])
+
+
+if __name__ == '__main__':
+    import time
+
+    rng = np.random.default_rng(0)
+    for exercise in FORM_RULES:
+        scorer = get_scorer(exercise)
+        drawn = rng.integers(len(scorer.templates), size=500)
+        # Noisy reps of random length, as they come out of segment_reps
+        reps = [resample(scorer.templates[i], int(rng.integers(25, 90))) for i in drawn]
+        reps = [rep + rng.normal(0, 4, rep.shape) for rep in reps]
+        started = time.perf_counter()
+        results = [scorer.score(rep) for rep in reps]
+        elapsed = (time.perf_counter() - started) / len(reps)
+        pruned = np.mean([result['pruned'] for result in results])
+        accuracy = np.mean([result['label'] == scorer.labels[i] for result, i in zip(results, drawn)])
+        print(f"{exercise:14s} {len(scorer.templates)} templates  {elapsed * 1000:.3f} ms/rep  "
+              f"{pruned:.1f} pruned on average  {accuracy:.0%} labelled correctly")
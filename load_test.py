@@ -0,0 +1,161 @@
+"""
+Load test for the headless API (api.py)
+
+Opens a number of keep-alive connections against a running instance and fires
+requests as fast as each connection allows, then reports requests/second and
+latency percentiles.
+
+    python api.py --workers 4 &
+    python load_test.py --url http://127.0.0.1:8000 --concurrency 64 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import time
+from typing import List, Dict, Any, Tuple
+from urllib.parse import urlparse
+
+LEVELS = ["Beginner", "Intermediate", "Advanced"]
+GOALS = ["Muscle Building", "Fat Loss", "Strength Training"]
+GENDERS = ["Male", "Female", "Other"]
+
+
+def random_profile(rng: random.Random) -> Dict[str, Any]:
+    """Generate a plausible member profile"""
+    return {
+        'age': rng.randint(16, 80),
+        'gender': rng.choice(GENDERS),
+        'height': rng.randint(150, 200),
+        'weight': round(rng.uniform(45, 130), 1),
+        'fitness_level': rng.choice(LEVELS),
+        'goal': rng.choice(GOALS)
+    }
+
+
+def build_requests(endpoint: str, count: int, distinct: int, batch_size: int, seed: int) -> List[Tuple[str, bytes]]:
+    """
+    Pre-build request paths and bodies so the client loop only does I/O
+
+    Args:
+        endpoint: One of plan, macros, bmi or batch
+        count: Number of request bodies to build (they are reused round-robin)
+        distinct: Number of distinct profiles to draw from (controls cache hit rate)
+        batch_size: Operations per request when endpoint is batch
+        seed: Random seed for reproducible runs
+    """
+    rng = random.Random(seed)
+    profiles = [random_profile(rng) for _ in range(distinct)]
+    built = []
+    for _ in range(count):
+        if endpoint == 'batch':
+            ops = [{'op': rng.choice(['plan', 'macros', 'bmi']), 'payload': rng.choice(profiles)}
+                   for _ in range(batch_size)]
+            built.append(('/v1/batch', json.dumps({'requests': ops}).encode()))
+        else:
+            built.append((f'/v1/{endpoint}', json.dumps(rng.choice(profiles)).encode()))
+    return built
+
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    """Read one HTTP/1.1 response and return its status code"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed by server")
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value.strip())
+    await reader.readexactly(length)
+    return status
+
+
+async def worker(host: str, port: int, requests: List[Tuple[str, bytes]], offset: int,
+                 deadline: float, latencies: List[float], errors: List[int]):
+    reader, writer = await asyncio.open_connection(host, port)
+    # Disable Nagle so small request writes are not held back waiting for ACKs
+    writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    i = offset
+    try:
+        while time.perf_counter() < deadline:
+            path, body = requests[i % len(requests)]
+            i += 1
+            head = (f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n").encode()
+            start = time.perf_counter()
+            writer.write(head + body)
+            status = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run(args) -> Dict[str, float]:
+    url = urlparse(args.url)
+    host, port = url.hostname, url.port or 80
+    requests = build_requests(args.endpoint, 1000, args.distinct, args.batch_size, args.seed)
+
+    # Warm the connection pool and the server caches before measuring
+    warmup_deadline = time.perf_counter() + args.warmup
+    await asyncio.gather(*[worker(host, port, requests, i, warmup_deadline, [], [])
+                           for i in range(min(args.concurrency, 8))])
+
+    latencies: List[float] = []
+    errors: List[int] = []
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*[worker(host, port, requests, i * 37, deadline, latencies, errors)
+                           for i in range(args.concurrency)])
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p90_ms': percentile(latencies, 90) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': (latencies[-1] if latencies else 0.0) * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the AI Fitness Trainer API")
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--endpoint', choices=['plan', 'macros', 'bmi', 'batch'], default='plan')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0, help="Measured seconds")
+    parser.add_argument('--warmup', type=float, default=1.0, help="Unmeasured warm-up seconds")
+    parser.add_argument('--distinct', type=int, default=200, help="Distinct profiles in the request mix")
+    parser.add_argument('--batch-size', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print(f"Endpoint:     /v1/{args.endpoint} (concurrency {args.concurrency}, {args.duration:.0f}s)")
+    print(f"Requests:     {result['requests']} ({result['errors']} errors)")
+    print(f"Throughput:   {result['rps']:.1f} req/s")
+    print(f"Latency p50:  {result['p50_ms']:.2f} ms")
+    print(f"Latency p90:  {result['p90_ms']:.2f} ms")
+    print(f"Latency p99:  {result['p99_ms']:.2f} ms")
+    print(f"Latency max:  {result['max_ms']:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+from typing import Dict, List, Any
+
+# Food sources per macro, split by dietary preference
+PROTEIN_SOURCES = {
+    "Vegetarian": [
+        {"name": "Paneer (100g)", "protein": 18, "fats": 20, "carbs": 2, "calories": 265},
+        {"name": "Lentils (Dal, 100g cooked)", "protein": 9, "fats": 0.4, "carbs": 20, "calories": 116},
+        {"name": "Greek Yogurt (170g)", "protein": 17, "fats": 0.4, "carbs": 6, "calories": 100},
+        {"name": "Tofu (100g)", "protein": 8, "fats": 4.8, "carbs": 2, "calories": 76},
+        {"name": "Chickpeas (Chana, 100g cooked)", "protein": 9, "fats": 2.6, "carbs": 27, "calories": 164}
+    ],
+    "Non-Vegetarian": [
+        {"name": "Chicken Breast (100g)", "protein": 31, "fats": 3.6, "carbs": 0, "calories": 165},
+        {"name": "Eggs (2 large)", "protein": 12, "fats": 10, "carbs": 0.8, "calories": 155},
+        {"name": "Salmon (100g)", "protein": 25, "fats": 13, "carbs": 0, "calories": 208},
+        {"name": "Tuna (100g)", "protein": 30, "fats": 1.3, "carbs": 0, "calories": 132},
+        {"name": "Lean Beef (100g)", "protein": 26, "fats": 15, "carbs": 0, "calories": 250}
+    ]
+}
+FAT_SOURCES = {
+    "Vegetarian": [
+        {"name": "Avocado (100g)", "protein": 2, "fats": 15, "carbs": 9, "calories": 160},
+        {"name": "Almonds (28g)", "protein": 6, "fats": 14, "carbs": 6, "calories": 164},
+        {"name": "Walnuts (28g)", "protein": 4.3, "fats": 18, "carbs": 4, "calories": 185},
+        {"name": "Flaxseeds (28g)", "protein": 5.2, "fats": 12, "carbs": 8, "calories": 150},
+        {"name": "Chia Seeds (28g)", "protein": 4.4, "fats": 9, "carbs": 12, "calories": 138}
+    ],
+    "Non-Vegetarian": [
+        {"name": "Ghee (1 tbsp)", "protein": 0, "fats": 14, "carbs": 0, "calories": 126},
+        {"name": "Butter (1 tbsp)", "protein": 0.1, "fats": 11.5, "carbs": 0, "calories": 102},
+        {"name": "Cheese (28g)", "protein": 7, "fats": 9, "carbs": 1, "calories": 113},
+        {"name": "Cream (2 tbsp)", "protein": 0.6, "fats": 11, "carbs": 0.8, "calories": 103},
+        {"name": "Mayonnaise (1 tbsp)", "protein": 0.1, "fats": 10, "carbs": 0, "calories": 94}
+    ]
+}
+CARB_SOURCES = {
+    "Vegetarian": [
+        {"name": "Brown Rice (1 cup cooked)", "protein": 5, "fats": 2, "carbs": 45, "calories": 216},
+        {"name": "Quinoa (1 cup cooked)", "protein": 8, "fats": 4, "carbs": 39, "calories": 222},
+        {"name": "Oats (1 cup cooked)", "protein": 6, "fats": 4, "carbs": 28, "calories": 158},
+        {"name": "Sweet Potato (1 medium)", "protein": 4, "fats": 0.1, "carbs": 24, "calories": 103},
+        {"name": "Whole Wheat Bread (2 slices)", "protein": 8, "fats": 2, "carbs": 24, "calories": 164}
+    ],
+    "Non-Vegetarian": [
+        {"name": "Brown Rice (1 cup cooked)", "protein": 5, "fats": 2, "carbs": 45, "calories": 216},
+        {"name": "Sweet Potato (1 medium)", "protein": 4, "fats": 0.1, "carbs": 24, "calories": 103},
+        {"name": "Quinoa (1 cup cooked)", "protein": 8, "fats": 4, "carbs": 39, "calories": 222},
+        {"name": "Oats (1 cup cooked)", "protein": 6, "fats": 4, "carbs": 28, "calories": 158},
+        {"name": "Whole Wheat Bread (2 slices)", "protein": 8, "fats": 2, "carbs": 24, "calories": 164}
+    ]
+}
+
+FOOD_SOURCES = {
+    'protein': PROTEIN_SOURCES,
+    'fats': FAT_SOURCES,
+    'carbs': CARB_SOURCES
+}
+
+def get_food_sources(macro: str, dietary_preference: str = "Both") -> Dict[str, List[Dict[str, Any]]]:
+    """Return the food sources for a macro, filtered by dietary preference"""
+    sources = FOOD_SOURCES[macro]
+    if dietary_preference == "Both":
+        return dict(sources)
+    return {dietary_preference: sources[dietary_preference]}
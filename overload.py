@@ -0,0 +1,313 @@
+"""
+Progressive-overload targets from logged sets
+
+Every session's best set is converted to an estimated one-rep max (e1RM).
+A recency-weighted linear trend of e1RM over time is kept per exercise as
+running regression sums, so a new session folds in with O(1) work, and the
+next-session target is derived from the trend and the goal's rep range.
+``batch_targets`` computes the same numbers for a whole roster at once.
+"""
+from datetime import date
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Reps above which Brzycki overestimates; only Epley is used past this point
+BRZYCKI_MAX_REPS = 10
+
+# Rep range prescribed for each workout style of WorkoutRecommender
+STYLE_REP_RANGES = {
+    'hypertrophy': (8, 12),
+    'strength': (3, 6),
+    'circuit': (12, 15)
+}
+DEFAULT_STYLE = 'hypertrophy'
+
+# Weight of each older session relative to the next one in the trend fit
+TREND_DECAY = 0.85
+
+# Sessions needed before the fitted slope is trusted
+MIN_TREND_SESSIONS = 3
+
+# Largest e1RM increase prescribed from one session to the next
+MAX_SESSION_GAIN = 0.025
+
+# Expected days between sessions of the same exercise (weekly split)
+SESSION_GAP_DAYS = 7
+
+# Loads are rounded down to this plate increment (kg)
+LOAD_INCREMENT = 2.5
+
+DEFAULT_SETS = 3
+
+SET_HISTORY_COLUMNS = ['member_id', 'date', 'exercise', 'set_no', 'reps', 'load_kg']
+
+
+def estimate_e1rm(load_kg, reps):
+    """
+    Estimated one-rep max, vectorized
+
+    Averages Epley (w * (1 + r / 30)) and Brzycki (w * 36 / (37 - r)) up to
+    BRZYCKI_MAX_REPS reps and uses Epley alone above that. A single rep is
+    the load itself.
+
+    Args:
+        load_kg: Load lifted (scalar or array)
+        reps: Repetitions performed (scalar or array)
+
+    Returns:
+        e1RM in kg, same shape as the inputs
+    """
+    load_kg = np.asarray(load_kg, dtype=np.float64)
+    reps = np.asarray(reps, dtype=np.float64)
+    epley = load_kg * (1 + reps / 30)
+    brzycki = load_kg * 36 / (37 - np.minimum(reps, BRZYCKI_MAX_REPS))
+    e1rm = np.where(reps <= BRZYCKI_MAX_REPS, (epley + brzycki) / 2, epley)
+    return np.where(reps <= 1, load_kg, e1rm)
+
+
+def load_for_reps(e1rm, reps):
+    """Load that corresponds to e1rm at the given reps (inverse of estimate_e1rm), vectorized"""
+    e1rm = np.asarray(e1rm, dtype=np.float64)
+    return e1rm / estimate_e1rm(1.0, reps)
+
+
+def _fit(sw, swx, swy, swxx, swxy):
+    """Weighted least-squares slope and intercept from running sums, vectorized"""
+    denominator = sw * swxx - swx * swx
+    safe = np.where(np.abs(denominator) > 1e-9, denominator, 1.0)
+    slope = np.where(np.abs(denominator) > 1e-9, (sw * swxy - swx * swy) / safe, 0.0)
+    intercept = (swy - slope * swx) / np.where(sw > 0, sw, 1.0)
+    return slope, intercept
+
+
+def compute_targets(sessions, last_x, last_e1rm, last_load, last_reps, slope, intercept, style: str):
+    """
+    Next-session targets from the fitted trend, vectorized over exercises
+
+    The target e1RM is the trend projected one SESSION_GAP_DAYS ahead,
+    clamped between the last session's e1RM and MAX_SESSION_GAIN above it.
+    Loaded exercises get a load at the middle of the style's rep range,
+    rounded down to LOAD_INCREMENT; body-weight exercises get one more rep.
+
+    Returns:
+        Dictionary of arrays: 'e1rm', 'target_e1rm', 'load_kg', 'reps', 'slope_per_week'
+    """
+    low, high = STYLE_REP_RANGES.get(style, STYLE_REP_RANGES[DEFAULT_STYLE])
+    sessions = np.asarray(sessions)
+    trusted = sessions >= MIN_TREND_SESSIONS
+    projected = intercept + slope * (np.asarray(last_x) + SESSION_GAP_DAYS)
+    ceiling = last_e1rm * (1 + MAX_SESSION_GAIN)
+    # Without enough history, progress at half the maximum rate
+    target_e1rm = np.where(trusted, np.clip(projected, last_e1rm, ceiling), last_e1rm * (1 + MAX_SESSION_GAIN / 2))
+
+    reps = np.full(len(sessions), (low + high) // 2, dtype=np.int64)
+    load = np.floor(load_for_reps(target_e1rm, reps) / LOAD_INCREMENT) * LOAD_INCREMENT
+    bodyweight = np.asarray(last_load) <= 0
+    reps = np.where(bodyweight, np.asarray(last_reps) + 1, reps)
+    load = np.where(bodyweight, 0.0, load)
+    return {
+        'e1rm': np.asarray(last_e1rm, dtype=np.float64),
+        'target_e1rm': np.where(bodyweight, 0.0, target_e1rm),
+        'load_kg': load,
+        'reps': reps,
+        'slope_per_week': np.where(trusted, slope * 7, 0.0)
+    }
+
+
+class OverloadEngine:
+    """
+    Incremental e1RM trends and next-session targets for one member
+
+    Each exercise keeps decayed regression sums over its completed sessions
+    plus the still-open latest session. Sets for the open session can be
+    re-sent as they are edited; a session on a later date folds the open one
+    into the sums. Only back-filled older sessions refold that exercise.
+    """
+
+    def __init__(self, style: str = DEFAULT_STYLE):
+        self.style = style
+        self._sessions: Dict[str, Dict[str, Tuple[float, float, int]]] = {}
+        self._state: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def from_history(cls, sets: pd.DataFrame, style: str = DEFAULT_STYLE) -> 'OverloadEngine':
+        """Engine primed with a set history (columns date, exercise, reps, load_kg)"""
+        engine = cls(style)
+        for (exercise, session_date), group in sets.groupby(['exercise', 'date'], sort=True):
+            engine.update(exercise, session_date, group['reps'].to_numpy(), group['load_kg'].to_numpy())
+        return engine
+
+    def update(self, exercise: str, session_date: str, reps, load_kg):
+        """
+        Record all sets performed for an exercise on a date
+
+        Args:
+            exercise: Exercise name
+            session_date: ISO date of the session
+            reps: Reps of every set that day
+            load_kg: Load of every set that day
+        """
+        sessions = self._sessions.setdefault(exercise, {})
+        reps = np.asarray(reps, dtype=np.float64)
+        load_kg = np.asarray(load_kg, dtype=np.float64)
+        if len(reps) == 0:
+            sessions.pop(session_date, None)
+            self._refold(exercise)
+            return
+        e1rm = estimate_e1rm(load_kg, reps)
+        # Best set: highest e1RM, then most reps (body-weight sets all have e1RM 0), then earliest
+        best = int(np.lexsort((-np.arange(len(reps)), reps, e1rm))[-1])
+        sessions[session_date] = (float(e1rm[best]), float(load_kg[best]), int(reps[best]))
+
+        state = self._state.get(exercise)
+        if state is None or session_date < state['open_date']:
+            self._refold(exercise)
+        elif session_date > state['open_date']:
+            self._fold(state, state['open_date'], sessions[state['open_date']])
+            state['open_date'] = session_date
+
+    def _fold(self, state: Dict[str, Any], session_date: str, session: Tuple[float, float, int]):
+        x = (date.fromisoformat(session_date) - state['origin']).days
+        y = session[0]
+        for key, term in (('sw', 1.0), ('swx', x), ('swy', y), ('swxx', x * x), ('swxy', x * y)):
+            state[key] = state[key] * TREND_DECAY + term
+        state['folded'] += 1
+
+    def _refold(self, exercise: str):
+        sessions = self._sessions[exercise]
+        if not sessions:
+            self._state.pop(exercise, None)
+            self._sessions.pop(exercise)
+            return
+        dates = sorted(sessions)
+        state = {'origin': date.fromisoformat(dates[0]), 'open_date': dates[-1], 'folded': 0,
+                 'sw': 0.0, 'swx': 0.0, 'swy': 0.0, 'swxx': 0.0, 'swxy': 0.0}
+        for session_date in dates[:-1]:
+            self._fold(state, session_date, sessions[session_date])
+        self._state[exercise] = state
+
+    def trend(self, exercise: str) -> Optional[Dict[str, float]]:
+        """Fitted e1RM trend of an exercise, or None if it was never logged"""
+        state = self._state.get(exercise)
+        if state is None:
+            return None
+        e1rm, load, reps = self._sessions[exercise][state['open_date']]
+        x = (date.fromisoformat(state['open_date']) - state['origin']).days
+        slope, intercept = _fit(*(state[key] * TREND_DECAY + term for key, term in
+                                  (('sw', 1.0), ('swx', x), ('swy', e1rm), ('swxx', x * x), ('swxy', x * e1rm))))
+        return {'sessions': state['folded'] + 1, 'last_x': x, 'e1rm': e1rm, 'load_kg': load, 'reps': reps,
+                'slope': float(slope), 'intercept': float(intercept)}
+
+    def targets(self, exercises: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Next-session targets for logged exercises
+
+        Args:
+            exercises: Restrict to these exercises (defaults to all logged)
+
+        Returns:
+            Mapping of exercise -> {'sets', 'reps', 'load_kg', 'e1rm', 'slope_per_week'}
+        """
+        names = [name for name in (exercises or self._state) if name in self._state]
+        if not names:
+            return {}
+        trends = [self.trend(name) for name in names]
+        columns = {key: np.array([t[key] for t in trends]) for key in trends[0]}
+        result = compute_targets(columns['sessions'], columns['last_x'], columns['e1rm'], columns['load_kg'],
+                                 columns['reps'], columns['slope'], columns['intercept'], self.style)
+        return {
+            name: {
+                'sets': DEFAULT_SETS,
+                'reps': int(result['reps'][i]),
+                'load_kg': float(result['load_kg'][i]),
+                'e1rm': round(float(result['e1rm'][i]), 1),
+                'slope_per_week': round(float(result['slope_per_week'][i]), 2)
+            }
+            for i, name in enumerate(names)
+        }
+
+
+def batch_targets(sets: pd.DataFrame, styles: Optional[pd.Series] = None) -> pd.DataFrame:
+    """
+    Next-session targets for every member and exercise in one pass
+
+    Gives the same results as feeding each member's history to an
+    OverloadEngine, but with all steps vectorized over the roster.
+
+    Args:
+        sets: Logged sets with the columns in SET_HISTORY_COLUMNS
+        styles: Workout style per member_id (defaults to DEFAULT_STYLE)
+
+    Returns:
+        DataFrame indexed by (member_id, exercise) with sessions, e1rm,
+        slope_per_week, target load_kg and reps
+    """
+    frame = sets[['member_id', 'exercise', 'date', 'reps', 'load_kg']].copy()
+    frame['e1rm'] = estimate_e1rm(frame['load_kg'].to_numpy(), frame['reps'].to_numpy())
+
+    # Best set per session
+    best = frame.sort_values(['e1rm', 'reps'], ascending=False, kind='stable')
+    best = best.drop_duplicates(['member_id', 'exercise', 'date']).sort_values(['member_id', 'exercise', 'date'])
+    keys = ['member_id', 'exercise']
+    groups = best.groupby(keys, sort=False)
+    dates = pd.to_datetime(best['date'])
+    x = (dates - dates.groupby([best['member_id'], best['exercise']]).transform('min')).dt.days.to_numpy(np.float64)
+    y = best['e1rm'].to_numpy()
+    age = (groups.cumcount(ascending=False)).to_numpy()
+    w = TREND_DECAY ** age
+    best = best.assign(sw=w, swx=w * x, swy=w * y, swxx=w * x * x, swxy=w * x * y, x=x)
+
+    sums = best.groupby(keys, sort=False)[['sw', 'swx', 'swy', 'swxx', 'swxy']].sum()
+    last = best.groupby(keys, sort=False)[['x', 'e1rm', 'load_kg', 'reps']].last()
+    sessions = best.groupby(keys, sort=False).size()
+    slope, intercept = _fit(*(sums[c].to_numpy() for c in ['sw', 'swx', 'swy', 'swxx', 'swxy']))
+
+    member_styles = (styles.reindex(last.index.get_level_values('member_id')).fillna(DEFAULT_STYLE).to_numpy()
+                     if styles is not None else np.full(len(last), DEFAULT_STYLE))
+    result = pd.DataFrame(index=last.index)
+    result['sessions'] = sessions.to_numpy()
+    for style in np.unique(member_styles):
+        mask = member_styles == style
+        targets = compute_targets(sessions.to_numpy()[mask], last['x'].to_numpy()[mask], last['e1rm'].to_numpy()[mask],
+                                  last['load_kg'].to_numpy()[mask], last['reps'].to_numpy()[mask],
+                                  slope[mask], intercept[mask], style)
+        for column in ['e1rm', 'slope_per_week', 'load_kg', 'reps']:
+            result.loc[mask, column] = targets[column]
+    return result.astype({'reps': 'int64'})
+
+
+def apply_targets(workout_plan: Dict[str, Any], targets: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Attach next-session targets to a WorkoutRecommender plan
+
+    Returns a copy of the plan where each day has a 'targets' mapping of
+    exercise -> target for the exercises that have been logged.
+    """
+    return {
+        day: {**workout, 'targets': {ex: targets[ex] for ex in workout['exercises'] if ex in targets}}
+        for day, workout in workout_plan.items()
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    from storage import FitnessStore, DB_PATH
+    from workout_data import WorkoutRecommender
+
+    parser = argparse.ArgumentParser(description="Compute next-session targets for every member")
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--out', help="Write the targets to this CSV file")
+    args = parser.parse_args()
+
+    store = FitnessStore(args.db)
+    started = time.perf_counter()
+    goal_styles = {goal: config['workout_style'] for goal, config in WorkoutRecommender().goal_priorities.items()}
+    history = store.set_history()
+    targets = batch_targets(history, store.member_goals().map(goal_styles))
+    print(f"{len(targets):,} targets from {len(history):,} sets in {time.perf_counter() - started:.2f}s")
+    if args.out:
+        targets.to_csv(args.out)
@@ -0,0 +1,134 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from datetime import date
+
+from storage import get_store, COMPLETION_BUCKETS
+from utils import BMI_CATEGORIES, BMI_COLORS
+
+# --- Page Configuration ---
+st.set_page_config(
+    page_title="Cohort Analytics",
+    page_icon="📈",
+    layout="wide"
+)
+
+CHART_LAYOUT = dict(
+    plot_bgcolor='rgba(0,0,0,0)',
+    paper_bgcolor='rgba(0,0,0,0)',
+    font_color='#F9FAFB',
+    title_font_size=18,
+    margin=dict(l=20, r=20, t=40, b=20),
+    xaxis_gridcolor='rgba(255,255,255,0.1)',
+    yaxis_gridcolor='rgba(255,255,255,0.1)'
+)
+
+# --- Rollup Reads ---
+# Every query below reads a precomputed rollup table, never the raw logs.
+@st.cache_resource
+def expire_streaks_for(day):
+    """Reset stale streaks once per day per server process."""
+    return get_store().expire_streaks(day)
+
+@st.cache_data(ttl=30)
+def load_rollups():
+    store = get_store()
+    return {
+        'totals': store.totals(),
+        'daily': store.daily_activity(),
+        'segments': store.segment_mix(),
+        'bmi': store.bmi_distribution(),
+        'transitions': store.bmi_transitions(),
+        'streaks': store.streak_distribution(),
+        'completion': store.completion_distribution()
+    }
+
+expire_streaks_for(date.today().isoformat())
+rollups = load_rollups()
+totals = rollups['totals']
+
+st.title("📈 Cohort Analytics")
+st.caption("Aggregates across all members, refreshed every 30 seconds from incrementally maintained rollups.")
+
+if not totals.get('members'):
+    st.info("No members yet. Rollups fill in as members generate plans and complete workouts.")
+    st.stop()
+
+# --- Headline Metrics ---
+daily = rollups['daily']
+today = date.today().isoformat()
+today_row = daily[daily['date'] == today]
+last_7 = daily[daily['date'] > (pd.Timestamp(today) - pd.Timedelta(days=7)).date().isoformat()]
+cols = st.columns(4)
+cols[0].metric("Members", f"{totals['members']:,}")
+cols[1].metric("Completion Rate",
+               f"{totals.get('completed_workouts', 0) / max(totals.get('planned_workouts', 0), 1) * 100:.1f}%")
+cols[2].metric("Active Today", f"{int(today_row['active_members'].sum()):,}")
+cols[3].metric("Workouts (7 days)", f"{int(last_7['completions'].sum()):,}")
+
+# --- Daily Activity ---
+if not daily.empty:
+    activity = daily.melt(id_vars='date', value_vars=['completions', 'active_members', 'new_members'],
+                          var_name='metric', value_name='count')
+    fig = px.line(activity, x='date', y='count', color='metric', title='Daily Activity')
+    fig.update_layout(**CHART_LAYOUT)
+    st.plotly_chart(fig, use_container_width=True)
+
+cols = st.columns(2)
+
+# --- Completion Rates ---
+with cols[0]:
+    completion = rollups['completion'].copy()
+    completion['range'] = completion['bucket'].map(
+        lambda b: f"{b * 100 // COMPLETION_BUCKETS}%+" if b == COMPLETION_BUCKETS
+        else f"{b * 100 // COMPLETION_BUCKETS}-{(b + 1) * 100 // COMPLETION_BUCKETS}%"
+    )
+    fig = px.bar(completion, x='range', y='members', title='Completion Rate Distribution',
+                 color_discrete_sequence=['#10B981'])
+    fig.update_layout(**CHART_LAYOUT)
+    st.plotly_chart(fig, use_container_width=True)
+
+# --- Streaks ---
+with cols[1]:
+    streaks = rollups['streaks'].copy()
+    streaks['streak'] = streaks['streak'].clip(upper=30)
+    streaks = streaks.groupby('streak', as_index=False)['members'].sum()
+    streaks['label'] = streaks['streak'].map(lambda s: '30+' if s == 30 else str(s))
+    fig = px.bar(streaks, x='label', y='members', title='Current Streak Distribution (days)',
+                 color_discrete_sequence=['#4F46E5'])
+    fig.update_layout(**CHART_LAYOUT)
+    st.plotly_chart(fig, use_container_width=True)
+
+cols = st.columns(2)
+
+# --- Goal / Level Mix ---
+with cols[0]:
+    segments = rollups['segments']
+    fig = px.bar(segments, x='goal', y='members', color='fitness_level', barmode='group',
+                 title='Goal & Fitness Level Mix',
+                 category_orders={'fitness_level': ['Beginner', 'Intermediate', 'Advanced']})
+    fig.update_layout(**CHART_LAYOUT)
+    st.plotly_chart(fig, use_container_width=True)
+
+# --- BMI Categories ---
+with cols[1]:
+    fig = px.pie(rollups['bmi'], names='bmi_category', values='members', title='Current BMI Categories',
+                 color='bmi_category', color_discrete_map=BMI_COLORS,
+                 category_orders={'bmi_category': BMI_CATEGORIES})
+    fig.update_layout(**CHART_LAYOUT)
+    st.plotly_chart(fig, use_container_width=True)
+
+# --- BMI Category Drift ---
+transitions = rollups['transitions']
+st.subheader("BMI Category Drift")
+if transitions.empty:
+    st.write("No members have changed BMI category yet.")
+else:
+    inbound = transitions.groupby(['date', 'to_category'])['members'].sum()
+    outbound = transitions.groupby(['date', 'from_category'])['members'].sum()
+    inbound.index.names = outbound.index.names = ['date', 'bmi_category']
+    net = inbound.sub(outbound, fill_value=0).rename('net_change').reset_index()
+    fig = px.bar(net, x='date', y='net_change', color='bmi_category', title='Net Members Entering Each Category',
+                 color_discrete_map=BMI_COLORS, category_orders={'bmi_category': BMI_CATEGORIES})
+    fig.update_layout(**CHART_LAYOUT)
+    st.plotly_chart(fig, use_container_width=True)
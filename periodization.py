@@ -0,0 +1,182 @@
+"""
+Periodized multi-week programs
+
+A program stretches a weekly plan over several weeks, in blocks. Within a
+block, volume rises by one working set per exercise each week, and reps
+move from the top to the bottom of the goal's rep range, so the load
+rises as well. Each block starts one set above the previous one, up to
+the level's cap, and its last week is a deload at reduced volume. From
+the second block on, the last exercise of each day is rotated to a
+similar one from the catalog, so accessory work varies between blocks
+while the main lifts stay the same.
+
+Every week is a pure function of its number. ``PeriodizedProgram`` keeps
+only the base plan and the profile, and it builds a week when it is asked
+for: by number through ``week`` or in order through its generator. Long
+programs therefore cost nothing until a week is viewed or the program is
+exported.
+"""
+from typing import Dict, List, Any, Iterator, Optional
+
+from overload import STYLE_REP_RANGES
+from workout_data import WorkoutRecommender
+
+# Default program length
+PROGRAM_WEEKS = 12
+
+# Weeks per block; the last week of every block is a deload
+BLOCK_WEEKS = {'Beginner': 6, 'Intermediate': 4, 'Advanced': 4}
+
+# Working sets per exercise in the first week of the program, and the most any week prescribes
+START_SETS = {'Beginner': 2, 'Intermediate': 3, 'Advanced': 3}
+MAX_SETS = {'Beginner': 4, 'Intermediate': 5, 'Advanced': 6}
+
+# Share of the block's starting sets kept in a deload week (reps go back to the top of the range)
+DELOAD_VOLUME = 0.5
+
+# Similar exercises cycled through in the rotated slot, one per block
+ROTATION_OPTIONS = 3
+
+
+class PeriodizedProgram:
+    """
+    Lazily generated multi-week program built on a weekly plan
+
+    Attributes:
+        base_plan: Weekly plan from ``WorkoutRecommender`` (not copied)
+        weeks: Program length in weeks
+        block_weeks: Weeks per block, deload included
+        workout_style: Workout style of the goal ('hypertrophy', 'strength' or 'circuit')
+        max_difficulty: Hardest difficulty a rotated exercise may have
+    """
+
+    def __init__(self, base_plan: Dict[str, Any], fitness_level: str, goal: str,
+                 weeks: int = PROGRAM_WEEKS,
+                 equipment: Optional[List[str]] = None,
+                 avoid_joints: Optional[List[str]] = None,
+                 max_difficulty: Optional[str] = None):
+        self.base_plan = base_plan
+        self.fitness_level = fitness_level
+        self.weeks = weeks
+        self.block_weeks = BLOCK_WEEKS[fitness_level]
+        self.equipment = equipment
+        self.avoid_joints = avoid_joints
+        self._recommender = WorkoutRecommender()
+        self.workout_style = self._recommender.goal_priorities[goal]['workout_style']
+        # Without an explicit cap (e.g. from the profile's rule cell) the level default applies
+        self.max_difficulty = max_difficulty or self._recommender.fitness_levels[fitness_level]['max_difficulty']
+
+    def __len__(self) -> int:
+        return self.weeks
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Weeks in order, each built only when the consumer reaches it"""
+        return (self.week(number) for number in range(1, self.weeks + 1))
+
+    def _check(self, number: int):
+        if not 1 <= number <= self.weeks:
+            raise ValueError(f"week must be between 1 and {self.weeks}")
+
+    def is_deload(self, number: int) -> bool:
+        """Whether a week (1-based) is the deload week of its block"""
+        self._check(number)
+        return number % self.block_weeks == 0
+
+    def prescription(self, number: int) -> Dict[str, Any]:
+        """
+        Sets and reps per exercise for a week
+
+        On circuit days the sets are circuit rounds.
+
+        Args:
+            number: Week of the program, starting at 1
+
+        Returns:
+            Dictionary with 'block', 'phase' ('Build' or 'Deload'), 'sets' and 'reps'
+        """
+        low, high = STYLE_REP_RANGES[self.workout_style]
+        block, index = divmod(number - 1, self.block_weeks)
+        start = min(START_SETS[self.fitness_level] + block, MAX_SETS[self.fitness_level])
+        if self.is_deload(number):
+            return {'block': block + 1, 'phase': 'Deload', 'sets': max(1, round(start * DELOAD_VOLUME)),
+                    'reps': high}
+        build_weeks = self.block_weeks - 1
+        progress = index / (build_weeks - 1) if build_weeks > 1 else 0.0
+        return {
+            'block': block + 1,
+            'phase': 'Build',
+            'sets': min(start + index, MAX_SETS[self.fitness_level]),
+            'reps': round(high - progress * (high - low))
+        }
+
+    def weekly_sets(self, number: int) -> int:
+        """Total working sets of a week, without building its plan"""
+        exercises = sum(len(workout['exercises']) for workout in self.base_plan.values())
+        return exercises * self.prescription(number)['sets']
+
+    def _rotated(self, day: str, block: int) -> List[str]:
+        exercises = self.base_plan[day]['exercises']
+        if block == 0 or len(exercises) < 2:
+            return list(exercises)
+        options = self._recommender.exercise_alternatives(self.base_plan, day, exercises[-1], self.equipment,
+                                                          self.avoid_joints, limit=ROTATION_OPTIONS,
+                                                          max_difficulty=self.max_difficulty)
+        if not options:
+            return list(exercises)
+        return exercises[:-1] + [options[(block - 1) % len(options)]]
+
+    def week(self, number: int) -> Dict[str, Any]:
+        """
+        Build one week of the program
+
+        Args:
+            number: Week of the program, starting at 1
+
+        Returns:
+            The prescription fields plus 'week' and 'plan', a day -> workout
+            mapping in the base plan's format (each day gains 'sets' and 'reps')
+        """
+        self._check(number)
+        prescription = self.prescription(number)
+        plan = {}
+        for day, workout in self.base_plan.items():
+            if workout['muscle_group'] == 'Rest' or not workout['exercises']:
+                plan[day] = {**workout, 'exercises': list(workout['exercises']), 'sets': 0, 'reps': 0}
+                continue
+            plan[day] = {
+                'muscle_group': workout['muscle_group'],
+                'exercises': self._rotated(day, prescription['block'] - 1),
+                'notes': ('Deload - lighter loads, stop well short of failure' if prescription['phase'] == 'Deload'
+                          else workout['notes']),
+                'sets': prescription['sets'],
+                'reps': prescription['reps']
+            }
+        return {'week': number, **prescription, 'plan': plan}
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        """Flat export rows (one per exercise or rest day), streamed week by week"""
+        for week in self:
+            for day, workout in week['plan'].items():
+                for exercise in workout['exercises'] or ['Rest Day']:
+                    yield {'Week': week['week'], 'Phase': week['phase'], 'Day': day,
+                           'Muscle Group': workout['muscle_group'], 'Exercise': exercise,
+                           'Sets': workout['sets'], 'Reps': workout['reps']}
+
+
+if __name__ == '__main__':
+    import time
+
+    plan = WorkoutRecommender().generate_workout_plan('Intermediate', 'Muscle Building', 22.0, 'Normal')
+    program = PeriodizedProgram(plan, 'Intermediate', 'Muscle Building', weeks=52)
+
+    started = time.perf_counter()
+    program.week(26)
+    single = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    rows = sum(1 for _ in program.rows())
+    export = (time.perf_counter() - started) * 1000
+    print(f"one week: {single:.2f} ms; 52-week export: {rows} rows in {export:.1f} ms")
+    for number in range(1, 13):
+        week = program.prescription(number)
+        print(f"week {number:2d}  block {week['block']}  {week['phase']:6s}  "
+              f"{week['sets']}x{week['reps']}  {program.weekly_sets(number)} sets")
@@ -0,0 +1,187 @@
+"""
+Compact, URL-safe encoding of a workout plan and the profile behind it
+
+A plan is stored as exercise IDs (positions in EXERCISE_CATALOG) rather than
+names. The payload is a format version byte followed by unsigned LEB128
+varints:
+
+    profile:  age, gender, height (cm), weight (0.1 kg), fitness level,
+              goal, equipment bitmask, avoided-joints bitmask
+    per day:  muscle group (0 = Rest), exercise count, exercise IDs
+
+The bytes are raw-deflated and base64url-encoded without padding, so a plan
+fits in a query parameter or QR code. Decoding rebuilds the plan dict
+directly, without running the recommender.
+"""
+import base64
+import zlib
+from typing import Dict, List, Any, Tuple
+
+from workout_data import WorkoutRecommender, EXERCISE_DATABASE
+from exercise_catalog import EXERCISE_INDEX, EQUIPMENT_TYPES, JOINTS
+
+# Bump when the payload layout changes; older codes are then rejected
+FORMAT_VERSION = 1
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+GENDERS = ['Male', 'Female', 'Other']
+FITNESS_LEVELS = list(WorkoutRecommender().fitness_levels)
+GOALS = list(WorkoutRecommender().goal_priorities)
+
+# Profile ranges the sidebar accepts; codes outside them are rejected rather than crashing the form
+PROFILE_RANGES = {'age': (16, 100), 'height': (120, 250), 'weight': (30.0, 300.0)}
+
+# Rest is 0 so that muscle groups added to EXERCISE_DATABASE later keep existing codes valid
+MUSCLE_GROUPS = ['Rest'] + list(EXERCISE_DATABASE)
+
+
+def _write_varint(out: bytearray, value: int):
+    if value < 0:
+        raise ValueError(f"Cannot encode negative value {value}")
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("Truncated plan code")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _mask(values: List[str], choices: List[str]) -> int:
+    return sum(1 << choices.index(value) for value in values if value in choices)
+
+
+def _unmask(mask: int, choices: List[str]) -> List[str]:
+    return [choice for i, choice in enumerate(choices) if mask >> i & 1]
+
+
+def _choice(choices: List[str], index: int) -> str:
+    if index >= len(choices):
+        raise ValueError("Plan code refers to an unknown option")
+    return choices[index]
+
+
+def _check_profile(profile: Dict[str, Any]):
+    """Raise ValueError unless every profile field is one the sidebar could have produced"""
+    for field, (low, high) in PROFILE_RANGES.items():
+        if not low <= profile[field] <= high:
+            raise ValueError(f"{field} must be between {low} and {high}")
+    for field, choices in (('gender', GENDERS), ('fitness_level', FITNESS_LEVELS), ('goal', GOALS)):
+        if profile[field] not in choices:
+            raise ValueError(f"Unknown {field} {profile[field]!r}")
+    for field, choices in (('equipment', EQUIPMENT_TYPES), ('avoid_joints', JOINTS)):
+        unknown = set(profile.get(field, [])) - set(choices)
+        if unknown:
+            raise ValueError(f"Unknown {field} {sorted(unknown)}")
+
+
+def encode_plan(workout_plan: Dict[str, Any], profile: Dict[str, Any]) -> str:
+    """
+    Encode a plan and profile as a short URL-safe string
+
+    Args:
+        workout_plan: Plan as returned by WorkoutRecommender (day -> day plan)
+        profile: User data with age, gender, height, weight, fitness_level,
+            goal and optionally equipment and avoid_joints
+
+    Returns:
+        base64url string without padding
+
+    Raises:
+        ValueError: If the profile is out of range or the plan contains an
+            exercise missing from the catalog
+    """
+    _check_profile(profile)
+    out = bytearray([FORMAT_VERSION])
+    _write_varint(out, int(profile['age']))
+    _write_varint(out, GENDERS.index(profile['gender']))
+    _write_varint(out, int(round(profile['height'])))
+    _write_varint(out, int(round(profile['weight'] * 10)))
+    _write_varint(out, FITNESS_LEVELS.index(profile['fitness_level']))
+    _write_varint(out, GOALS.index(profile['goal']))
+    _write_varint(out, _mask(profile.get('equipment', EQUIPMENT_TYPES), EQUIPMENT_TYPES))
+    _write_varint(out, _mask(profile.get('avoid_joints', []), JOINTS))
+
+    for day in DAYS:
+        day_plan = workout_plan[day]
+        _write_varint(out, MUSCLE_GROUPS.index(day_plan['muscle_group']))
+        _write_varint(out, len(day_plan['exercises']))
+        for exercise in day_plan['exercises']:
+            if exercise not in EXERCISE_INDEX.ids_by_name:
+                raise ValueError(f"{exercise} is not in the exercise catalog")
+            _write_varint(out, EXERCISE_INDEX.ids_by_name[exercise])
+
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+    packed = compressor.compress(bytes(out)) + compressor.flush()
+    return base64.urlsafe_b64encode(packed).decode('ascii').rstrip('=')
+
+
+def decode_plan(code: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Decode a string produced by encode_plan
+
+    Args:
+        code: base64url plan code (padding optional)
+
+    Returns:
+        Tuple of (workout_plan, profile)
+
+    Raises:
+        ValueError: If the code is malformed, from another format version or
+            holds a profile outside PROFILE_RANGES
+    """
+    try:
+        packed = base64.urlsafe_b64decode(code + '=' * (-len(code) % 4))
+        data = zlib.decompress(packed, -15)
+    except (ValueError, zlib.error) as exc:
+        raise ValueError("Not a valid plan code") from exc
+    if not data or data[0] != FORMAT_VERSION:
+        raise ValueError("Plan code is from an unsupported version")
+
+    pos = 1
+    fields = []
+    for _ in range(8):
+        value, pos = _read_varint(data, pos)
+        fields.append(value)
+    age, gender, height, weight, fitness_level, goal, equipment, avoid_joints = fields
+    if equipment >> len(EQUIPMENT_TYPES) or avoid_joints >> len(JOINTS):
+        raise ValueError("Plan code refers to an unknown option")
+    profile = {
+        'age': age,
+        'gender': _choice(GENDERS, gender),
+        'height': height,
+        'weight': weight / 10,
+        'fitness_level': _choice(FITNESS_LEVELS, fitness_level),
+        'goal': _choice(GOALS, goal),
+        'equipment': _unmask(equipment, EQUIPMENT_TYPES),
+        'avoid_joints': _unmask(avoid_joints, JOINTS)
+    }
+    _check_profile(profile)
+
+    workout_plan = {}
+    for day in DAYS:
+        group, pos = _read_varint(data, pos)
+        count, pos = _read_varint(data, pos)
+        exercises = []
+        for _ in range(count):
+            exercise_id, pos = _read_varint(data, pos)
+            exercises.append(_choice(EXERCISE_INDEX.names, exercise_id))
+        muscle_group = _choice(MUSCLE_GROUPS, group)
+        workout_plan[day] = {
+            'muscle_group': muscle_group,
+            'exercises': exercises,
+            'notes': WorkoutRecommender.day_notes(muscle_group, exercises)
+        }
+    if pos != len(data):
+        raise ValueError("Not a valid plan code")
+    return workout_plan, profile
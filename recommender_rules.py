@@ -0,0 +1,326 @@
+"""
+Declarative recommender rules
+
+The rules that used to be hard-coded in ``WorkoutRecommender`` live in
+``recommender_rules.json``. The file holds:
+
+- each fitness level's split, exercises per day and hardest allowed
+  exercise difficulty (``max_difficulty``, optional)
+- each goal's focus groups and workout style
+- the selection strategy of each workout style
+- an ordered list of overrides for specific level / goal / BMI category
+  combinations
+
+At load time the file is validated and compiled into a flat table with one
+entry per (fitness level, goal, BMI category), so generating a plan is one
+index computation plus exercise selection. ``current_rules`` reloads the
+file whenever its modification time changes. Trainers can therefore edit
+the rules without a redeploy. A broken edit is logged and the last valid
+table stays in use.
+"""
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, List, Any, Optional, Tuple
+
+from exercise_catalog import EXERCISE_CATALOG, DIFFICULTY_LEVELS
+from utils import BMI_CATEGORIES
+
+logger = logging.getLogger(__name__)
+
+RULES_PATH = os.environ.get('RECOMMENDER_RULES_PATH',
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recommender_rules.json'))
+
+# Axes of the table; the rule file must cover every combination
+FITNESS_LEVELS = ['Beginner', 'Intermediate', 'Advanced']
+GOALS = ['Muscle Building', 'Fat Loss', 'Strength Training']
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Values a split may use for a day
+SPLIT_GROUPS = set(exercise['muscle_group'] for exercise in EXERCISE_CATALOG) | {'Rest'}
+
+# Fields an override may change
+OVERRIDE_FIELDS = {'split', 'replace_first_rest', 'exercises_per_day', 'workout_style', 'max_difficulty'}
+
+
+def compound_mix(exercises: List[str], count: int, keywords: Tuple[str, ...]) -> List[str]:
+    """Half compound movements (names containing a keyword), then isolation, then the remaining compounds"""
+    compound = [ex for ex in exercises if any(keyword in ex for keyword in keywords)]
+    isolation = [ex for ex in exercises if ex not in compound]
+    selected = compound[:max(1, count // 2)]
+    selected += isolation[:count - len(selected)]
+    for ex in compound[len(selected):]:
+        if len(selected) < count:
+            selected.append(ex)
+    return selected[:count]
+
+
+def preferred_first(exercises: List[str], count: int, keywords: Tuple[str, ...]) -> List[str]:
+    """Exercises whose names contain a keyword first, then the rest in catalog order"""
+    preferred = [ex for ex in exercises if any(keyword in ex for keyword in keywords)]
+    others = [ex for ex in exercises if ex not in preferred]
+    return (preferred + others)[:count]
+
+
+# Selection strategies a workout style can name in the rule file
+SELECTION_STRATEGIES = {
+    'compound_mix': compound_mix,
+    'preferred_first': preferred_first
+}
+
+
+class RuleError(ValueError):
+    """Rule file that does not compile; ``problems`` lists every issue found"""
+
+    def __init__(self, problems: List[str]):
+        super().__init__('; '.join(problems))
+        self.problems = problems
+
+
+class RuleTable:
+    """
+    Compiled recommender rules
+
+    Attributes:
+        version: Short hash of the rule file, for cache keys
+        fitness_levels: Level -> {'exercises_per_day', 'rest_days', 'max_difficulty'}
+        goal_priorities: Goal -> {'primary_focus', 'workout_style'}
+        selection: Workout style -> (strategy function, keywords)
+    """
+
+    def __init__(self, version: str, fitness_levels: Dict[str, Dict[str, int]],
+                 goal_priorities: Dict[str, Dict[str, Any]],
+                 selection: Dict[str, Tuple[Any, Tuple[str, ...]]], cells: List[Dict[str, Any]]):
+        self.version = version
+        self.fitness_levels = fitness_levels
+        self.goal_priorities = goal_priorities
+        self.selection = selection
+        self._cells = cells
+        self._levels = {level: i for i, level in enumerate(FITNESS_LEVELS)}
+        self._goals = {goal: i for i, goal in enumerate(GOALS)}
+        self._categories = {category: i for i, category in enumerate(BMI_CATEGORIES)}
+
+    def lookup(self, fitness_level: str, goal: str, bmi_category: str) -> Dict[str, Any]:
+        """
+        Rule for one profile
+
+        Returns:
+            Dictionary with 'split' (seven muscle groups, Monday first),
+            'exercises_per_day', 'workout_style' and 'max_difficulty' (None
+            when exercises of any difficulty are allowed)
+        """
+        index = ((self._levels[fitness_level] * len(GOALS) + self._goals[goal]) * len(BMI_CATEGORIES)
+                 + self._categories[bmi_category])
+        return self._cells[index]
+
+    def select(self, exercises: List[str], count: int, workout_style: str) -> List[str]:
+        """Pick ``count`` exercises with the workout style's strategy"""
+        strategy, keywords = self.selection[workout_style]
+        return strategy(exercises, count, keywords)
+
+
+def _is_str_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def _check_split(split: Any, where: str, problems: List[str]):
+    if not _is_str_list(split) or len(split) != len(DAYS):
+        problems.append(f"{where}: split must list {len(DAYS)} muscle group names")
+    elif not set(split) <= SPLIT_GROUPS:
+        problems.append(f"{where}: unknown muscle groups {sorted(set(split) - SPLIT_GROUPS)}")
+
+
+def _check_count(value: Any, where: str, problems: List[str]):
+    if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+        problems.append(f"{where} must be a positive integer")
+
+
+def _check_difficulty(value: Any, where: str, problems: List[str]):
+    if value is not None and value not in DIFFICULTY_LEVELS:
+        problems.append(f"{where} must be one of {DIFFICULTY_LEVELS}")
+
+
+def _replace_first_rest(split: List[str], group: str) -> List[str]:
+    # Monday is never converted, so at least one rest day is kept
+    split = list(split)
+    for i, day in enumerate(split):
+        if day == 'Rest' and i > 0:
+            split[i] = group
+            break
+    return split
+
+
+def compile_rules(rules: Dict[str, Any], version: str = '') -> RuleTable:
+    """
+    Validate decoded rules and compile them into a lookup table
+
+    Args:
+        rules: Decoded rule file
+        version: Identifier of this rule set
+
+    Returns:
+        The compiled RuleTable
+
+    Raises:
+        RuleError: If the rules are malformed or leave a combination uncovered
+    """
+    problems = []
+    if not isinstance(rules, dict):
+        raise RuleError(["rules must be a JSON object"])
+    levels = rules.get('levels', {})
+    goals = rules.get('goals', {})
+    selection = rules.get('selection', {})
+    overrides = rules.get('overrides', [])
+    # Structure first: the checks below index into these nodes
+    for section, node in (('levels', levels), ('goals', goals), ('selection', selection)):
+        if not isinstance(node, dict) or not all(isinstance(config, dict) for config in node.values()):
+            problems.append(f"{section} must be an object of objects")
+    if not isinstance(overrides, list) or not all(isinstance(override, dict) for override in overrides):
+        problems.append("overrides must be a list of objects")
+    if problems:
+        raise RuleError(problems)
+
+    for axis, defined, expected in (('levels', levels, FITNESS_LEVELS), ('goals', goals, GOALS)):
+        missing, unknown = set(expected) - set(defined), set(defined) - set(expected)
+        if missing:
+            problems.append(f"{axis}: missing {sorted(missing)}")
+        if unknown:
+            problems.append(f"{axis}: unknown {sorted(unknown)}")
+    for level, config in levels.items():
+        _check_split(config.get('split'), f"levels.{level}", problems)
+        _check_count(config.get('exercises_per_day'), f"levels.{level}.exercises_per_day", problems)
+        rest_days = config.get('rest_days')
+        if not isinstance(rest_days, int) or isinstance(rest_days, bool) or not 0 <= rest_days < len(DAYS):
+            problems.append(f"levels.{level}.rest_days must be between 0 and {len(DAYS) - 1}")
+        _check_difficulty(config.get('max_difficulty'), f"levels.{level}.max_difficulty", problems)
+    for goal, config in goals.items():
+        if not isinstance(config.get('workout_style'), str) or config['workout_style'] not in selection:
+            problems.append(f"goals.{goal}: workout_style must be one of {sorted(selection)}")
+        if not _is_str_list(config.get('primary_focus')):
+            problems.append(f"goals.{goal}: primary_focus must be a list of muscle group names")
+        elif not set(config['primary_focus']) <= SPLIT_GROUPS - {'Rest'}:
+            problems.append(f"goals.{goal}: unknown primary_focus groups")
+    for style, config in selection.items():
+        if not isinstance(config.get('strategy'), str) or config['strategy'] not in SELECTION_STRATEGIES:
+            problems.append(f"selection.{style}: strategy must be one of {sorted(SELECTION_STRATEGIES)}")
+        if not _is_str_list(config.get('keywords')):
+            problems.append(f"selection.{style}: keywords must be a list of strings")
+
+    axes = {'fitness_level': FITNESS_LEVELS, 'goal': GOALS, 'bmi_category': BMI_CATEGORIES}
+    for i, override in enumerate(overrides):
+        where = f"overrides[{i}]"
+        when = override.get('when', {})
+        if not isinstance(when, dict):
+            problems.append(f"{where}.when must be an object")
+            when = {}
+        for field, values in when.items():
+            if field not in axes:
+                problems.append(f"{where}.when: unknown field {field}")
+            elif not _is_str_list(values) or not set(values) <= set(axes[field]):
+                problems.append(f"{where}.when.{field} must be a list of {axes[field]}")
+        changes = set(override) - {'when'}
+        if changes - OVERRIDE_FIELDS:
+            problems.append(f"{where}: unknown fields {sorted(changes - OVERRIDE_FIELDS)}")
+        if 'split' in override:
+            _check_split(override['split'], where, problems)
+        if 'exercises_per_day' in override:
+            _check_count(override['exercises_per_day'], f"{where}.exercises_per_day", problems)
+        if 'max_difficulty' in override:
+            _check_difficulty(override['max_difficulty'], f"{where}.max_difficulty", problems)
+        if 'workout_style' in override and (not isinstance(override['workout_style'], str)
+                                            or override['workout_style'] not in selection):
+            problems.append(f"{where}: workout_style must be one of {sorted(selection)}")
+        if 'replace_first_rest' in override and (not isinstance(override['replace_first_rest'], str)
+                                                 or override['replace_first_rest'] not in SPLIT_GROUPS):
+            problems.append(f"{where}: replace_first_rest must be a muscle group")
+    if problems:
+        raise RuleError(problems)
+
+    # One cell per combination, in the same order as RuleTable.lookup indexes them
+    cells = []
+    for level in FITNESS_LEVELS:
+        for goal in GOALS:
+            for category in BMI_CATEGORIES:
+                profile = {'fitness_level': level, 'goal': goal, 'bmi_category': category}
+                cell = {
+                    'split': levels[level]['split'],
+                    'exercises_per_day': levels[level]['exercises_per_day'],
+                    'workout_style': goals[goal]['workout_style'],
+                    'max_difficulty': levels[level].get('max_difficulty')
+                }
+                for override in overrides:
+                    if all(profile[field] in values for field, values in override.get('when', {}).items()):
+                        cell.update({field: override[field] for field in ('split', 'exercises_per_day',
+                                                                          'workout_style', 'max_difficulty')
+                                     if field in override})
+                        if 'replace_first_rest' in override:
+                            cell['split'] = _replace_first_rest(cell['split'], override['replace_first_rest'])
+                cell['split'] = tuple(cell['split'])
+                cells.append(cell)
+
+    return RuleTable(
+        version,
+        {level: {'exercises_per_day': levels[level]['exercises_per_day'], 'rest_days': levels[level]['rest_days'],
+                 'max_difficulty': levels[level].get('max_difficulty')}
+         for level in FITNESS_LEVELS},
+        {goal: {'primary_focus': list(goals[goal]['primary_focus']), 'workout_style': goals[goal]['workout_style']}
+         for goal in GOALS},
+        {style: (SELECTION_STRATEGIES[config['strategy']], tuple(config['keywords']))
+         for style, config in selection.items()},
+        cells
+    )
+
+
+def load_rules(path: str = RULES_PATH) -> RuleTable:
+    """Read, validate and compile a rule file; its version is a hash of the contents"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return compile_rules(json.loads(raw), hashlib.sha1(raw).hexdigest()[:12])
+
+
+# path -> (modification time, compiled table)
+_loaded: Dict[str, Tuple[int, RuleTable]] = {}
+
+
+def current_rules(path: Optional[str] = None) -> RuleTable:
+    """
+    Compiled rules, reloaded when the file's modification time changes
+
+    A file that no longer compiles is logged and the previous table is kept
+    (until the file changes again). The first load still raises, so a
+    broken file cannot go unnoticed at startup.
+    """
+    path = path or RULES_PATH
+    mtime = os.stat(path).st_mtime_ns
+    loaded = _loaded.get(path)
+    if loaded is not None and loaded[0] == mtime:
+        return loaded[1]
+    try:
+        table = load_rules(path)
+    except Exception as error:
+        # Anything a half-written or hand-edited file can raise; the app keeps serving the last good rules
+        if loaded is None:
+            raise
+        logger.warning("Keeping the previous recommender rules, %s is invalid: %s", path, error)
+        table = loaded[1]
+    _loaded[path] = (mtime, table)
+    return table
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Validate a recommender rule file")
+    parser.add_argument('path', nargs='?', default=RULES_PATH)
+    args = parser.parse_args()
+
+    try:
+        table = load_rules(args.path)
+    except RuleError as error:
+        print('\n'.join(error.problems))
+        sys.exit(1)
+    print(f"{args.path}: {len(FITNESS_LEVELS) * len(GOALS) * len(BMI_CATEGORIES)} combinations covered "
+          f"(version {table.version})")
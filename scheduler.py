@@ -0,0 +1,304 @@
+"""
+Constraint-based training scheduler
+
+Builds multi-week schedules from the days a member can train, the minutes
+they have per session and how many sessions they fit in a day, instead of
+the recommender's fixed 7-day splits. Two searches do the work:
+
+- The split search decides how often each muscle group is trained in a
+  week (0, 1 or 2 times). A week's value depends only on those counts, so
+  they are tried best first, and each is checked by memoized backtracking
+  over the available days. The check enforces MIN_REST_DAYS between
+  sessions of a group, sessions_per_day, and the fitness level's rest days.
+  The first count that can be placed is optimal. Pruning skips counts that
+  exceed the week's capacity, and states already shown infeasible are
+  skipped too. The objective is the same every week, so a cycle repeats its
+  best week, and that week must also wrap from Sunday back to Monday.
+- Exercise packing fills each session with the goal's preferred exercises
+  that fit the time budget. It is a small knapsack with a count cap, solved
+  by memoized backtracking and cached per group and budget.
+"""
+import math
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, List, Any, Optional, Tuple
+
+from exercise_catalog import EXERCISE_CATALOG
+from recommender_rules import current_rules
+from workout_data import WorkoutRecommender, EXERCISE_DATABASE, CIRCUIT_INTERVALS
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MUSCLE_GROUPS = list(EXERCISE_DATABASE)
+
+# Days from one session of a group to the next; at most 2, as only the previous day is tracked
+MIN_REST_DAYS = {'Chest': 2, 'Back': 2, 'Legs': 2, 'Shoulders': 2, 'Arms': 2, 'Core': 1, 'Cardio': 1}
+
+# A group is trained at most this often per week
+MAX_WEEKLY_SESSIONS = 2
+
+# Value of a session by the group's rank in the goal's primary focus; other groups get OTHER_GROUP_VALUE
+FOCUS_VALUES = [20, 18, 16, 14, 12]
+OTHER_GROUP_VALUE = 6
+
+# A group's second session of the week is worth this fraction of the first
+REPEAT_VALUE = 0.5
+
+# Sets, seconds of work per set and rest between sets (compound, isolation) per workout style
+SET_TIMING = {
+    'hypertrophy': {'sets': 4, 'work': 45, 'rest': (120, 75)},
+    'strength': {'sets': 5, 'work': 30, 'rest': (180, 120)}
+}
+
+# Setting up the next exercise, and warming up at the start of a session
+CHANGEOVER_SECONDS = 60
+WARMUP_MINUTES = 8
+
+# Reads the live rule table on every call; the caches below are keyed on its version
+_recommender = WorkoutRecommender()
+_exercises = {exercise['name']: exercise for exercise in EXERCISE_CATALOG}
+
+
+def exercise_minutes(exercise: str, workout_style: str, fitness_level: str) -> int:
+    """
+    Minutes an exercise takes in a session, rounded up
+
+    Compound movements (three or more muscles worked) get the longer rest.
+    Circuit exercises take their rounds of work and rest from CIRCUIT_INTERVALS.
+    """
+    if workout_style == 'circuit':
+        config = CIRCUIT_INTERVALS[fitness_level]
+        seconds = config['rounds'] * (config['work'] + config['rest'])
+    else:
+        timing = SET_TIMING[workout_style]
+        entry = _exercises[exercise]
+        compound = len(entry['primary_muscles']) + len(entry['secondary_muscles']) >= 3
+        rest = timing['rest'][0] if compound else timing['rest'][1]
+        seconds = timing['sets'] * (timing['work'] + rest) + CHANGEOVER_SECONDS
+    return math.ceil(seconds / 60)
+
+
+@lru_cache(maxsize=1024)
+def pack_session(muscle_group: str, minutes: int, fitness_level: str, goal: str,
+                 equipment: Optional[Tuple[str, ...]] = None,
+                 avoid_joints: Optional[Tuple[str, ...]] = None,
+                 rules_version: str = '') -> Tuple[Tuple[str, ...], int]:
+    """
+    Best set of exercises for one session of a group within a time budget
+
+    Exercises are ranked by the recommender's preference for the goal's
+    workout style; an exercise of rank r among n is worth n - r. At most the
+    fitness level's exercises_per_day are chosen. rules_version only keys
+    the cache, so an edited rule file retires the packed sessions.
+
+    Returns:
+        (exercises in rank order, minutes they take including the warm-up);
+        no exercises if not even one fits
+    """
+    style = _recommender.goal_priorities[goal]['workout_style']
+    available = EXERCISE_DATABASE[muscle_group]
+    ranked = _recommender._select_exercises(muscle_group, len(available), style,
+                                            list(equipment) if equipment is not None else None,
+                                            list(avoid_joints) if avoid_joints else None,
+                                            _recommender.fitness_levels[fitness_level]['max_difficulty'])
+    costs = [exercise_minutes(exercise, style, fitness_level) for exercise in ranked]
+    values = [len(ranked) - rank for rank in range(len(ranked))]
+    cap = _recommender.fitness_levels[fitness_level]['exercises_per_day']
+
+    @lru_cache(maxsize=None)
+    def best(i: int, left: int, slots: int) -> Tuple[int, Tuple[int, ...]]:
+        if i == len(ranked) or slots == 0:
+            return 0, ()
+        skip = best(i + 1, left, slots)
+        if costs[i] > left:
+            return skip
+        value, chosen = best(i + 1, left - costs[i], slots - 1)
+        take = (value + values[i], (i,) + chosen)
+        return take if take[0] >= skip[0] else skip
+
+    _, chosen = best(0, minutes - WARMUP_MINUTES, cap)
+    if not chosen:
+        return (), 0
+    return tuple(ranked[i] for i in chosen), WARMUP_MINUTES + sum(costs[i] for i in chosen)
+
+
+def _max_apart(weekdays: Tuple[int, ...]) -> int:
+    """Most days that can be picked from weekdays without two consecutive ones (Sunday-Monday included)"""
+    for size in range(len(weekdays), 0, -1):
+        for picked in combinations(weekdays, size):
+            days = set(picked)
+            if not any((day + 1) % 7 in days for day in days):
+                return size
+    return 0
+
+
+def _best_counts(values: List[float], limits: List[int], capacity: int, feasible) -> Tuple[int, ...]:
+    """
+    Most valuable weekly session count per group that feasible() accepts
+
+    Depth-first over the groups (most valuable first, most sessions first),
+    pruned by an optimistic bound: the best increments still available
+    within the remaining session capacity. limits caps each group's count.
+    """
+    increments = [[value * (REPEAT_VALUE if count else 1.0) for count in range(limit)]
+                  for value, limit in zip(values, limits)]
+    # Sorted increments of groups g.. for the bound
+    suffix = [sorted((inc for row in increments[g:] for inc in row), reverse=True) for g in range(len(values) + 1)]
+    best = [0.0, (0,) * len(values)]
+    # Infeasible counts; anything with at least as many sessions of every group is infeasible too
+    infeasible = []
+
+    def search(g: int, counts: Tuple[int, ...], value: float, used: int):
+        if value + sum(suffix[g][:capacity - used]) <= best[0]:
+            return
+        if g == len(values):
+            if any(all(c >= f for c, f in zip(counts, failed)) for failed in infeasible):
+                return
+            if feasible(counts):
+                best[0], best[1] = value, counts
+            else:
+                infeasible.append(counts)
+            return
+        for count in range(min(limits[g], capacity - used), -1, -1):
+            search(g + 1, counts + (count,), value + sum(increments[g][:count]), used + count)
+
+    search(0, (), 0.0, 0)
+    return best[1]
+
+
+def _place(counts: Tuple[int, ...], weekdays: Tuple[int, ...], sessions_per_day: int, max_days: int,
+           spaced: Tuple[bool, ...]) -> Optional[List[Tuple[int, ...]]]:
+    """
+    Place weekly session counts on the available days
+
+    Returns:
+        Groups trained on each available day, or None if the counts cannot
+        be placed without breaking a constraint
+    """
+    wraps = weekdays[0] == 0 and weekdays[-1] == 6
+    failed = set()
+
+    def search(i: int, remaining: Tuple[int, ...], blocked: int, days_used: int,
+               first: int) -> Optional[List[Tuple[int, ...]]]:
+        total = sum(remaining)
+        if total == 0:
+            return [()] * (len(weekdays) - i)
+        days_left = len(weekdays) - i
+        # Pruning: not enough session slots left, or a group needing more days than remain
+        if total > sessions_per_day * min(days_left, max_days - days_used) or max(remaining) > days_left:
+            return None
+        state = (i, remaining, blocked, days_used, first)
+        if state in failed:
+            return None
+        if wraps and i == len(weekdays) - 1:
+            blocked |= first
+        consecutive = i + 1 < len(weekdays) and weekdays[i + 1] == weekdays[i] + 1
+        # Groups with the most sessions left go first, then by focus order (the count order)
+        open_groups = sorted((g for g, left in enumerate(remaining) if left and not blocked >> g & 1),
+                             key=lambda g: -remaining[g])
+        for size in range(min(sessions_per_day, len(open_groups)), -1, -1):
+            if size and days_used == max_days:
+                continue
+            for combo in combinations(open_groups, size):
+                mask = sum(1 << g for g in combo if spaced[g])
+                left = tuple(count - (g in combo) for g, count in enumerate(remaining))
+                rest = search(i + 1, left, mask if consecutive else 0, days_used + (1 if combo else 0),
+                              mask if i == 0 else first)
+                if rest is not None:
+                    return [tuple(sorted(combo))] + rest
+        failed.add(state)
+        return None
+
+    return search(0, counts, 0, 0, 0)
+
+
+@lru_cache(maxsize=256)
+def _best_week(weekdays: Tuple[int, ...], minutes: int, sessions_per_day: int, fitness_level: str, goal: str,
+               equipment: Optional[Tuple[str, ...]], avoid_joints: Optional[Tuple[str, ...]],
+               rules_version: str = '') -> Dict[str, Any]:
+    """Best weekly plan for the given constraints (see plan_schedule); rules_version keys the cache"""
+    focus = _recommender.goal_priorities[goal]['primary_focus']
+    max_days = 7 - _recommender.fitness_levels[fitness_level]['rest_days']
+
+    # Groups with at least one exercise that fits the budget, in focus order first
+    packed = {group: pack_session(group, minutes, fitness_level, goal, equipment, avoid_joints, rules_version)
+              for group in MUSCLE_GROUPS}
+    groups = tuple(sorted((group for group in MUSCLE_GROUPS if packed[group][0]),
+                          key=lambda group: focus.index(group) if group in focus else len(focus)))
+    spaced = tuple(MIN_REST_DAYS[group] > 1 for group in groups)
+    capacity = sessions_per_day * min(len(weekdays), max_days)
+
+    placement = [()] * len(weekdays)
+    if weekdays and groups:
+        # A spaced group fits on at most every other available day
+        apart = _max_apart(weekdays)
+        limits = [min(MAX_WEEKLY_SESSIONS, apart if space else len(weekdays)) for space in spaced]
+        counts = _best_counts([FOCUS_VALUES[focus.index(group)] if group in focus else OTHER_GROUP_VALUE
+                               for group in groups], limits, capacity,
+                              lambda counts: _place(counts, weekdays, sessions_per_day, max_days, spaced) is not None)
+        placement = _place(counts, weekdays, sessions_per_day, max_days, spaced)
+
+    week = {day: {'muscle_group': 'Rest', 'exercises': [], 'notes': WorkoutRecommender.day_notes('Rest', []),
+                  'minutes': 0, 'sessions': []} for day in DAYS}
+    for weekday, combo in zip(weekdays, placement):
+        if not combo:
+            continue
+        sessions = [{'muscle_group': group, 'exercises': list(packed[group][0]), 'minutes': packed[group][1]}
+                    for group in sorted((groups[g] for g in combo), key=MUSCLE_GROUPS.index)]
+        week[DAYS[weekday]] = {
+            'muscle_group': ' + '.join(session['muscle_group'] for session in sessions),
+            'exercises': [exercise for session in sessions for exercise in session['exercises']],
+            'notes': '; '.join(f"{WorkoutRecommender.day_notes(session['muscle_group'], session['exercises'])} "
+                               f"({session['minutes']} min)" for session in sessions),
+            'minutes': sum(session['minutes'] for session in sessions),
+            'sessions': sessions
+        }
+    return week
+
+
+def plan_schedule(available_days: List[str], minutes_per_session: int, sessions_per_day: int,
+                  fitness_level: str, goal: str, weeks: int = 1,
+                  equipment: Optional[List[str]] = None,
+                  avoid_joints: Optional[List[str]] = None) -> List[Dict[str, Dict[str, Any]]]:
+    """
+    Search for the best schedule over one or more weeks
+
+    Args:
+        available_days: Weekdays the member can train
+        minutes_per_session: Time budget of each session, warm-up included
+        sessions_per_day: Sessions that fit in one day (each for a different group)
+        fitness_level: Beginner, Intermediate or Advanced
+        goal: Muscle Building, Fat Loss or Strength Training
+        weeks: Length of the cycle
+        equipment: Available equipment (None means a full gym)
+        avoid_joints: Joints to keep load off
+
+    Returns:
+        One plan per week: day -> {'muscle_group', 'exercises', 'notes',
+        'minutes', 'sessions'}. 'sessions' lists each session's
+        muscle_group, exercises and minutes, and the day-level fields
+        combine them ('Rest' for days without a session)
+    """
+    weekdays = tuple(sorted({DAYS.index(day) for day in available_days}))
+    week = _best_week(weekdays, minutes_per_session, sessions_per_day, fitness_level, goal,
+                      tuple(equipment) if equipment is not None else None,
+                      tuple(sorted(avoid_joints)) if avoid_joints else None, current_rules().version)
+    return [{day: {**plan, 'exercises': list(plan['exercises']), 'sessions': [dict(session) for session in plan['sessions']]}
+             for day, plan in week.items()} for _ in range(weeks)]
+
+
+if __name__ == '__main__':
+    import time
+    from itertools import product
+
+    # Cold solves (caches cleared) over every day pattern of 2-6 days x budget x sessions per day
+    patterns = [list(days) for size in range(2, 7) for days in combinations(DAYS, size)]
+    timings = []
+    for days, minutes, per_day in product(patterns[::4], (30, 45, 60, 90), (1, 2)):
+        _best_week.cache_clear()
+        pack_session.cache_clear()
+        started = time.perf_counter()
+        plan_schedule(days, minutes, per_day, 'Intermediate', 'Muscle Building', weeks=4)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    print(f"{len(timings)} schedules: median {timings[len(timings) // 2]:.2f} ms, "
+          f"p99 {timings[int(len(timings) * 0.99)]:.2f} ms, max {timings[-1]:.2f} ms")
@@ -0,0 +1,335 @@
+"""
+On-disk recordings of pose keypoints for exercise sets
+
+A recording is a directory holding fixed-size chunks of per-frame data as
+``.npy`` files plus a small JSON index:
+
+    index.json              exercise, keypoint names, chunk list, event kinds
+    keypoints_00000.npy     float32 (CHUNK_FRAMES, len(KEYPOINTS), 3): x, y, score
+    timestamps_00000.npy    float64 (CHUNK_FRAMES,): seconds since the set started
+    events.npy              frame, kind code and value of each form event
+
+Chunks are preallocated with ``np.lib.format.open_memmap`` and filled in
+place, and the index is rewritten atomically whenever a chunk fills up or
+the writer calls ``checkpoint``, so an interrupted recording stays readable
+up to its last checkpoint. Replays memory-map the chunks and hand out
+whole-chunk array views, so re-scoring with new rules or comparing sessions
+never re-runs pose inference.
+"""
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Dict, List, Any, Callable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from storage import DB_PATH
+
+RECORDINGS_DIR = os.environ.get('FITNESS_RECORDINGS_DIR', os.path.join(os.path.dirname(DB_PATH), 'recordings'))
+
+# Bump when the on-disk layout changes
+FORMAT_VERSION = 1
+
+# COCO-17 keypoints, the order used by common single-person pose models
+KEYPOINTS = [
+    'nose', 'left_eye', 'right_eye', 'left_ear', 'right_ear',
+    'left_shoulder', 'right_shoulder', 'left_elbow', 'right_elbow', 'left_wrist', 'right_wrist',
+    'left_hip', 'right_hip', 'left_knee', 'right_knee', 'left_ankle', 'right_ankle'
+]
+KEYPOINT_INDEX = {name: i for i, name in enumerate(KEYPOINTS)}
+
+# Frames per chunk file; about 2 minutes at 30 fps and 850 KB on disk
+CHUNK_FRAMES = 4096
+
+EVENT_DTYPE = np.dtype([('frame', '<i8'), ('kind', '<i2'), ('value', '<f4')])
+
+
+def _write_json(path: str, payload: Dict[str, Any]):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+
+class SessionRecorder:
+    """
+    Appends keypoint frames and form events for one set to a new recording
+
+    Attributes:
+        path: Directory of the recording
+        frames: Number of frames recorded so far
+    """
+
+    def __init__(self, member_id: str, exercise: str, root: str = RECORDINGS_DIR,
+                 chunk_frames: int = CHUNK_FRAMES):
+        started = datetime.now()
+        recording_id = f"{started:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+        self.path = os.path.join(root, member_id, recording_id)
+        os.makedirs(self.path)
+        self.chunk_frames = chunk_frames
+        self.frames = 0
+        self._index = {
+            'version': FORMAT_VERSION,
+            'recording_id': recording_id,
+            'member_id': member_id,
+            'exercise': exercise,
+            'started_at': started.isoformat(timespec='seconds'),
+            'keypoints': KEYPOINTS,
+            'chunk_frames': chunk_frames,
+            'chunks': [],
+            'event_kinds': [],
+            'complete': False
+        }
+        self._events: List[Tuple[int, int, float]] = []
+        self._keypoints: Optional[np.ndarray] = None
+        self._timestamps: Optional[np.ndarray] = None
+        self._filled = 0
+        self._closed = False
+        _write_json(os.path.join(self.path, 'index.json'), self._index)
+
+    def _open_chunk(self):
+        number = len(self._index['chunks'])
+        self._keypoints = np.lib.format.open_memmap(
+            os.path.join(self.path, f'keypoints_{number:05d}.npy'), mode='w+', dtype=np.float32,
+            shape=(self.chunk_frames, len(KEYPOINTS), 3))
+        self._timestamps = np.lib.format.open_memmap(
+            os.path.join(self.path, f'timestamps_{number:05d}.npy'), mode='w+', dtype=np.float64,
+            shape=(self.chunk_frames,))
+        self._index['chunks'].append({'number': number, 'frames': 0, 'start_frame': self.frames})
+        self._filled = 0
+
+    def _write_index(self):
+        """Flush the open chunk (if any), record its frame count and rewrite the index and events"""
+        if self._keypoints is not None:
+            self._keypoints.flush()
+            self._timestamps.flush()
+            chunk = self._index['chunks'][-1]
+            chunk['frames'] = self._filled
+            chunk['t0'] = float(self._timestamps[0]) if self._filled else None
+            chunk['t1'] = float(self._timestamps[self._filled - 1]) if self._filled else None
+        self._save_events()
+        _write_json(os.path.join(self.path, 'index.json'), self._index)
+
+    def _seal_chunk(self):
+        """Flush the open chunk and record its frame count in the index"""
+        self._write_index()
+        self._keypoints = self._timestamps = None
+
+    def _save_events(self):
+        np.save(os.path.join(self.path, 'events.npy'), np.array(self._events, dtype=EVENT_DTYPE))
+
+    def add_frames(self, timestamps: np.ndarray, keypoints: np.ndarray):
+        """
+        Append a batch of frames
+
+        Args:
+            timestamps: Seconds since the set started, shape (n,)
+            keypoints: Array of shape (n, len(KEYPOINTS), 3) holding x, y and
+                confidence per keypoint (normalized image coordinates)
+        """
+        if self._closed:
+            raise ValueError("Recording is closed")
+        timestamps = np.asarray(timestamps, dtype=np.float64).reshape(-1)
+        keypoints = np.asarray(keypoints, dtype=np.float32).reshape(len(timestamps), len(KEYPOINTS), 3)
+        written = 0
+        while written < len(timestamps):
+            if self._keypoints is None:
+                self._open_chunk()
+            take = min(self.chunk_frames - self._filled, len(timestamps) - written)
+            self._keypoints[self._filled:self._filled + take] = keypoints[written:written + take]
+            self._timestamps[self._filled:self._filled + take] = timestamps[written:written + take]
+            self._filled += take
+            self.frames += take
+            written += take
+            if self._filled == self.chunk_frames:
+                self._seal_chunk()
+
+    def add_frame(self, timestamp: float, keypoints: np.ndarray):
+        """Append one frame (keypoints of shape (len(KEYPOINTS), 3))"""
+        self.add_frames(np.array([timestamp]), np.asarray(keypoints)[np.newaxis])
+
+    def add_event(self, kind: str, value: float = 0.0, frame: Optional[int] = None):
+        """
+        Record a form event (e.g. 'rep_end' with the rep's score)
+
+        Args:
+            kind: Event name; new names are added to the index as they appear
+            value: Numeric payload of the event
+            frame: Frame the event refers to (default: the latest frame, or 0 before any frame)
+        """
+        kinds = self._index['event_kinds']
+        if kind not in kinds:
+            kinds.append(kind)
+        self._events.append((max(self.frames - 1, 0) if frame is None else frame, kinds.index(kind), value))
+
+    def checkpoint(self):
+        """Make the frames of the partly filled chunk readable, for sets that are never closed"""
+        if not self._closed and self._keypoints is not None:
+            self._write_index()
+
+    def close(self) -> str:
+        """
+        Seal the last chunk and mark the recording complete
+
+        Returns:
+            Path of the recording directory
+        """
+        if not self._closed:
+            self._closed = True
+            self._index['complete'] = True
+            self._seal_chunk()
+        return self.path
+
+    def __enter__(self) -> 'SessionRecorder':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SessionReplay:
+    """
+    Read-only, memory-mapped view of a recording
+
+    Attributes:
+        index: Parsed index.json
+        frames: Number of readable frames
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, 'index.json')) as f:
+            self.index = json.load(f)
+        if self.index['version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported recording version {self.index['version']}")
+        # Chunks get a frame count when sealed or checkpointed; still-empty ones are skipped
+        self._chunks = [chunk for chunk in self.index['chunks'] if chunk['frames']]
+        self.frames = sum(chunk['frames'] for chunk in self._chunks)
+
+    @property
+    def exercise(self) -> str:
+        return self.index['exercise']
+
+    @property
+    def duration(self) -> float:
+        """Seconds between the first and last frame"""
+        if not self._chunks:
+            return 0.0
+        return self._chunks[-1]['t1'] - self._chunks[0]['t0']
+
+    def chunks(self) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+        """
+        Iterate over (start_frame, timestamps, keypoints) per chunk
+
+        The arrays are read-only memory-mapped views; nothing is copied until
+        the caller computes on them.
+        """
+        for chunk in self._chunks:
+            count = chunk['frames']
+            keypoints = np.load(os.path.join(self.path, f"keypoints_{chunk['number']:05d}.npy"), mmap_mode='r')
+            timestamps = np.load(os.path.join(self.path, f"timestamps_{chunk['number']:05d}.npy"), mmap_mode='r')
+            yield chunk['start_frame'], timestamps[:count], keypoints[:count]
+
+    def scan(self, func: Callable[[np.ndarray, np.ndarray], np.ndarray]) -> np.ndarray:
+        """
+        Apply a vectorized per-frame function to the whole recording
+
+        Args:
+            func: Called once per chunk with (timestamps, keypoints) and
+                returning one value (or row) per frame
+
+        Returns:
+            The per-chunk results concatenated in frame order
+        """
+        results = [func(timestamps, keypoints) for _, timestamps, keypoints in self.chunks()]
+        return np.concatenate(results) if results else np.empty(0)
+
+    def keypoints(self, start: int = 0, stop: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Timestamps and keypoints for frames [start, stop) copied into memory"""
+        stop = self.frames if stop is None else min(stop, self.frames)
+        timestamps, keypoints = [], []
+        for first, chunk_times, chunk_points in self.chunks():
+            lo, hi = max(start - first, 0), min(stop - first, len(chunk_times))
+            if lo < hi:
+                timestamps.append(chunk_times[lo:hi])
+                keypoints.append(chunk_points[lo:hi])
+        if not timestamps:
+            return np.empty(0), np.empty((0, len(KEYPOINTS), 3), dtype=np.float32)
+        return np.concatenate(timestamps), np.concatenate(keypoints)
+
+    def events(self) -> pd.DataFrame:
+        """Form events with their frame, timestamp, kind name and value"""
+        path = os.path.join(self.path, 'events.npy')
+        events = np.load(path) if os.path.exists(path) else np.empty(0, dtype=EVENT_DTYPE)
+        events = events[events['frame'] < self.frames]
+        timestamps = self.scan(lambda times, _: times)
+        kinds = np.array(self.index['event_kinds'] or [''], dtype=object)
+        return pd.DataFrame({
+            'frame': events['frame'],
+            't': timestamps[events['frame']] if len(events) else np.empty(0),
+            'kind': kinds[events['kind']] if len(events) else np.empty(0, dtype=object),
+            'value': events['value']
+        })
+
+
+def list_recordings(member_id: str, root: str = RECORDINGS_DIR) -> pd.DataFrame:
+    """
+    Recordings of a member, newest first, read from their indexes only
+
+    Returns:
+        DataFrame indexed by recording_id with exercise, started_at, frames,
+        duration, complete and path columns
+    """
+    member_dir = os.path.join(root, member_id)
+    rows = []
+    if os.path.isdir(member_dir):
+        for recording_id in sorted(os.listdir(member_dir), reverse=True):
+            path = os.path.join(member_dir, recording_id)
+            try:
+                replay = SessionReplay(path)
+            except (OSError, ValueError, KeyError):
+                continue
+            rows.append({'recording_id': recording_id, 'exercise': replay.exercise,
+                         'started_at': replay.index['started_at'], 'frames': replay.frames,
+                         'duration': replay.duration, 'complete': replay.index['complete'], 'path': path})
+    columns = ['recording_id', 'exercise', 'started_at', 'frames', 'duration', 'complete', 'path']
+    return pd.DataFrame(rows, columns=columns).set_index('recording_id')
+
+
+if __name__ == '__main__':
+    import argparse
+    import tempfile
+    import time
+
+    parser = argparse.ArgumentParser(description="Benchmark recording and replaying keypoint sessions")
+    parser.add_argument('--frames', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as root:
+        batch = 30 * 60
+        started = time.perf_counter()
+        with SessionRecorder('benchmark', 'Squats', root=root) as recorder:
+            for first in range(0, args.frames, batch):
+                count = min(batch, args.frames - first)
+                recorder.add_frames(np.arange(first, first + count) / 30,
+                                    rng.random((count, len(KEYPOINTS), 3), dtype=np.float32))
+                recorder.add_event('rep_end', 1.0)
+        written = time.perf_counter() - started
+
+        replay = SessionReplay(recorder.path)
+        hip, knee, ankle = (KEYPOINT_INDEX[name] for name in ('left_hip', 'left_knee', 'left_ankle'))
+
+        def knee_angle(_, keypoints):
+            upper = keypoints[:, hip, :2] - keypoints[:, knee, :2]
+            lower = keypoints[:, ankle, :2] - keypoints[:, knee, :2]
+            return np.arctan2(upper[:, 1], upper[:, 0]) - np.arctan2(lower[:, 1], lower[:, 0])
+
+        started = time.perf_counter()
+        angles = replay.scan(knee_angle)
+        scanned = time.perf_counter() - started
+        print(f"Recorded {recorder.frames:,} frames at {recorder.frames / written:,.0f} frames/s")
+        print(f"Replayed {len(angles):,} frames at {len(angles) / scanned:,.0f} frames/s "
+              f"({len(replay.events())} events)")
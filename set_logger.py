@@ -0,0 +1,218 @@
+"""
+Batched persistence for logged sets
+
+Widget edits in the set logger call ``SetLogWriter.submit``, which only
+records the change in memory. A background thread waits until edits have
+been quiet for ``DEBOUNCE_SECONDS`` (or ``MAX_DELAY_SECONDS`` have passed
+since the first pending edit), then writes the latest value of every
+changed set in one transaction. Repeated edits to the same set coalesce
+into a single write. A failed write is logged and its sets go back into
+the queue, to be retried after a growing back-off.
+"""
+import atexit
+import logging
+import threading
+import time
+from typing import Dict, List, Any, Optional, Tuple
+
+import pandas as pd
+
+from storage import FitnessStore, get_store
+
+logger = logging.getLogger(__name__)
+
+# Quiet period after the last edit before pending changes are written
+DEBOUNCE_SECONDS = 1.5
+
+# Upper bound on how long an edit may stay unwritten while edits keep coming
+MAX_DELAY_SECONDS = 10.0
+
+# Wait before retrying a failed write; doubles with every further failure, up to MAX_RETRY_SECONDS
+RETRY_SECONDS = 2.0
+MAX_RETRY_SECONDS = 60.0
+
+# How long close() waits for pending sets to be written before giving up on them
+CLOSE_TIMEOUT_SECONDS = 5.0
+
+# Sets shown per exercise before anything is logged
+DEFAULT_SETS = 3
+
+SET_COLUMNS = ['exercise', 'set', 'reps', 'load_kg']
+
+SetKey = Tuple[str, str, str, str, int]
+
+
+class SetLogWriter:
+    """Debounced, coalescing background writer for FitnessStore.save_sets"""
+
+    def __init__(self, store: FitnessStore, debounce_seconds: float = DEBOUNCE_SECONDS,
+                 max_delay_seconds: float = MAX_DELAY_SECONDS):
+        self.store = store
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.submitted = 0
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self._pending: Dict[SetKey, Tuple[Optional[int], Optional[float]]] = {}
+        self._first_change = 0.0
+        self._last_change = 0.0
+        self._retry_at = float('-inf')
+        self._failed_in_row = 0
+        self._writing = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='set-log-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, member_id: str, workout_date: str, day: str,
+               changes: Dict[Tuple[str, int], Tuple[Optional[int], Optional[float]]]):
+        """
+        Queue changed sets for writing; returns immediately
+
+        Args:
+            member_id: Member who logged the sets
+            workout_date: ISO date of the session
+            day: Plan day the sets belong to
+            changes: Mapping of (exercise, set_no) -> (reps, load_kg), with
+                reps None for a removed set
+        """
+        if not changes:
+            return
+        with self._cond:
+            now = time.monotonic()
+            if not self._pending:
+                self._first_change = now
+            self._last_change = now
+            for (exercise, set_no), value in changes.items():
+                self._pending[(member_id, workout_date, day, exercise, set_no)] = value
+            self.submitted += len(changes)
+            self._cond.notify()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write pending changes now and wait for them to land
+
+        A write that is backing off after a failure is retried immediately.
+
+        Returns:
+            True if nothing is left pending
+        """
+        with self._cond:
+            self._first_change = self._last_change = self._retry_at = float('-inf')
+            self._cond.notify()
+            return self._cond.wait_for(lambda: not self._pending and not self._writing, timeout)
+
+    def close(self, timeout: float = CLOSE_TIMEOUT_SECONDS) -> bool:
+        """
+        Flush and stop the background thread, waiting at most ``timeout`` seconds
+
+        Returns:
+            True if every submitted set was written
+        """
+        deadline = time.monotonic() + timeout
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(max(deadline - time.monotonic(), 0.0))
+        return flushed
+
+    def _due_in(self) -> float:
+        now = time.monotonic()
+        due = min(self._last_change + self.debounce_seconds, self._first_change + self.max_delay_seconds)
+        return max(due, self._retry_at) - now
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and (not self._pending or self._due_in() > 0):
+                    self._cond.wait(self._due_in() if self._pending else None)
+                if self._closed and not self._pending:
+                    return
+                batch, self._pending = self._pending, {}
+                self._writing = True
+            try:
+                self.store.save_sets([(*key, *value) for key, value in batch.items()])
+                failed = False
+            except Exception:
+                logger.exception("Writing %d logged sets failed", len(batch))
+                failed = True
+            with self._cond:
+                self._writing = False
+                if not failed:
+                    self.written += len(batch)
+                    self.batches += 1
+                    self._failed_in_row = 0
+                    self._retry_at = float('-inf')
+                elif self._closed:
+                    logger.error("Dropping %d logged sets that could not be written before shutdown", len(batch))
+                else:
+                    # Edits submitted while the batch was being written are newer and win
+                    self._pending = {**batch, **self._pending}
+                    self.failures += 1
+                    self._retry_at = time.monotonic() + min(RETRY_SECONDS * 2 ** self._failed_in_row,
+                                                            MAX_RETRY_SECONDS)
+                    self._failed_in_row += 1
+                self._cond.notify_all()
+
+
+def sets_frame(exercises: List[str], logged: Dict[Tuple[str, int], Tuple[int, float]],
+               default_sets: int = DEFAULT_SETS) -> pd.DataFrame:
+    """
+    Editor rows for one plan day: logged sets, or empty default sets per exercise
+
+    Args:
+        exercises: Exercises of the plan day, in plan order
+        logged: Mapping of (exercise, set_no) -> (reps, load_kg) already logged
+        default_sets: Rows offered for exercises with nothing logged
+
+    Returns:
+        DataFrame with the columns in SET_COLUMNS
+    """
+    rows = []
+    for exercise in exercises:
+        set_nos = sorted(set_no for name, set_no in logged if name == exercise) or range(1, default_sets + 1)
+        for set_no in set_nos:
+            reps, load = logged.get((exercise, set_no), (None, None))
+            rows.append((exercise, set_no, reps, load))
+    frame = pd.DataFrame(rows, columns=SET_COLUMNS)
+    return frame.astype({'set': 'int64', 'reps': 'Int64', 'load_kg': 'float64'})
+
+
+def logged_sets(frame: pd.DataFrame) -> Dict[Tuple[str, int], Tuple[int, float]]:
+    """
+    Completed sets in an editor frame, renumbered per exercise in row order
+
+    Rows without reps are treated as not performed.
+    """
+    frame = frame.dropna(subset=['exercise'])
+    frame = frame[frame['reps'].notna() & (frame['reps'] > 0)]
+    set_nos = frame.groupby('exercise').cumcount() + 1
+    loads = frame['load_kg'].fillna(0.0)
+    return {
+        (exercise, int(set_no)): (int(reps), float(load))
+        for exercise, set_no, reps, load in zip(frame['exercise'], set_nos, frame['reps'], loads)
+    }
+
+
+def diff_sets(before: Dict[Tuple[str, int], Any], after: Dict[Tuple[str, int], Any]
+              ) -> Dict[Tuple[str, int], Tuple[Optional[int], Optional[float]]]:
+    """Changed and removed entries between two logged_sets mappings (removed sets map to (None, None))"""
+    changes = {key: value for key, value in after.items() if before.get(key) != value}
+    changes.update({key: (None, None) for key in before if key not in after})
+    return changes
+
+
+_default_writer: Optional[SetLogWriter] = None
+_default_writer_lock = threading.Lock()
+
+
+def get_set_writer() -> SetLogWriter:
+    """Process-wide writer for the default store, flushed at interpreter exit"""
+    global _default_writer
+    with _default_writer_lock:
+        if _default_writer is None:
+            _default_writer = SetLogWriter(get_store())
+            atexit.register(_default_writer.close)
+        return _default_writer
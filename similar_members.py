@@ -0,0 +1,395 @@
+"""
+"Members like you": nearest successful members by profile
+
+The recommender only uses a member's fitness level, goal and BMI
+category. This module looks at what worked for members whose age, gender,
+height and weight are closest, among those with the same goal who complete
+at least SUCCESS_COMPLETION of their plan. The plans those members follow
+(their fitness level and BMI category) are suggested as alternatives.
+
+Profiles are points in a small feature space: fixed scales turn years,
+centimetres and kilograms into comparable units, and gender is one-hot.
+Because the scales are fixed, a point never has to be renormalized, and the
+index can be updated one member at a time. Each goal has its own KD-tree:
+
+- It is bulk-built by median splits.
+- Inserts descend to a leaf and split it once it passes LEAF_SIZE.
+- Removals (a member whose completion drops, or whose profile changes)
+  delete the point from its leaf in place. The freed slot is reused by
+  the next insert, so the point storage does not grow with updates.
+
+A member whose profile is unchanged keeps their point; an update then only
+refreshes their plan and completion.
+
+A query visits the near side of every split first and skips a subtree once
+its splitting plane is farther away than the current k-th neighbour.
+"""
+import heapq
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Members completing at least this share of their plan count as successful
+SUCCESS_COMPLETION = 0.8
+
+# Workouts logged before a member's completion is trusted
+MIN_COMPLETED = 5
+
+# Units that count as one step of profile distance
+FEATURE_SCALES = {'age': 10.0, 'height': 10.0, 'weight': 10.0}
+GENDERS = ['Male', 'Female', 'Other']
+
+# Points per leaf before it is split
+LEAF_SIZE = 32
+
+# Successful neighbours considered for a recommendation
+NEIGHBOURS = 25
+
+
+def profile_features(age, gender, height, weight) -> np.ndarray:
+    """
+    Scaled feature vectors for one profile or arrays of profiles
+
+    Returns:
+        Array of shape (..., 3 + len(GENDERS))
+    """
+    numeric = np.stack([np.asarray(age, dtype=np.float64) / FEATURE_SCALES['age'],
+                        np.asarray(height, dtype=np.float64) / FEATURE_SCALES['height'],
+                        np.asarray(weight, dtype=np.float64) / FEATURE_SCALES['weight']], axis=-1)
+    one_hot = (np.asarray(gender)[..., None] == np.array(GENDERS)).astype(np.float64)
+    return np.concatenate([numeric, one_hot], axis=-1)
+
+
+class KDTree:
+    """
+    KD-tree with bucketed leaves that supports inserts and removals
+
+    Nodes live in parallel lists: a split dimension and value with child
+    ids for internal nodes (dimension -1 marks a leaf), and an array of
+    point slots for leaves. Slots of removed points go on a free list.
+    """
+
+    def __init__(self, dims: int, leaf_size: int = LEAF_SIZE):
+        self.dims = dims
+        self.leaf_size = leaf_size
+        self.points = np.empty((64, dims))
+        self.size = 0
+        self._dim: List[int] = [-1]
+        self._value: List[float] = [0.0]
+        self._left: List[int] = [-1]
+        self._right: List[int] = [-1]
+        self._leaf: List[np.ndarray] = [np.empty(0, dtype=np.int64)]
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self._leaf if items is not None)
+
+    def _reserve(self, count: int):
+        if self.size + count > len(self.points):
+            grown = np.empty((max(2 * len(self.points), self.size + count), self.dims))
+            grown[:self.size] = self.points[:self.size]
+            self.points = grown
+
+    def _split(self, node: int, items: np.ndarray):
+        """Turn a leaf into a subtree over ``items`` (median splits on the widest dimension)"""
+        stack = [(node, items)]
+        while stack:
+            node, items = stack.pop()
+            if len(items) > self.leaf_size:
+                block = self.points[items]
+                dim = int(np.argmax(block.max(axis=0) - block.min(axis=0)))
+                value = float(np.partition(block[:, dim], len(items) // 2)[len(items) // 2])
+                left = block[:, dim] < value
+                # All points on one side (duplicates): keep an oversized leaf
+                if left.any() and not left.all():
+                    self._dim[node], self._value[node], self._leaf[node] = dim, value, None
+                    self._left[node], self._right[node] = len(self._dim), len(self._dim) + 1
+                    for _ in range(2):
+                        self._dim.append(-1)
+                        self._value.append(0.0)
+                        self._left.append(-1)
+                        self._right.append(-1)
+                        self._leaf.append(None)
+                    stack.append((self._left[node], items[left]))
+                    stack.append((self._right[node], items[~left]))
+                    continue
+            self._leaf[node] = items
+
+    def build(self, points: np.ndarray) -> np.ndarray:
+        """
+        Replace the tree's contents with a batch of points
+
+        Returns:
+            Slot of each point (used to remove it later)
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, self.dims)
+        self.__init__(self.dims, self.leaf_size)
+        self._reserve(len(points))
+        self.points[:len(points)] = points
+        self.size = len(points)
+        slots = np.arange(len(points))
+        self._split(0, slots)
+        return slots
+
+    def _find_leaf(self, point: np.ndarray) -> int:
+        node = 0
+        while self._dim[node] >= 0:
+            node = self._left[node] if point[self._dim[node]] < self._value[node] else self._right[node]
+        return node
+
+    def insert(self, point: np.ndarray) -> int:
+        """Add one point; returns its slot (a freed one if any)"""
+        if self._free:
+            slot = self._free.pop()
+        else:
+            self._reserve(1)
+            slot = self.size
+            self.size += 1
+        self.points[slot] = point
+        node = self._find_leaf(self.points[slot])
+        items = np.append(self._leaf[node], slot)
+        if len(items) > self.leaf_size:
+            self._split(node, items)
+        else:
+            self._leaf[node] = items
+        return slot
+
+    def remove(self, slot: int):
+        """Remove the point in a slot; the slot is handed out again by a later insert"""
+        node = self._find_leaf(self.points[slot])
+        self._leaf[node] = self._leaf[node][self._leaf[node] != slot]
+        self._free.append(slot)
+
+    def query(self, point: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        k nearest points to ``point``
+
+        Returns:
+            (slots, distances), nearest first
+        """
+        point = np.asarray(point, dtype=np.float64)
+        coords = point.tolist()
+        best: List[Tuple[float, int]] = []  # max-heap of (-squared distance, slot)
+        stack = [(0, 0.0)]
+        while stack:
+            node, plane = stack.pop()
+            if len(best) == k and plane >= -best[0][0]:
+                continue
+            dim = self._dim[node]
+            if dim < 0:
+                items = self._leaf[node]
+                if not len(items):
+                    continue
+                diff = self.points[items] - point
+                dist = np.einsum('ij,ij->i', diff, diff)
+                if len(best) == k:
+                    closer = dist < -best[0][0]
+                    items, dist = items[closer], dist[closer]
+                for d, slot in zip(dist.tolist(), items.tolist()):
+                    if len(best) < k:
+                        heapq.heappush(best, (-d, slot))
+                    elif d < -best[0][0]:
+                        heapq.heapreplace(best, (-d, slot))
+                continue
+            delta = coords[dim] - self._value[node]
+            near, far = (self._left[node], self._right[node]) if delta < 0 else (self._right[node], self._left[node])
+            # Far side first on the stack, so the near side is searched first
+            stack.append((far, max(plane, delta * delta)))
+            stack.append((near, plane))
+        best.sort(reverse=True)
+        return (np.array([slot for _, slot in best], dtype=np.int64),
+                np.sqrt(np.array([-d for d, _ in best])))
+
+
+class PeerIndex:
+    """
+    Successful members indexed by profile, one KD-tree per goal
+
+    Updates and queries take a lock, so one process-wide index can be shared
+    by every app session.
+
+    Attributes:
+        members: member_id -> (goal, slot, fitness_level, bmi_category, completion)
+    """
+
+    def __init__(self):
+        self.members: Dict[str, Tuple[str, int, str, str, float]] = {}
+        self._trees: Dict[str, KDTree] = {}
+        self._slots: Dict[str, List[Optional[str]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    @staticmethod
+    def completion(completed, total_workouts):
+        """Completion rate as in the Progress tab, capped at 1"""
+        return np.minimum(np.asarray(completed) / np.maximum(np.asarray(total_workouts), 1), 1.0)
+
+    @classmethod
+    def from_members(cls, members: pd.DataFrame) -> 'PeerIndex':
+        """
+        Bulk-build the index from a members frame
+
+        Args:
+            members: Columns member_id, age, gender, height, weight, fitness_level,
+                goal, bmi_category, completed and total_workouts
+        """
+        index = cls()
+        completion = cls.completion(members['completed'], members['total_workouts'])
+        successful = members[(completion >= SUCCESS_COMPLETION) & (members['completed'] >= MIN_COMPLETED)
+                             & members['age'].notna() & members['height'].notna() & members['weight'].notna()]
+        completion = cls.completion(successful['completed'], successful['total_workouts'])
+        features = profile_features(successful['age'], successful['gender'], successful['height'],
+                                    successful['weight'])
+        for goal in successful['goal'].unique():
+            rows = np.flatnonzero((successful['goal'] == goal).to_numpy())
+            tree = KDTree(features.shape[1])
+            slots = tree.build(features[rows])
+            index._trees[goal] = tree
+            ids = successful['member_id'].to_numpy()[rows]
+            index._slots[goal] = list(ids)
+            levels = successful['fitness_level'].to_numpy()[rows]
+            categories = successful['bmi_category'].to_numpy()[rows]
+            index.members.update(zip(ids, zip([goal] * len(rows), slots.tolist(), levels, categories,
+                                              completion[rows].tolist())))
+        return index
+
+    def discard(self, member_id: str):
+        """Drop a member from the index if present"""
+        with self._lock:
+            self._discard(member_id)
+
+    def _discard(self, member_id: str):
+        entry = self.members.pop(member_id, None)
+        if entry is not None:
+            self._trees[entry[0]].remove(entry[1])
+            self._slots[entry[0]][entry[1]] = None
+
+    def update(self, member_id: str, profile: Dict[str, Any], bmi_category: str,
+               completed: int, total_workouts: int):
+        """
+        Re-index one member after a profile change or a logged workout
+
+        The member is (re)inserted while they count as successful and removed
+        otherwise; an unchanged goal and profile keep their point in place.
+        """
+        completion = float(self.completion(completed, total_workouts))
+        point = profile_features(profile['age'], profile['gender'], profile['height'], profile['weight'])
+        goal = profile['goal']
+        with self._lock:
+            if completion < SUCCESS_COMPLETION or completed < MIN_COMPLETED:
+                self._discard(member_id)
+                return
+            entry = self.members.get(member_id)
+            if entry is not None and entry[0] == goal and np.array_equal(self._trees[goal].points[entry[1]], point):
+                self.members[member_id] = (goal, entry[1], profile['fitness_level'], bmi_category, completion)
+                return
+            self._discard(member_id)
+            tree = self._trees.setdefault(goal, KDTree(len(point)))
+            slot = tree.insert(point)
+            slots = self._slots.setdefault(goal, [])
+            if slot == len(slots):
+                slots.append(member_id)
+            else:
+                slots[slot] = member_id
+            self.members[member_id] = (goal, slot, profile['fitness_level'], bmi_category, completion)
+
+    def nearest(self, profile: Dict[str, Any], k: int = NEIGHBOURS,
+                exclude: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Closest successful members with the same goal
+
+        Returns:
+            Nearest first: member_id, fitness_level, bmi_category, completion and distance
+        """
+        tree = self._trees.get(profile['goal'])
+        if tree is None:
+            return []
+        point = profile_features(profile['age'], profile['gender'], profile['height'], profile['weight'])
+        peers = []
+        with self._lock:
+            slots, distances = tree.query(point, k + (exclude is not None))
+            for slot, distance in zip(slots.tolist(), distances.tolist()):
+                member_id = self._slots[profile['goal']][slot]
+                if member_id == exclude or len(peers) == k:
+                    continue
+                _, _, fitness_level, bmi_category, completion = self.members[member_id]
+                peers.append({'member_id': member_id, 'fitness_level': fitness_level, 'bmi_category': bmi_category,
+                              'completion': completion, 'distance': distance})
+        return peers
+
+    def recommend(self, profile: Dict[str, Any], k: int = NEIGHBOURS,
+                  exclude: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Plans followed by the closest successful members, most followed first
+
+        Returns:
+            One entry per (fitness_level, bmi_category) plan with the number
+            of neighbours following it, their mean completion and mean distance
+        """
+        plans: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for peer in self.nearest(profile, k, exclude):
+            plans.setdefault((peer['fitness_level'], peer['bmi_category']), []).append(peer)
+        ranked = [{'fitness_level': level, 'bmi_category': category, 'members': len(peers),
+                   'completion': sum(peer['completion'] for peer in peers) / len(peers),
+                   'distance': sum(peer['distance'] for peer in peers) / len(peers)}
+                  for (level, category), peers in plans.items()]
+        return sorted(ranked, key=lambda plan: (-plan['members'], -plan['completion']))
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Benchmark the members-like-you index on a synthetic population")
+    parser.add_argument('--members', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    n = args.members
+    # Profiles only; synthetic_population would also generate workout logs nobody needs here
+    members = pd.DataFrame({
+        'member_id': np.char.add('member-', np.arange(n).astype(str)),
+        'age': rng.integers(16, 80, n),
+        'gender': rng.choice(GENDERS, n),
+        'height': rng.normal(170, 10, n).clip(120, 250).round(),
+        'weight': rng.normal(75, 15, n).clip(30, 300).round(1),
+        'fitness_level': rng.choice(['Beginner', 'Intermediate', 'Advanced'], n),
+        'goal': rng.choice(['Muscle Building', 'Fat Loss', 'Strength Training'], n),
+        'bmi_category': rng.choice(['Underweight', 'Normal', 'Overweight', 'Obese'], n),
+        'completed': rng.integers(0, 40, n),
+        'total_workouts': rng.integers(20, 37, n)
+    })
+
+    started = time.perf_counter()
+    index = PeerIndex.from_members(members)
+    built = time.perf_counter() - started
+    print(f"built {len(index)} successful of {n} members in {built:.1f} s")
+
+    queries = members.sample(args.queries, random_state=0).to_dict('records')
+    timings = []
+    for profile in queries:
+        started = time.perf_counter()
+        index.recommend(profile)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    print(f"recommend: median {timings[len(timings) // 2]:.3f} ms, p99 {timings[int(len(timings) * 0.99)]:.3f} ms")
+
+    goal = queries[0]['goal']
+    timings = []
+    for profile in queries:
+        point = profile_features(profile['age'], profile['gender'], profile['height'], profile['weight'])
+        started = time.perf_counter()
+        index._trees[goal].query(point, NEIGHBOURS)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    print(f"k-NN query: median {timings[len(timings) // 2]:.3f} ms, p99 {timings[int(len(timings) * 0.99)]:.3f} ms")
+
+    started = time.perf_counter()
+    for i, profile in enumerate(queries):
+        index.update(f"new-{i}", profile, profile['bmi_category'], 30, 30)
+    print(f"insert: {(time.perf_counter() - started) / len(queries) * 1000:.3f} ms per member")
@@ -0,0 +1,264 @@
+"""
+Offline strategy replay
+
+Replays a member population against alternative recommender strategies and
+compares predicted adherence, training volume and retention, before any
+change to the recommendation logic ships.
+
+Each member's history gives a weekday habit: their chance of training on
+each weekday, estimated from their logged workouts and shrunk towards the
+population average (HABIT_PRIOR_WEEKS). A strategy maps a profile (fitness
+level, goal, BMI category) to a weekly plan. The replay then walks the
+plan for SIM_WEEKS:
+
+- A member attends a planned session with their habit probability for
+  that weekday.
+- That probability is scaled down when the plan asks for more sessions a
+  week than the member habitually trains (OVERLOAD_ELASTICITY).
+- A member drops out after DROPOUT_MISSES planned sessions missed in a row.
+
+Strategies are compiled once into a (profile x weekday) table of exercise
+counts, so the replay is a few array operations per simulated day over a
+whole chunk of members. Chunks fan out over a process pool. Each chunk draws
+from its own ``SeedSequence`` child, so results do not depend on the number
+of workers, and every strategy sees the same draws, so their differences
+are not sampling noise.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import Callable, Dict, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from overload import DEFAULT_SETS
+from recommender_rules import FITNESS_LEVELS, GOALS, DAYS
+from utils import BMI_CATEGORIES
+from workout_data import WorkoutRecommender
+
+# Replay length
+SIM_WEEKS = 12
+
+# Pseudo-weeks of the population's weekday rates added to every member's own history
+HABIT_PRIOR_WEEKS = 4.0
+
+# Attendance scales by (habitual sessions / planned sessions) ** OVERLOAD_ELASTICITY when a plan asks for more
+OVERLOAD_ELASTICITY = 0.5
+
+# Consecutive missed planned sessions (about two weeks) after which a member counts as dropped out
+DROPOUT_MISSES = 10
+
+# Members per pool task; chunk boundaries (not the worker count) fix the random streams
+CHUNK_SIZE = 20_000
+
+METRICS = ['sessions', 'adherence', 'weekly_sets', 'retained']
+
+Strategy = Callable[[str, str, str], Dict[str, Any]]
+
+
+def rules_strategy(rules_path: Optional[str] = None) -> Strategy:
+    """Strategy that plans with WorkoutRecommender and a rule file (None means the live rules)"""
+    recommender = WorkoutRecommender(rules_path)
+    return lambda fitness_level, goal, bmi_category: recommender.generate_workout_plan(
+        fitness_level, goal, 0.0, bmi_category)
+
+
+def compile_strategy(strategy: Strategy) -> np.ndarray:
+    """
+    Exercise counts of every profile's weekly plan
+
+    Returns:
+        Array of shape (profiles, 7), profiles ordered as ``profile_codes`` numbers them
+    """
+    table = np.zeros((len(FITNESS_LEVELS) * len(GOALS) * len(BMI_CATEGORIES), len(DAYS)), dtype=np.int64)
+    for i, (level, goal, category) in enumerate(product(FITNESS_LEVELS, GOALS, BMI_CATEGORIES)):
+        plan = strategy(level, goal, category)
+        table[i] = [len(plan[day]['exercises']) if plan[day]['muscle_group'] != 'Rest' else 0 for day in DAYS]
+    return table
+
+
+def profile_codes(members: pd.DataFrame) -> np.ndarray:
+    """Row of each member's profile in a compiled strategy table"""
+    level = pd.Categorical(members['fitness_level'], categories=FITNESS_LEVELS).codes
+    goal = pd.Categorical(members['goal'], categories=GOALS).codes
+    category = pd.Categorical(members['bmi_category'], categories=BMI_CATEGORIES).codes
+    if (level < 0).any() or (goal < 0).any() or (category < 0).any():
+        raise ValueError("members have fitness levels, goals or BMI categories outside the rule table")
+    return (level.astype(np.int64) * len(GOALS) + goal) * len(BMI_CATEGORIES) + category
+
+
+def weekday_habits(member_ids: pd.Index, workouts: pd.DataFrame) -> np.ndarray:
+    """
+    Each member's chance of training on each weekday (Monday first)
+
+    A member's history runs from their first logged workout to the last
+    date in the log. Members without history get the population rates.
+
+    Returns:
+        Array of shape (members, 7)
+    """
+    member = member_ids.get_indexer(workouts['member_id'])
+    dates = pd.to_datetime(workouts['date']).to_numpy().astype('datetime64[D]')
+    keep = member >= 0
+    member, dates = member[keep], dates[keep]
+    weekday = (dates.view('int64') - 4) % 7  # 1970-01-01 was a Thursday
+
+    trained = np.zeros((len(member_ids), len(DAYS)))
+    np.add.at(trained, (member, weekday), 1)
+
+    # Occurrences of each weekday between the member's first workout and the end of the log
+    end = dates.max() if len(dates) else np.datetime64('today')
+    first = np.full(len(member_ids), end)
+    np.minimum.at(first, member, dates)
+    span = (end - first).astype(np.int64) + 1
+    first_weekday = (first.view('int64') - 4) % 7
+    offset = (np.arange(len(DAYS))[None, :] - first_weekday[:, None]) % 7
+    seen = span[:, None] // 7 + (offset < (span % 7)[:, None])
+    seen[np.bincount(member, minlength=len(member_ids)) == 0] = 0
+
+    population = trained.sum(axis=0) / np.maximum(seen.sum(axis=0), 1)
+    return (trained + HABIT_PRIOR_WEEKS * population) / (seen + HABIT_PRIOR_WEEKS)
+
+
+def _replay_chunk(habits: np.ndarray, profiles: np.ndarray, tables: np.ndarray, weeks: int,
+                  seed: np.random.SeedSequence) -> np.ndarray:
+    """Replay one chunk of members under every strategy; returns (strategies, members, METRICS)"""
+    rng = np.random.default_rng(seed)
+    # Common random numbers: every strategy is judged on the same attendance draws
+    draws = rng.random((weeks * len(DAYS), len(profiles)))
+    habitual = habits.sum(axis=1)
+    results = np.empty((len(tables), len(profiles), len(METRICS)))
+    for s, table in enumerate(tables):
+        exercises = table[profiles]
+        planned = exercises > 0
+        per_week = planned.sum(axis=1)
+        overload = np.where(per_week > habitual, (habitual / np.maximum(per_week, 1)) ** OVERLOAD_ELASTICITY, 1.0)
+        attend = habits * overload[:, None]
+
+        sessions = np.zeros(len(profiles))
+        volume = np.zeros(len(profiles))
+        misses = np.zeros(len(profiles), dtype=np.int64)
+        active = np.ones(len(profiles), dtype=bool)
+        for t in range(weeks * len(DAYS)):
+            day = t % len(DAYS)  # the replay starts on a Monday
+            due = planned[:, day] & active
+            done = due & (draws[t] < attend[:, day])
+            sessions += done
+            volume += done * exercises[:, day]
+            misses = np.where(done, 0, misses + due)
+            active &= misses < DROPOUT_MISSES
+
+        results[s, :, 0] = sessions
+        results[s, :, 1] = sessions / np.maximum(per_week * weeks, 1)
+        results[s, :, 2] = volume * DEFAULT_SETS / weeks
+        results[s, :, 3] = active
+    return results
+
+
+def simulate(members: pd.DataFrame, workouts: pd.DataFrame, strategies: Dict[str, Strategy],
+             weeks: int = SIM_WEEKS, seed: int = 0, workers: int = 1,
+             chunk_size: int = CHUNK_SIZE) -> pd.DataFrame:
+    """
+    Replay a population under several strategies
+
+    Args:
+        members: One row per member with member_id, fitness_level, goal and bmi_category
+        workouts: Workout log with member_id and date
+        strategies: Name -> function (fitness_level, goal, bmi_category) -> weekly plan
+        weeks: Replay length
+        seed: Root seed; the same seed and chunk_size give the same results for any worker count
+        workers: Processes to fan the chunks out over (1 replays in this process)
+        chunk_size: Members per task
+
+    Returns:
+        Per-member metrics indexed by member_id, with (strategy, metric) columns
+    """
+    member_ids = pd.Index(members['member_id'])
+    habits = weekday_habits(member_ids, workouts)
+    profiles = profile_codes(members)
+    tables = np.stack([compile_strategy(strategy) for strategy in strategies.values()])
+
+    bounds = list(range(0, len(member_ids), chunk_size))
+    seeds = np.random.SeedSequence(seed).spawn(len(bounds))
+    tasks = [(habits[start:start + chunk_size], profiles[start:start + chunk_size], tables, weeks, chunk_seed)
+             for start, chunk_seed in zip(bounds, seeds)]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_replay_chunk, *zip(*tasks)))
+    else:
+        chunks = [_replay_chunk(*task) for task in tasks]
+
+    results = np.concatenate(chunks, axis=1) if chunks else np.empty((len(strategies), 0, len(METRICS)))
+    columns = pd.MultiIndex.from_product([list(strategies), METRICS], names=['strategy', 'metric'])
+    return pd.DataFrame(results.transpose(1, 0, 2).reshape(len(member_ids), -1), index=member_ids,
+                        columns=columns)
+
+
+def summarize(results: pd.DataFrame, segments: Optional[pd.Series] = None) -> pd.DataFrame:
+    """
+    Average metrics per strategy (and per segment, e.g. goal)
+
+    Returns:
+        One row per strategy (or strategy and segment) with mean sessions,
+        adherence, weekly sets and the share of members retained
+    """
+    if segments is None:
+        means = results.mean().to_frame().T
+    else:
+        means = results.groupby(segments.reindex(results.index).to_numpy()).mean()
+    summary = pd.concat({name: means[name] for name in results.columns.unique('strategy')}, names=['strategy'])
+    if segments is None:
+        summary = summary.droplevel(1)
+    return summary[METRICS].round(3)
+
+
+def population_from_store(store) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Members (with BMI categories) and workout log of a FitnessStore"""
+    from utils import calculate_bmi_array, get_bmi_category_array
+
+    members = store.member_profiles().reset_index()
+    members['bmi_category'] = get_bmi_category_array(calculate_bmi_array(members['weight'], members['height']))
+    return members, store.workout_log()
+
+
+if __name__ == '__main__':
+    import argparse
+    import os
+    import time
+
+    parser = argparse.ArgumentParser(description="Replay members against recommender strategies "
+                                                 "(a synthetic population without --db)")
+    parser.add_argument('--db', help="FitnessStore database to replay")
+    parser.add_argument('--members', type=int, default=100_000)
+    parser.add_argument('--days', type=int, default=90, help="History length of the synthetic population")
+    parser.add_argument('--strategy', action='append', metavar='RULES_JSON',
+                        help="Rule file to compare against the live rules (repeatable)")
+    parser.add_argument('--weeks', type=int, default=SIM_WEEKS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--by', choices=['fitness_level', 'goal', 'bmi_category'], help="Break results down")
+    parser.add_argument('--out', help="Write per-member metrics to this CSV file")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.db:
+        from storage import FitnessStore
+        members, workouts = population_from_store(FitnessStore(args.db))
+    else:
+        from storage import synthetic_population
+        members, workouts = synthetic_population(args.members, args.days, seed=args.seed)
+    loaded = time.perf_counter()
+
+    strategies = {'current': rules_strategy()}
+    for path in args.strategy or []:
+        strategies[os.path.splitext(os.path.basename(path))[0]] = rules_strategy(path)
+    results = simulate(members, workouts, strategies, args.weeks, args.seed, args.workers)
+    replayed = time.perf_counter()
+
+    segments = members.set_index('member_id')[args.by] if args.by else None
+    print(summarize(results, segments).to_string())
+    print(f"{len(members)} members, {len(workouts)} workouts: loaded in {loaded - started:.1f} s, "
+          f"{len(strategies)} strategies replayed over {args.weeks} weeks in {replayed - loaded:.1f} s "
+          f"({args.workers} workers)")
+    if args.out:
+        results.to_csv(args.out)
@@ -0,0 +1,610 @@
+"""
+Persistent member store with incrementally maintained cohort rollups
+
+Raw data (member profiles, completed workouts, logged sets and body weight) lives in SQLite next to a
+set of small rollup tables. Every write updates the affected rollup rows in
+the same transaction, so analytics only ever read the rollups and never scan
+the raw logs. ``rebuild_rollups`` recomputes them from scratch for backfills.
+"""
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple
+
+import pandas as pd
+
+DB_PATH = os.environ.get('FITNESS_DB_PATH',
+                         os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'fitness.db'))
+
+# Completion rates are bucketed into tenths (bucket 10 holds 100% and above)
+COMPLETION_BUCKETS = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS members (
+    member_id TEXT PRIMARY KEY,
+    name TEXT,
+    age INTEGER,
+    gender TEXT,
+    height REAL,
+    weight REAL,
+    fitness_level TEXT,
+    goal TEXT,
+    bmi REAL,
+    bmi_category TEXT,
+    total_workouts INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    streak INTEGER NOT NULL DEFAULT 0,
+    last_workout TEXT,
+    created_at TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_members_streak ON members (streak, last_workout);
+CREATE TABLE IF NOT EXISTS workout_log (
+    member_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    day TEXT NOT NULL,
+    muscle_group TEXT,
+    PRIMARY KEY (member_id, date, day)
+);
+CREATE TABLE IF NOT EXISTS set_log (
+    member_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    day TEXT NOT NULL,
+    exercise TEXT NOT NULL,
+    set_no INTEGER NOT NULL,
+    reps INTEGER NOT NULL,
+    load_kg REAL NOT NULL DEFAULT 0,
+    updated_at TEXT,
+    PRIMARY KEY (member_id, date, day, exercise, set_no)
+);
+CREATE TABLE IF NOT EXISTS weight_log (
+    member_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    weight_kg REAL NOT NULL,
+    PRIMARY KEY (member_id, date)
+);
+CREATE TABLE IF NOT EXISTS macro_targets (
+    member_id TEXT PRIMARY KEY,
+    trend_weight REAL NOT NULL,
+    macro_weight REAL NOT NULL,
+    calories INTEGER NOT NULL,
+    protein INTEGER NOT NULL,
+    fats INTEGER NOT NULL,
+    carbs INTEGER NOT NULL,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS rollup_totals (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS rollup_daily (
+    date TEXT PRIMARY KEY,
+    completions INTEGER NOT NULL DEFAULT 0,
+    active_members INTEGER NOT NULL DEFAULT 0,
+    new_members INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS rollup_segments (
+    fitness_level TEXT NOT NULL,
+    goal TEXT NOT NULL,
+    members INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (fitness_level, goal)
+);
+CREATE TABLE IF NOT EXISTS rollup_bmi_categories (
+    bmi_category TEXT PRIMARY KEY,
+    members INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS rollup_bmi_transitions (
+    date TEXT NOT NULL,
+    from_category TEXT NOT NULL,
+    to_category TEXT NOT NULL,
+    members INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (date, from_category, to_category)
+);
+CREATE TABLE IF NOT EXISTS rollup_streaks (
+    streak INTEGER PRIMARY KEY,
+    members INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS rollup_completion (
+    bucket INTEGER PRIMARY KEY,
+    members INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+ROLLUP_TABLES = ['rollup_totals', 'rollup_daily', 'rollup_segments', 'rollup_bmi_categories',
+                 'rollup_bmi_transitions', 'rollup_streaks', 'rollup_completion']
+
+
+def completion_bucket(completed: int, total_workouts: int) -> int:
+    """Bucket a member's completion rate (same definition as the Progress tab)"""
+    rate = completed / max(total_workouts, 1)
+    return min(COMPLETION_BUCKETS, int(rate * COMPLETION_BUCKETS))
+
+
+def next_streak(streak: int, last_workout: Optional[str], workout_date: str) -> int:
+    """Streak after a workout on ``workout_date`` given the previous last workout date"""
+    if last_workout is None:
+        return 1
+    if workout_date == last_workout:
+        return max(streak, 1)
+    if workout_date < last_workout:
+        # Back-filled older workout: the current streak is unaffected
+        return streak
+    previous_day = (date.fromisoformat(workout_date) - timedelta(days=1)).isoformat()
+    return streak + 1 if last_workout == previous_day else 1
+
+
+class FitnessStore:
+    """SQLite-backed member store that keeps cohort rollups up to date on every write"""
+
+    def __init__(self, path: str = DB_PATH):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    # --- Rollup helpers (called inside a transaction) ---
+    def _bump(self, table: str, keys: Dict[str, Any], column: str = 'members', delta: int = 1):
+        names = list(keys)
+        placeholders = ', '.join('?' for _ in names)
+        self._conn.execute(
+            f"INSERT INTO {table} ({', '.join(names)}, {column}) VALUES ({placeholders}, ?) "
+            f"ON CONFLICT ({', '.join(names)}) DO UPDATE SET {column} = {column} + excluded.{column}",
+            [*keys.values(), delta]
+        )
+
+    def _bump_total(self, key: str, delta: int):
+        self._bump('rollup_totals', {'key': key}, 'value', delta)
+
+    # --- Writes ---
+    def upsert_member(self, member_id: str, profile: Dict[str, Any], bmi: float, bmi_category: str,
+                      total_workouts: int, today: Optional[str] = None):
+        """
+        Insert or update a member profile and adjust the segment, BMI and completion rollups
+
+        Args:
+            member_id: Stable identifier of the member
+            profile: Profile fields (name, age, gender, height, weight, fitness_level, goal)
+            bmi: Current BMI
+            bmi_category: Current BMI category
+            total_workouts: Workouts in the member's current plan
+            today: ISO date of the change (defaults to today)
+        """
+        today = today or date.today().isoformat()
+        # Keep the timestamp on the rollup's day so rebuild_rollups agrees with the incremental path
+        now = today + datetime.now().isoformat(timespec='seconds')[10:]
+        with self._lock, self._conn:
+            old = self._conn.execute('SELECT * FROM members WHERE member_id = ?', (member_id,)).fetchone()
+            self._conn.execute(
+                """INSERT INTO members (member_id, name, age, gender, height, weight, fitness_level, goal,
+                                        bmi, bmi_category, total_workouts, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (member_id) DO UPDATE SET
+                       name = excluded.name, age = excluded.age, gender = excluded.gender,
+                       height = excluded.height, weight = excluded.weight,
+                       fitness_level = excluded.fitness_level, goal = excluded.goal,
+                       bmi = excluded.bmi, bmi_category = excluded.bmi_category,
+                       total_workouts = excluded.total_workouts, updated_at = excluded.updated_at""",
+                (member_id, profile.get('name'), profile.get('age'), profile.get('gender'),
+                 profile.get('height'), profile.get('weight'), profile['fitness_level'], profile['goal'],
+                 bmi, bmi_category, total_workouts, now, now)
+            )
+
+            if old is None:
+                self._bump_total('members', 1)
+                self._bump_total('planned_workouts', total_workouts)
+                self._bump('rollup_daily', {'date': today}, 'new_members')
+                self._bump('rollup_segments', {'fitness_level': profile['fitness_level'], 'goal': profile['goal']})
+                self._bump('rollup_bmi_categories', {'bmi_category': bmi_category})
+                self._bump('rollup_streaks', {'streak': 0})
+                self._bump('rollup_completion', {'bucket': completion_bucket(0, total_workouts)})
+                return
+
+            if (old['fitness_level'], old['goal']) != (profile['fitness_level'], profile['goal']):
+                self._bump('rollup_segments', {'fitness_level': old['fitness_level'], 'goal': old['goal']}, delta=-1)
+                self._bump('rollup_segments', {'fitness_level': profile['fitness_level'], 'goal': profile['goal']})
+            if old['bmi_category'] != bmi_category:
+                self._bump('rollup_bmi_categories', {'bmi_category': old['bmi_category']}, delta=-1)
+                self._bump('rollup_bmi_categories', {'bmi_category': bmi_category})
+                self._bump('rollup_bmi_transitions',
+                           {'date': today, 'from_category': old['bmi_category'], 'to_category': bmi_category})
+            if old['total_workouts'] != total_workouts:
+                self._bump_total('planned_workouts', total_workouts - old['total_workouts'])
+                old_bucket = completion_bucket(old['completed'], old['total_workouts'])
+                new_bucket = completion_bucket(old['completed'], total_workouts)
+                if old_bucket != new_bucket:
+                    self._bump('rollup_completion', {'bucket': old_bucket}, delta=-1)
+                    self._bump('rollup_completion', {'bucket': new_bucket})
+
+    def record_workout(self, member_id: str, workout_date: str, day: str, muscle_group: Optional[str] = None) -> bool:
+        """
+        Log a completed workout and update the daily, streak and completion rollups
+
+        Args:
+            member_id: Member who completed the workout (must exist)
+            workout_date: ISO date of the workout
+            day: Plan day that was completed (e.g. "Monday")
+            muscle_group: Muscle group trained that day
+
+        Returns:
+            False if this workout was already logged, True otherwise
+        """
+        with self._lock, self._conn:
+            member = self._conn.execute('SELECT * FROM members WHERE member_id = ?', (member_id,)).fetchone()
+            if member is None:
+                raise KeyError(f"Unknown member: {member_id}")
+
+            first_today = self._conn.execute(
+                'SELECT 1 FROM workout_log WHERE member_id = ? AND date = ? LIMIT 1', (member_id, workout_date)
+            ).fetchone() is None
+            inserted = self._conn.execute(
+                'INSERT OR IGNORE INTO workout_log (member_id, date, day, muscle_group) VALUES (?, ?, ?, ?)',
+                (member_id, workout_date, day, muscle_group)
+            ).rowcount
+            if not inserted:
+                return False
+
+            completed = member['completed'] + 1
+            streak = next_streak(member['streak'], member['last_workout'], workout_date)
+            last_workout = max(member['last_workout'] or workout_date, workout_date)
+            self._conn.execute(
+                'UPDATE members SET completed = ?, streak = ?, last_workout = ? WHERE member_id = ?',
+                (completed, streak, last_workout, member_id)
+            )
+
+            self._bump_total('completed_workouts', 1)
+            self._bump('rollup_daily', {'date': workout_date}, 'completions')
+            if first_today:
+                self._bump('rollup_daily', {'date': workout_date}, 'active_members')
+            if streak != member['streak']:
+                self._bump('rollup_streaks', {'streak': member['streak']}, delta=-1)
+                self._bump('rollup_streaks', {'streak': streak})
+            old_bucket = completion_bucket(member['completed'], member['total_workouts'])
+            new_bucket = completion_bucket(completed, member['total_workouts'])
+            if old_bucket != new_bucket:
+                self._bump('rollup_completion', {'bucket': old_bucket}, delta=-1)
+                self._bump('rollup_completion', {'bucket': new_bucket})
+            return True
+
+    def expire_streaks(self, today: Optional[str] = None) -> int:
+        """
+        Reset streaks of members who missed yesterday, moving them to the 0 bucket
+
+        Returns:
+            Number of members whose streak was reset
+        """
+        today = today or date.today().isoformat()
+        yesterday = (date.fromisoformat(today) - timedelta(days=1)).isoformat()
+        with self._lock, self._conn:
+            expired = self._conn.execute(
+                'SELECT streak, COUNT(*) AS members FROM members WHERE streak > 0 AND last_workout < ? GROUP BY streak',
+                (yesterday,)
+            ).fetchall()
+            if not expired:
+                return 0
+            self._conn.execute('UPDATE members SET streak = 0 WHERE streak > 0 AND last_workout < ?', (yesterday,))
+            total = 0
+            for row in expired:
+                self._bump('rollup_streaks', {'streak': row['streak']}, delta=-row['members'])
+                total += row['members']
+            self._bump('rollup_streaks', {'streak': 0}, delta=total)
+            return total
+
+    def rebuild_rollups(self):
+        """Recompute every rollup table from the members and workout_log tables"""
+        statements = [f'DELETE FROM {table}' for table in ROLLUP_TABLES if table != 'rollup_bmi_transitions'] + [
+            """INSERT INTO rollup_totals (key, value)
+                   SELECT 'members', COUNT(*) FROM members
+                   UNION ALL SELECT 'completed_workouts', COALESCE(SUM(completed), 0) FROM members
+                   UNION ALL SELECT 'planned_workouts', COALESCE(SUM(total_workouts), 0) FROM members""",
+            """INSERT INTO rollup_daily (date, completions, active_members, new_members)
+                   SELECT date, SUM(completions), SUM(active), SUM(new_members) FROM (
+                       SELECT date, COUNT(*) AS completions, COUNT(DISTINCT member_id) AS active, 0 AS new_members
+                           FROM workout_log GROUP BY date
+                       UNION ALL
+                       SELECT substr(created_at, 1, 10), 0, 0, COUNT(*) FROM members GROUP BY 1
+                   ) GROUP BY date""",
+            """INSERT INTO rollup_segments (fitness_level, goal, members)
+                   SELECT fitness_level, goal, COUNT(*) FROM members GROUP BY fitness_level, goal""",
+            """INSERT INTO rollup_bmi_categories (bmi_category, members)
+                   SELECT bmi_category, COUNT(*) FROM members GROUP BY bmi_category""",
+            """INSERT INTO rollup_streaks (streak, members)
+                   SELECT streak, COUNT(*) FROM members GROUP BY streak""",
+            f"""INSERT INTO rollup_completion (bucket, members)
+                    SELECT MIN({COMPLETION_BUCKETS}, completed * {COMPLETION_BUCKETS} / MAX(total_workouts, 1)), COUNT(*)
+                    FROM members GROUP BY 1"""
+        ]
+        # BMI transitions are only observable as they happen, so they are kept as-is
+        with self._lock, self._conn:
+            for statement in statements:
+                self._conn.execute(statement)
+
+    def bulk_load(self, members: pd.DataFrame, workouts: pd.DataFrame):
+        """
+        Append many members and workouts at once, then rebuild the rollups
+
+        Args:
+            members: Frame with the columns of the members table
+            workouts: Frame with member_id, date, day and muscle_group columns
+        """
+        with self._lock, self._conn:
+            members.to_sql('members', self._conn, if_exists='append', index=False, chunksize=50000)
+            workouts.to_sql('workout_log', self._conn, if_exists='append', index=False, chunksize=50000)
+        self.rebuild_rollups()
+
+    def save_sets(self, changes: List[Tuple[str, str, str, str, int, Optional[int], Optional[float]]]) -> int:
+        """
+        Apply a batch of logged-set changes in a single transaction
+
+        Args:
+            changes: Tuples of (member_id, date, day, exercise, set_no, reps, load_kg);
+                a reps value of None deletes the set
+
+        Returns:
+            Number of changes applied
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        upserts = [(*change, now) for change in changes if change[5] is not None]
+        deletes = [change[:5] for change in changes if change[5] is None]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT INTO set_log (member_id, date, day, exercise, set_no, reps, load_kg, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (member_id, date, day, exercise, set_no) '
+                'DO UPDATE SET reps = excluded.reps, load_kg = excluded.load_kg, updated_at = excluded.updated_at',
+                upserts
+            )
+            self._conn.executemany(
+                'DELETE FROM set_log WHERE member_id = ? AND date = ? AND day = ? AND exercise = ? AND set_no = ?',
+                deletes
+            )
+        return len(changes)
+
+    def set_history(self, member_id: Optional[str] = None) -> pd.DataFrame:
+        """Logged sets for one member (or everyone), oldest first"""
+        sql = 'SELECT member_id, date, day, exercise, set_no, reps, load_kg FROM set_log'
+        params: Tuple = ()
+        if member_id is not None:
+            sql += ' WHERE member_id = ?'
+            params = (member_id,)
+        with self._lock:
+            return pd.read_sql_query(sql + ' ORDER BY date, day, exercise, set_no', self._conn, params=params)
+
+    def log_weight(self, member_id: str, log_date: str, weight_kg: float):
+        """Record a body-weight reading (one per member per day; later readings replace earlier ones)"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT INTO weight_log (member_id, date, weight_kg) VALUES (?, ?, ?) '
+                'ON CONFLICT (member_id, date) DO UPDATE SET weight_kg = excluded.weight_kg',
+                (member_id, log_date, weight_kg)
+            )
+
+    def save_macro_targets(self, targets: pd.DataFrame):
+        """
+        Upsert macro targets
+
+        Args:
+            targets: Frame indexed by member_id with trend_weight, macro_weight,
+                calories, protein, fats and carbs columns
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        columns = ['trend_weight', 'macro_weight', 'calories', 'protein', 'fats', 'carbs']
+        rows = [
+            (member_id, float(trend), float(macro_weight), int(calories), int(protein), int(fats), int(carbs), now)
+            for member_id, trend, macro_weight, calories, protein, fats, carbs in targets[columns].itertuples(name=None)
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO macro_targets (member_id, {', '.join(columns)}, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                f"ON CONFLICT (member_id) DO UPDATE SET "
+                f"{', '.join(f'{c} = excluded.{c}' for c in columns)}, updated_at = excluded.updated_at",
+                rows
+            )
+
+    def weight_log(self, member_id: Optional[str] = None) -> pd.DataFrame:
+        """Body-weight readings for one member (or everyone), oldest first"""
+        sql = 'SELECT member_id, date, weight_kg FROM weight_log'
+        params: Tuple = ()
+        if member_id is not None:
+            sql += ' WHERE member_id = ?'
+            params = (member_id,)
+        with self._lock:
+            return pd.read_sql_query(sql + ' ORDER BY member_id, date', self._conn, params=params)
+
+    def workout_log(self, member_id: Optional[str] = None) -> pd.DataFrame:
+        """Completed workouts for one member (or everyone), oldest first"""
+        sql = 'SELECT member_id, date, day, muscle_group FROM workout_log'
+        params: Tuple = ()
+        if member_id is not None:
+            sql += ' WHERE member_id = ?'
+            params = (member_id,)
+        with self._lock:
+            return pd.read_sql_query(sql + ' ORDER BY member_id, date', self._conn, params=params)
+
+    def macro_targets(self) -> pd.DataFrame:
+        """Stored macro targets, indexed by member_id"""
+        with self._lock:
+            frame = pd.read_sql_query('SELECT * FROM macro_targets', self._conn)
+        return frame.set_index('member_id')
+
+    def member_profiles(self) -> pd.DataFrame:
+        """Profile columns needed for energy targets, indexed by member_id"""
+        with self._lock:
+            frame = pd.read_sql_query(
+                'SELECT member_id, age, gender, height, weight, fitness_level, goal FROM members', self._conn
+            )
+        return frame.set_index('member_id')
+
+    def member_outcomes(self) -> pd.DataFrame:
+        """Profile, plan and completion columns of every member (for the members-like-you index)"""
+        with self._lock:
+            return pd.read_sql_query(
+                'SELECT member_id, age, gender, height, weight, fitness_level, goal, bmi_category, '
+                'completed, total_workouts FROM members', self._conn
+            )
+
+    def member_goals(self) -> pd.Series:
+        """Primary goal of every member, indexed by member_id"""
+        with self._lock:
+            frame = pd.read_sql_query('SELECT member_id, goal FROM members', self._conn)
+        return frame.set_index('member_id')['goal']
+
+    # --- Rollup reads (never touch the raw tables) ---
+    def _frame(self, sql: str) -> pd.DataFrame:
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn)
+
+    def totals(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute('SELECT key, value FROM rollup_totals').fetchall()
+        return {row['key']: row['value'] for row in rows}
+
+    def daily_activity(self, days: Optional[int] = None) -> pd.DataFrame:
+        sql = 'SELECT date, completions, active_members, new_members FROM rollup_daily ORDER BY date'
+        frame = self._frame(sql)
+        return frame.tail(days) if days else frame
+
+    def segment_mix(self) -> pd.DataFrame:
+        return self._frame('SELECT fitness_level, goal, members FROM rollup_segments WHERE members > 0')
+
+    def bmi_distribution(self) -> pd.DataFrame:
+        return self._frame('SELECT bmi_category, members FROM rollup_bmi_categories WHERE members > 0')
+
+    def bmi_transitions(self) -> pd.DataFrame:
+        return self._frame('SELECT date, from_category, to_category, members FROM rollup_bmi_transitions ORDER BY date')
+
+    def streak_distribution(self) -> pd.DataFrame:
+        return self._frame('SELECT streak, members FROM rollup_streaks WHERE members > 0 ORDER BY streak')
+
+    def completion_distribution(self) -> pd.DataFrame:
+        return self._frame('SELECT bucket, members FROM rollup_completion WHERE members > 0 ORDER BY bucket')
+
+
+_default_store: Optional[FitnessStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_store() -> FitnessStore:
+    """Process-wide store at DB_PATH, shared by the app, its pages and the API"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = FitnessStore(DB_PATH)
+        return _default_store
+
+
+def synthetic_population(members: int, days: int = 90, seed: int = 0, end: Optional[date] = None):
+    """
+    Generate a random but plausible population of members and workout logs
+
+    Args:
+        members: Number of members
+        days: Length of the history in days
+        seed: Random seed
+        end: Last day of the history (defaults to today)
+
+    Returns:
+        Tuple of (members, workouts) frames suitable for FitnessStore.bulk_load
+    """
+    import numpy as np
+    from utils import calculate_bmi_array, get_bmi_category_array
+
+    rng = np.random.default_rng(seed)
+    end = end or date.today()
+    levels = np.array(['Beginner', 'Intermediate', 'Advanced'])
+    goals = np.array(['Muscle Building', 'Fat Loss', 'Strength Training'])
+    genders = np.array(['Male', 'Female', 'Other'])
+    weekdays = np.array(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'])
+    groups = np.array(['Chest', 'Back', 'Legs', 'Shoulders', 'Arms', 'Core', 'Cardio'])
+
+    height = rng.normal(170, 10, members).clip(120, 250).round()
+    weight = rng.normal(75, 15, members).clip(30, 300).round(1)
+    bmi = calculate_bmi_array(weight, height)
+    joined = rng.integers(0, days, members)
+    adherence = rng.beta(2, 3, members)
+
+    # Each member works out on a given day with probability equal to their adherence
+    member_idx, day_offset = np.nonzero(rng.random((members, days)) < adherence[:, None])
+    keep = day_offset >= joined[member_idx]
+    member_idx, day_offset = member_idx[keep], day_offset[keep]
+    start = np.datetime64(end) - np.timedelta64(days - 1, 'D')
+    workout_dates = start + day_offset.astype('timedelta64[D]')
+    weekday_idx = (workout_dates.astype('datetime64[D]').view('int64') - 4) % 7  # 1970-01-01 was a Thursday
+
+    ids = np.char.add('member-', np.arange(members).astype(str))
+    workouts = pd.DataFrame({
+        'member_id': ids[member_idx],
+        'date': workout_dates.astype(str),
+        'day': weekdays[weekday_idx],
+        'muscle_group': groups[weekday_idx]
+    })
+
+    completed = np.bincount(member_idx, minlength=members)
+    last_offset = np.full(members, -1)
+    np.maximum.at(last_offset, member_idx, day_offset)
+    # Current streak: consecutive workout days ending at the member's last workout
+    active = np.zeros((members, days + 1), dtype=bool)
+    active[member_idx, day_offset] = True
+    streak = np.zeros(members, dtype=np.int64)
+    has_workout = last_offset >= 0
+    run = has_workout.copy()
+    for back in range(days):
+        offset = last_offset - back
+        run &= (offset >= 0) & active[np.arange(members), np.maximum(offset, 0)]
+        streak += run
+        if not run.any():
+            break
+
+    created = (start + joined.astype('timedelta64[D]')).astype(str)
+    last_workout = np.where(has_workout, (start + np.maximum(last_offset, 0).astype('timedelta64[D]')).astype(str), None)
+    member_frame = pd.DataFrame({
+        'member_id': ids,
+        'name': ids,
+        'age': rng.integers(16, 80, members),
+        'gender': rng.choice(genders, members),
+        'height': height,
+        'weight': weight,
+        'fitness_level': rng.choice(levels, members),
+        'goal': rng.choice(goals, members),
+        'bmi': bmi,
+        'bmi_category': get_bmi_category_array(bmi),
+        'total_workouts': rng.integers(20, 37, members),
+        'completed': completed,
+        'streak': streak,
+        'last_workout': last_workout,
+        'created_at': np.char.add(created, 'T00:00:00'),
+        'updated_at': np.char.add(created, 'T00:00:00')
+    })
+    return member_frame, workouts
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Maintain the member store and its rollups")
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--rebuild', action='store_true', help="Recompute all rollups from raw tables")
+    parser.add_argument('--expire-streaks', action='store_true', help="Reset streaks of members who missed yesterday")
+    parser.add_argument('--seed-demo', type=int, metavar='MEMBERS', help="Load a synthetic population")
+    parser.add_argument('--days', type=int, default=90, help="History length for --seed-demo")
+    args = parser.parse_args()
+
+    store = FitnessStore(args.db)
+    started = time.perf_counter()
+    if args.seed_demo:
+        store.bulk_load(*synthetic_population(args.seed_demo, args.days))
+        print(f"Loaded {args.seed_demo} synthetic members")
+    if args.expire_streaks:
+        print(f"Reset {store.expire_streaks()} streaks")
+    if args.rebuild:
+        store.rebuild_rollups()
+        print("Rollups rebuilt")
+    print(f"Done in {time.perf_counter() - started:.1f}s")
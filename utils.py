@@ -1,8 +1,50 @@
 import math
-from typing import Dict, Any
-import streamlit as st
+from typing import Dict, Any, Optional
 from datetime import datetime
 
+import numpy as np
+import pandas as pd
+
+# Activity multipliers applied to BMR, keyed by fitness level
+ACTIVITY_FACTORS = {'Beginner': 1.2, 'Intermediate': 1.55, 'Advanced': 1.725}
+
+# Daily calorie surplus/deficit applied to TDEE, keyed by goal
+GOAL_CALORIE_ADJUSTMENT = {'Muscle Building': 500, 'Fat Loss': -500, 'Strength Training': 0}
+
+# Activity multiplier for BMR excluding exercise, used when exercise calories are measured
+SEDENTARY_FACTOR = 1.2
+
+# METs (Metabolic Equivalent of Task) values for different muscle groups
+MET_VALUES = {
+    'Chest': 6.0,      # Weight training, moderate
+    'Back': 6.0,
+    'Shoulders': 5.5,
+    'Arms': 5.5,
+    'Legs': 7.0,       # Slightly higher due to larger muscle groups
+    'Core': 4.5,
+    'Cardio': 8.0,     # High intensity cardio
+    'Rest': 0.0
+}
+
+# Default MET value if exercise not found
+DEFAULT_MET = 5.5
+
+# Bumped whenever plan or macro output changes, so results persisted
+# to disk by st.cache_data in an earlier release are not served
+CACHE_VERSION = 2
+
+# BMI category boundaries; a value equal to a boundary belongs to the higher category
+BMI_THRESHOLDS = [18.5, 25, 30]
+BMI_CATEGORIES = ["Underweight", "Normal", "Overweight", "Obese"]
+
+BMI_COLORS = {
+    "Underweight": "#74c0fc",
+    "Normal": "#51cf66",
+    "Overweight": "#ffd43b",
+    "Obese": "#ff6b6b"
+}
+DEFAULT_BMI_COLOR = "#ffffff"
+
 def calculate_bmi(weight: float, height: float) -> float:
     """
     Calculate BMI from weight (kg) and height (cm)
@@ -47,13 +89,208 @@ def get_bmi_color(bmi_category: str) -> str:
     Returns:
         Hex color code
     """
-    colors = {
-        "Underweight": "#74c0fc",
-        "Normal": "#51cf66",
-        "Overweight": "#ffd43b",
-        "Obese": "#ff6b6b"
+    return BMI_COLORS.get(bmi_category, DEFAULT_BMI_COLOR)
+
+def round_half_even_array(values: np.ndarray, ndigits: int = 1) -> np.ndarray:
+    """
+    Round an array exactly like Python's built-in ``round(x, ndigits)``
+    
+    ``np.round`` scales by 10**ndigits before rounding, which can land on the
+    other side of a .5 tie than Python's correctly rounded result. Only values
+    whose scaled form is within floating-point error of a tie are affected,
+    so those few are re-rounded with the built-in.
+    
+    Args:
+        values: Float array
+        ndigits: Number of decimal places
+    
+    Returns:
+        Rounded float64 array
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scale = 10.0 ** ndigits
+    scaled = values * scale
+    rounded = np.round(scaled) / scale
+    
+    with np.errstate(invalid='ignore'):
+        near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_tie.any():
+        rounded[near_tie] = [round(value, ndigits) for value in values[near_tie].tolist()]
+    return rounded
+
+def calculate_bmi_array(weight, height) -> np.ndarray:
+    """
+    Vectorized ``calculate_bmi`` for whole columns of members
+    
+    Args:
+        weight: Array-like of weights in kilograms
+        height: Array-like of heights in centimeters
+    
+    Returns:
+        Float64 array of BMI values, identical to the scalar version
+    """
+    height_m = np.asarray(height, dtype=np.float64) / 100
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bmi = np.asarray(weight, dtype=np.float64) / (height_m ** 2)
+    return round_half_even_array(bmi, 1)
+
+def get_bmi_category_codes(bmi) -> np.ndarray:
+    """
+    Vectorized BMI categorization returning indexes into BMI_CATEGORIES
+    
+    Args:
+        bmi: Array-like of BMI values
+    
+    Returns:
+        int8 array (0=Underweight, 1=Normal, 2=Overweight, 3=Obese)
+    """
+    return np.digitize(np.asarray(bmi, dtype=np.float64), BMI_THRESHOLDS).astype(np.int8)
+
+def get_bmi_category_array(bmi) -> np.ndarray:
+    """
+    Vectorized ``get_bmi_category``
+    
+    Args:
+        bmi: Array-like of BMI values
+    
+    Returns:
+        Object array of category strings
+    """
+    return np.array(BMI_CATEGORIES, dtype=object)[get_bmi_category_codes(bmi)]
+
+def get_bmi_color_array(bmi_category) -> np.ndarray:
+    """
+    Vectorized ``get_bmi_color``
+    
+    Args:
+        bmi_category: Array-like of category strings
+    
+    Returns:
+        Object array of hex color codes
+    """
+    colors = pd.Series(np.asarray(bmi_category, dtype=object)).map(BMI_COLORS)
+    return colors.fillna(DEFAULT_BMI_COLOR).to_numpy(dtype=object)
+
+def classify_bmi_frame(weight, height) -> pd.DataFrame:
+    """
+    Compute BMI, category and display color for many members at once
+    
+    Args:
+        weight: Array-like of weights in kilograms
+        height: Array-like of heights in centimeters
+    
+    Returns:
+        DataFrame with a float 'bmi' column and categorical 'category' and 'color' columns
+    """
+    bmi = calculate_bmi_array(weight, height)
+    codes = get_bmi_category_codes(bmi)
+    index = weight.index if isinstance(weight, pd.Series) else None
+    return pd.DataFrame({
+        'bmi': bmi,
+        'category': pd.Categorical.from_codes(codes, categories=BMI_CATEGORIES),
+        'color': pd.Categorical.from_codes(codes, categories=[BMI_COLORS[c] for c in BMI_CATEGORIES])
+    }, index=index)
+
+def calculate_bmr(weight: float, height: float, age: int, gender: str) -> float:
+    """
+    Calculate Basal Metabolic Rate using the revised Harris-Benedict equation
+    
+    Args:
+        weight: Weight in kilograms
+        height: Height in centimeters
+        age: Age in years
+        gender: "Male", "Female" or "Other"
+    
+    Returns:
+        BMR in kcal/day
+    """
+    if gender == "Male":
+        return 88.362 + (13.397 * weight) + (4.799 * height) - (5.677 * age)
+    return 447.593 + (9.247 * weight) + (3.098 * height) - (4.330 * age)
+
+def calculate_tdee(bmr: float, fitness_level: str, exercise_calories: Optional[float] = None) -> float:
+    """
+    Estimate Total Daily Energy Expenditure from BMR and fitness level
+    
+    Args:
+        bmr: Basal Metabolic Rate in kcal/day
+        fitness_level: Beginner, Intermediate or Advanced
+        exercise_calories: Measured average daily exercise expenditure; when
+            given it replaces the fitness-level activity estimate
+    
+    Returns:
+        TDEE in kcal/day
+    """
+    if exercise_calories is not None:
+        return bmr * SEDENTARY_FACTOR + exercise_calories
+    activity_factor = ACTIVITY_FACTORS.get(fitness_level, 1.55)
+    return bmr * activity_factor
+
+def calculate_macros(tdee: float, weight: float, goal: str) -> Dict[str, int]:
+    """
+    Calculate daily calorie and macro targets for a goal
+    
+    Args:
+        tdee: Total Daily Energy Expenditure in kcal/day
+        weight: Weight in kilograms
+        goal: Muscle Building, Fat Loss or Strength Training
+    
+    Returns:
+        Dictionary with calories, protein, fats and carbs
+    """
+    calories = tdee + GOAL_CALORIE_ADJUSTMENT.get(goal, 0)
+    
+    protein = weight * 2.0
+    fats = calories * 0.25 / 9
+    carbs = (calories - (protein * 4) - (fats * 9)) / 4
+    
+    return {
+        'calories': int(calories),
+        'protein': int(protein),
+        'fats': int(fats),
+        'carbs': int(carbs)
     }
-    return colors.get(bmi_category, "#ffffff")
+
+def calculate_macros_frame(weight, height, age, gender, fitness_level, goal) -> pd.DataFrame:
+    """
+    Calorie and macro targets for many members at once
+
+    Vectorized equivalent of calculate_bmr, calculate_tdee (activity factor
+    estimate) and calculate_macros applied row by row, with identical results.
+
+    Args:
+        weight: Array-like of weights in kilograms
+        height: Array-like of heights in centimeters
+        age: Array-like of ages in years
+        gender: Array-like of genders
+        fitness_level: Array-like of fitness levels
+        goal: Array-like of goals
+
+    Returns:
+        DataFrame with integer calories, protein, fats and carbs columns
+    """
+    index = weight.index if isinstance(weight, pd.Series) else None
+    weight = np.asarray(weight, dtype=np.float64)
+    height = np.asarray(height, dtype=np.float64)
+    age = np.asarray(age, dtype=np.float64)
+    male = np.asarray(gender) == "Male"
+    bmr = np.where(male,
+                   88.362 + (13.397 * weight) + (4.799 * height) - (5.677 * age),
+                   447.593 + (9.247 * weight) + (3.098 * height) - (4.330 * age))
+    activity_factor = pd.Series(np.asarray(fitness_level)).map(ACTIVITY_FACTORS).fillna(1.55).to_numpy()
+    adjustment = pd.Series(np.asarray(goal)).map(GOAL_CALORIE_ADJUSTMENT).fillna(0).to_numpy()
+    calories = bmr * activity_factor + adjustment
+
+    protein = weight * 2.0
+    fats = calories * 0.25 / 9
+    carbs = (calories - (protein * 4) - (fats * 9)) / 4
+
+    return pd.DataFrame({
+        'calories': np.trunc(calories).astype(np.int64),
+        'protein': np.trunc(protein).astype(np.int64),
+        'fats': np.trunc(fats).astype(np.int64),
+        'carbs': np.trunc(carbs).astype(np.int64)
+    }, index=index)
 
 def calculate_calories_burned(exercise: str, duration_minutes: int, weight_kg: float) -> int:
     """
@@ -67,20 +304,7 @@ def calculate_calories_burned(exercise: str, duration_minutes: int, weight_kg: f
     Returns:
         Estimated calories burned
     """
-    # METs (Metabolic Equivalent of Task) values for different exercises
-    met_values = {
-        'Chest': 6.0,      # Weight training, moderate
-        'Back': 6.0,
-        'Shoulders': 5.5,
-        'Arms': 5.5,
-        'Legs': 7.0,       # Slightly higher due to larger muscle groups
-        'Core': 4.5,
-        'Cardio': 8.0,     # High intensity cardio
-        'Rest': 0.0
-    }
-    
-    # Default MET value if exercise not found
-    met = met_values.get(exercise, 5.5)
+    met = MET_VALUES.get(exercise, DEFAULT_MET)
     
     # Calories = METs × weight (kg) × time (hours)
     calories = met * weight_kg * (duration_minutes / 60)
@@ -1,166 +1,182 @@
 import random
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
-# Comprehensive exercise database organized by muscle groups
-EXERCISE_DATABASE = {
-    'Chest': [
-        'Bench Press', 'Incline Dumbbell Press', 'Decline Bench Press', 'Pec Fly',
-        'Push-ups', 'Cable Chest Press', 'Incline Barbell Press', 'Chest Dips',
-        'Dumbbell Pullover', 'Cable Crossover', 'Incline Fly', 'Decline Fly'
-    ],
-    'Shoulders': [
-        'Military Press', 'Lateral Raises', 'Upright Rows', 'Arnold Press',
-        'Front Raises', 'Rear Delt Fly', 'Overhead Press', 'Dumbbell Shrugs',
-        'Pike Push-ups', 'Cable Lateral Raises', 'Handstand Push-ups', 'Face Pulls'
-    ],
-    'Arms': [
-        'Barbell Curls', 'Tricep Dips', 'Skull Crushers', 'Hammer Curls',
-        'Rope Pushdowns', 'Preacher Curls', 'Overhead Tricep Extension',
-        'Cable Curls', '21s Bicep Curls', 'Diamond Push-ups', 'Concentration Curls',
-        'Close-Grip Bench Press'
-    ],
-    'Back': [
-        'Deadlifts', 'Barbell Rows', 'Lat Pulldowns', 'Pull-ups',
-        'Seated Cable Rows', 'T-Bar Rows', 'Single-Arm Dumbbell Rows',
-        'Wide-Grip Pull-ups', 'Reverse Fly', 'Hyperextensions', 'Cable Rows',
-        'Inverted Rows'
-    ],
-    'Legs': [
-        'Squats', 'Romanian Deadlifts', 'Lunges', 'Leg Press',
-        'Calf Raises', 'Leg Curls', 'Leg Extensions', 'Bulgarian Split Squats',
-        'Walking Lunges', 'Goblet Squats', 'Sumo Squats', 'Step-ups',
-        'Wall Sits', 'Jump Squats'
-    ],
-    'Core': [
-        'Plank', 'Crunches', 'Russian Twists', 'Mountain Climbers',
-        'Bicycle Crunches', 'Dead Bug', 'Leg Raises', 'Side Plank',
-        'Ab Wheel Rollouts', 'Hanging Knee Raises', 'V-ups', 'Flutter Kicks'
-    ],
-    'Cardio': [
-        'Burpees', 'High Knees', 'Jumping Jacks', 'Jump Rope',
-        'Sprint Intervals', 'Box Jumps', 'Battle Ropes', 'Rowing Machine',
-        'Stationary Bike', 'Elliptical', 'Stair Climber', 'Treadmill Running'
-    ]
+from exercise_catalog import EXERCISE_CATALOG, EXERCISE_INDEX
+from fatigue import FatigueModel
+from recommender_rules import RuleTable, current_rules
+
+# Flat view of the catalog: muscle group -> exercise names, in catalog order
+EXERCISE_DATABASE = {}
+for _exercise in EXERCISE_CATALOG:
+    EXERCISE_DATABASE.setdefault(_exercise['muscle_group'], []).append(_exercise['name'])
+
+# Work/rest seconds per exercise and rest between rounds for circuit-style days
+CIRCUIT_INTERVALS = {
+    'Beginner': {'work': 30, 'rest': 30, 'rounds': 2, 'round_rest': 90},
+    'Intermediate': {'work': 40, 'rest': 20, 'rounds': 3, 'round_rest': 60},
+    'Advanced': {'work': 45, 'rest': 15, 'rounds': 4, 'round_rest': 60}
 }
 
 class WorkoutRecommender:
     """Rule-based ML workout recommender using decision tree logic"""
     
-    def __init__(self):
-        self.fitness_levels = {
-            'Beginner': {'exercises_per_day': 4, 'rest_days': 2},
-            'Intermediate': {'exercises_per_day': 5, 'rest_days': 2},
-            'Advanced': {'exercises_per_day': 6, 'rest_days': 1}
-        }
-        
-        self.goal_priorities = {
-            'Muscle Building': {
-                'primary_focus': ['Chest', 'Back', 'Legs', 'Shoulders', 'Arms'],
-                'workout_style': 'hypertrophy'
-            },
-            'Fat Loss': {
-                'primary_focus': ['Cardio', 'Legs', 'Core', 'Chest', 'Back'],
-                'workout_style': 'circuit'
-            },
-            'Strength Training': {
-                'primary_focus': ['Back', 'Chest', 'Legs', 'Shoulders', 'Arms'],
-                'workout_style': 'strength'
-            }
-        }
+    def __init__(self, rules_path: Optional[str] = None):
+        # Rules come from the rule file on every call, so edits apply without a restart
+        self.rules_path = rules_path
     
-    def generate_workout_plan(self, fitness_level: str, goal: str, bmi: float, bmi_category: str) -> Dict[str, Any]:
-        """Generate a 7-day workout plan based on user parameters"""
-        
-        level_config = self.fitness_levels[fitness_level]
-        goal_config = self.goal_priorities[goal]
-        exercises_per_day = level_config['exercises_per_day']
-        rest_days_count = level_config['rest_days']
+    @property
+    def rules(self) -> RuleTable:
+        return current_rules(self.rules_path)
+    
+    @property
+    def fitness_levels(self) -> Dict[str, Dict[str, Any]]:
+        """Fitness level -> exercises_per_day, rest_days and max_difficulty"""
+        return self.rules.fitness_levels
+    
+    @property
+    def goal_priorities(self) -> Dict[str, Dict[str, Any]]:
+        """Goal -> primary_focus and workout_style"""
+        return self.rules.goal_priorities
+    
+    def generate_workout_plan(self, fitness_level: str, goal: str, bmi: float, bmi_category: str,
+                              equipment: Optional[List[str]] = None,
+                              avoid_joints: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Generate a 7-day workout plan based on user parameters
         
-        # Base workout split based on fitness level and goal
-        if fitness_level == 'Beginner':
-            base_split = self._get_beginner_split(goal_config['primary_focus'])
-        elif fitness_level == 'Intermediate':
-            base_split = self._get_intermediate_split(goal_config['primary_focus'])
-        else:  # Advanced
-            base_split = self._get_advanced_split(goal_config['primary_focus'])
+        ``equipment`` restricts exercises to what the user has available (None
+        means a full gym) and ``avoid_joints`` drops exercises that load an
+        injured joint. Exercises harder than the rules' max_difficulty for the
+        profile are never chosen.
+        """
         
-        # Adjust for BMI if needed
-        if bmi_category in ['Overweight', 'Obese'] and goal != 'Fat Loss':
-            # Add more cardio for higher BMI individuals
-            base_split = self._add_cardio_emphasis(base_split)
+        # Split, volume and style come from one lookup in the compiled rule table
+        rule = self.rules.lookup(fitness_level, goal, bmi_category)
         
         # Generate specific exercises for each day
         workout_plan = {}
         days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
         
-        for i, day in enumerate(days):
-            muscle_group = base_split[i]
-            
-            if muscle_group == 'Rest':
-                workout_plan[day] = {
-                    'muscle_group': 'Rest',
-                    'exercises': [],
-                    'notes': 'Recovery day - light stretching or walking recommended'
-                }
-            else:
-                exercises = self._select_exercises(muscle_group, exercises_per_day, goal_config['workout_style'])
-                workout_plan[day] = {
-                    'muscle_group': muscle_group,
-                    'exercises': exercises,
-                    'notes': f'Focus on {muscle_group.lower()} development'
-                }
+        for day, muscle_group in zip(days, rule['split']):
+            workout_plan[day] = self._build_day(muscle_group, rule['exercises_per_day'], rule['workout_style'],
+                                                equipment, avoid_joints, rule['max_difficulty'])
         
         return workout_plan
     
-    def _get_beginner_split(self, focus_areas: List[str]) -> List[str]:
-        """Generate beginner-friendly workout split"""
-        return [
-            'Chest',      # Monday
-            'Back',       # Tuesday  
-            'Rest',       # Wednesday
-            'Legs',       # Thursday
-            'Arms',       # Friday
-            'Rest',       # Saturday
-            'Core'        # Sunday
-        ]
+    def _build_day(self, muscle_group: str, exercises_per_day: int, workout_style: str,
+                   equipment: Optional[List[str]] = None,
+                   avoid_joints: Optional[List[str]] = None,
+                   max_difficulty: Optional[str] = None) -> Dict[str, Any]:
+        """Build one day of a plan for a muscle group (or 'Rest')"""
+        if muscle_group == 'Rest':
+            exercises = []
+        else:
+            exercises = self._select_exercises(muscle_group, exercises_per_day, workout_style, equipment, avoid_joints,
+                                               max_difficulty)
+        return {
+            'muscle_group': muscle_group,
+            'exercises': exercises,
+            'notes': self.day_notes(muscle_group, exercises)
+        }
+    
+    @staticmethod
+    def day_notes(muscle_group: str, exercises: List[str]) -> str:
+        """Notes shown for a plan day, derived from its muscle group and exercises"""
+        if muscle_group == 'Rest':
+            return 'Recovery day - light stretching or walking recommended'
+        if exercises:
+            return f'Focus on {muscle_group.lower()} development'
+        return f'No {muscle_group.lower()} exercises match your equipment and injuries - active recovery instead'
+    
+    @staticmethod
+    def interval_session(exercises: List[str], fitness_level: str) -> List[Dict[str, Any]]:
+        """Timed work/rest intervals for a circuit day
+        
+        Every round works through the exercises in order with a short rest
+        after each and a longer one between rounds; there is no rest after
+        the last exercise. Each interval is a dict with 'kind' ('work' or
+        'rest'), 'exercise' (the next one for rests), 'round' and 'seconds'.
+        """
+        config = CIRCUIT_INTERVALS[fitness_level]
+        intervals = []
+        for round_number in range(1, config['rounds'] + 1):
+            for i, exercise in enumerate(exercises):
+                if intervals:
+                    rest = config['rest'] if i else config['round_rest']
+                    intervals.append({'kind': 'rest', 'exercise': exercise, 'round': round_number, 'seconds': rest})
+                intervals.append({'kind': 'work', 'exercise': exercise, 'round': round_number,
+                                  'seconds': config['work']})
+        return intervals
     
-    def _get_intermediate_split(self, focus_areas: List[str]) -> List[str]:
-        """Generate intermediate workout split"""
-        return [
-            'Chest',      # Monday
-            'Back',       # Tuesday
-            'Legs',       # Wednesday
-            'Shoulders',  # Thursday
-            'Arms',       # Friday
-            'Core',       # Saturday
-            'Rest'        # Sunday
-        ]
+    def swap_exercise(self, workout_plan: Dict[str, Any], day: str, exercise: str,
+                      replacement: Optional[str] = None,
+                      equipment: Optional[List[str]] = None,
+                      avoid_joints: Optional[List[str]] = None,
+                      max_difficulty: Optional[str] = None) -> Dict[str, Any]:
+        """Replace one exercise of a day, leaving the rest of the plan untouched
+        
+        Without an explicit ``replacement`` the most similar exercise from the
+        catalog's similarity graph is used that is not already in that day
+        and fits ``equipment``, ``avoid_joints`` and ``max_difficulty``.
+        Returns a new plan that shares every other day with the original.
+        """
+        day_plan = workout_plan[day]
+        if exercise not in day_plan['exercises']:
+            raise ValueError(f"{exercise} is not part of {day}'s workout")
+        if replacement is None:
+            options = self.exercise_alternatives(workout_plan, day, exercise, equipment, avoid_joints, limit=1,
+                                                 max_difficulty=max_difficulty)
+            if not options:
+                return workout_plan
+            replacement = options[0]
+        exercises = [replacement if ex == exercise else ex for ex in day_plan['exercises']]
+        return {**workout_plan, day: {**day_plan, 'exercises': exercises}}
     
-    def _get_advanced_split(self, focus_areas: List[str]) -> List[str]:
-        """Generate advanced workout split"""
-        return [
-            'Chest',      # Monday
-            'Shoulders',  # Tuesday
-            'Arms',       # Wednesday
-            'Back',       # Thursday
-            'Arms',       # Friday (Arms + Shoulders focus)
-            'Legs',       # Saturday
-            'Rest'        # Sunday
-        ]
+    def exercise_alternatives(self, workout_plan: Dict[str, Any], day: str, exercise: str,
+                              equipment: Optional[List[str]] = None,
+                              avoid_joints: Optional[List[str]] = None,
+                              limit: int = 5,
+                              max_difficulty: Optional[str] = None) -> List[str]:
+        """Substitutes for an exercise of a day, most similar first (none harder than ``max_difficulty``)"""
+        constraints = {'avoid_joints': avoid_joints, 'max_difficulty': max_difficulty}
+        if equipment is not None:
+            constraints['equipment'] = equipment
+        return EXERCISE_INDEX.alternatives(exercise, exclude=workout_plan[day]['exercises'], limit=limit,
+                                           **constraints)
     
-    def _add_cardio_emphasis(self, split: List[str]) -> List[str]:
-        """Add cardio emphasis for weight loss"""
-        # Replace one rest day with cardio for higher BMI individuals
-        modified_split = split.copy()
-        for i, day in enumerate(modified_split):
-            if day == 'Rest' and i > 0:  # Keep at least one rest day
-                modified_split[i] = 'Cardio'
-                break
-        return modified_split
+    def substitute_day(self, workout_plan: Dict[str, Any], day: str, muscle_group: str,
+                       fitness_level: str, goal: str, bmi_category: str,
+                       equipment: Optional[List[str]] = None,
+                       avoid_joints: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Rebuild a single day for another muscle group (or 'Rest'); other days are shared, not regenerated"""
+        rule = self.rules.lookup(fitness_level, goal, bmi_category)
+        day_plan = self._build_day(muscle_group, rule['exercises_per_day'], rule['workout_style'],
+                                   equipment, avoid_joints, rule['max_difficulty'])
+        return {**workout_plan, day: day_plan}
     
-    def _select_exercises(self, muscle_group: str, count: int, workout_style: str) -> List[str]:
+    def next_day(self, fatigue: FatigueModel, fitness_level: str, goal: str, bmi_category: str, as_of: str,
+                 equipment: Optional[List[str]] = None,
+                 avoid_joints: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Build the session for a date from what the member actually completed
+        
+        Unlike the fixed weekly splits, the muscle group comes from the
+        member's fatigue state: the least trained of the goal's focus groups
+        that has recovered, or 'Rest' when none has.
+        """
+        muscle_group = fatigue.next_group(self.goal_priorities[goal]['primary_focus'], as_of)
+        rule = self.rules.lookup(fitness_level, goal, bmi_category)
+        return self._build_day(muscle_group, rule['exercises_per_day'], rule['workout_style'],
+                               equipment, avoid_joints, rule['max_difficulty'])
+    
+    def _select_exercises(self, muscle_group: str, count: int, workout_style: str,
+                          equipment: Optional[List[str]] = None,
+                          avoid_joints: Optional[List[str]] = None,
+                          max_difficulty: Optional[str] = None) -> List[str]:
         """Select specific exercises for a muscle group"""
-        available_exercises = EXERCISE_DATABASE.get(muscle_group, [])
+        if equipment is None and not avoid_joints and max_difficulty is None:
+            available_exercises = EXERCISE_DATABASE.get(muscle_group, [])
+        else:
+            available_exercises = EXERCISE_INDEX.filter(muscle_group=muscle_group, equipment=equipment,
+                                                         avoid_joints=avoid_joints, max_difficulty=max_difficulty)
         
         if not available_exercises:
             return []
@@ -168,77 +184,5 @@ class WorkoutRecommender:
         # Ensure we don't exceed available exercises
         count = min(count, len(available_exercises))
         
-        # Select exercises based on workout style
-        if workout_style == 'hypertrophy':
-            # Focus on compound and isolation exercises
-            selected = self._prioritize_compound_exercises(available_exercises, count)
-        elif workout_style == 'circuit':
-            # Mix of compound exercises and higher intensity
-            selected = self._prioritize_circuit_exercises(available_exercises, count)
-        else:  # strength
-            # Focus on compound movements
-            selected = self._prioritize_strength_exercises(available_exercises, count)
-        
-        return selected
-    
-    def _prioritize_compound_exercises(self, exercises: List[str], count: int) -> List[str]:
-        """Prioritize compound exercises for hypertrophy"""
-        compound_keywords = ['Press', 'Pull', 'Row', 'Squat', 'Deadlift', 'Dip']
-        
-        # Sort exercises by compound movement priority
-        compound_exercises = [ex for ex in exercises if any(keyword in ex for keyword in compound_keywords)]
-        isolation_exercises = [ex for ex in exercises if ex not in compound_exercises]
-        
-        # Select mix of compound and isolation
-        selected = []
-        
-        # Start with compound exercises
-        for ex in compound_exercises[:max(1, count // 2)]:
-            selected.append(ex)
-        
-        # Fill remaining with isolation
-        remaining = count - len(selected)
-        for ex in isolation_exercises[:remaining]:
-            selected.append(ex)
-        
-        # If still need more, add remaining compound
-        remaining = count - len(selected)
-        for ex in compound_exercises[len(selected):]:
-            if len(selected) < count:
-                selected.append(ex)
-        
-        return selected[:count]
-    
-    def _prioritize_circuit_exercises(self, exercises: List[str], count: int) -> List[str]:
-        """Select exercises suitable for circuit training"""
-        # Prefer bodyweight and dynamic exercises for circuits
-        circuit_friendly = ['Push-ups', 'Pull-ups', 'Squats', 'Burpees', 'Mountain Climbers', 
-                           'Jump Squats', 'High Knees', 'Plank', 'Jumping Jacks']
-        
-        # Filter available exercises that are circuit-friendly
-        preferred = [ex for ex in exercises if any(friendly in ex for friendly in circuit_friendly)]
-        others = [ex for ex in exercises if ex not in preferred]
-        
-        # Select from preferred first, then others
-        selected = preferred[:count]
-        if len(selected) < count:
-            remaining = count - len(selected)
-            selected.extend(others[:remaining])
-        
-        return selected[:count]
-    
-    def _prioritize_strength_exercises(self, exercises: List[str], count: int) -> List[str]:
-        """Prioritize heavy compound movements for strength"""
-        strength_exercises = ['Deadlifts', 'Squats', 'Bench Press', 'Military Press', 
-                            'Barbell Rows', 'Pull-ups', 'Overhead Press']
-        
-        # Prioritize strength movements
-        preferred = [ex for ex in exercises if any(strength in ex for strength in strength_exercises)]
-        others = [ex for ex in exercises if ex not in preferred]
-        
-        selected = preferred[:count]
-        if len(selected) < count:
-            remaining = count - len(selected)
-            selected.extend(others[:remaining])
-        
-        return selected[:count]
+        # Select exercises with the workout style's strategy from the rules
+        return self.rules.select(available_exercises, count, workout_style)